@@ -1,12 +1,22 @@
+from observatory import startup
+
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from scipy.stats import ttest_ind, pearsonr
-from sklearn.linear_model import LinearRegression
+import html
 import os
+from datetime import datetime
+
+from observatory import analytics, clustering, comovement, earlywarning, exports, markov, perf
+from observatory.cached import (
+    DATA_BACKEND, DATA_DIR, DEFAULT_DATA_PATH, get_catalog, get_figure_cache, get_watcher, load_meta, compute_analytics, compute_concentration, compute_heatmap, compute_clusters, compute_comovement, compute_release_diff, compute_watchlist, compute_custom_regions, get_region_store, get_similarity_index, get_snapshot_store, fit_transitions, simulate_transitions, load_chart_series, load_country_series,
+)
+from observatory.figure_cache import figure_key, build_animated_map
+from observatory.theme import (
+    CSS, COLOR_SEQ, CRIMSON, GOLD, MAP_COLORBAR, MAP_COLORSCALE, MAP_FIGURE_LAYOUT, PHASE_COLORS, PLOTLY_LAYOUT, TEAL,
+)
+from observatory.downsample import MAX_POINTS, render_mode, scatter_trace
 
 # ─────────────────────────────────────────────
 # PAGE CONFIG
@@ -18,326 +28,29 @@ st.set_page_config(
     initial_sidebar_state="expanded",
 )
 
-# ─────────────────────────────────────────────
-# CUSTOM CSS — Dark editorial aesthetic
-# ─────────────────────────────────────────────
-st.markdown("""
-<style>
-@import url('https://fonts.googleapis.com/css2?family=DM+Serif+Display:ital@0;1&family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,400;0,9..40,600;1,9..40,300&family=JetBrains+Mono:wght@400;700&display=swap');
-
-/* ── Root palette ── */
-:root {
-    --bg:         #0d0f14;
-    --surface:    #151820;
-    --surface2:   #1c2030;
-    --border:     #252b3b;
-    --gold:       #e8b84b;
-    --gold-light: #f5d07a;
-    --crimson:    #d94f4f;
-    --teal:       #3ecfb2;
-    --muted:      #6b7696;
-    --text:       #e8eaf2;
-    --text-dim:   #a0a8c0;
-}
-
-/* ── Base reset ── */
-html, body, [class*="css"], .stApp {
-    background-color: var(--bg) !important;
-    color: var(--text) !important;
-    font-family: 'DM Sans', sans-serif !important;
-}
-
-/* ── Sidebar ── */
-[data-testid="stSidebar"] {
-    background-color: var(--surface) !important;
-    border-right: 1px solid var(--border) !important;
-}
-[data-testid="stSidebar"] * { color: var(--text) !important; }
-
-/* ── Headers ── */
-h1, h2, h3, h4 {
-    font-family: 'DM Serif Display', serif !important;
-    color: var(--text) !important;
-    letter-spacing: -0.02em;
-}
-
-/* ── Metrics ── */
-[data-testid="metric-container"] {
-    background: var(--surface2) !important;
-    border: 1px solid var(--border) !important;
-    border-radius: 12px !important;
-    padding: 20px !important;
-}
-[data-testid="metric-container"] label {
-    color: var(--muted) !important;
-    font-size: 0.75rem !important;
-    text-transform: uppercase !important;
-    letter-spacing: 0.12em !important;
-    font-weight: 600 !important;
-}
-[data-testid="metric-container"] [data-testid="stMetricValue"] {
-    font-family: 'JetBrains Mono', monospace !important;
-    font-size: 2rem !important;
-    color: var(--gold) !important;
-}
-[data-testid="metric-container"] [data-testid="stMetricDelta"] {
-    font-family: 'JetBrains Mono', monospace !important;
-}
-
-/* ── Tabs ── */
-[data-testid="stTabs"] button {
-    font-family: 'DM Sans', sans-serif !important;
-    font-weight: 600 !important;
-    color: var(--muted) !important;
-    border-bottom: 2px solid transparent !important;
-    background: transparent !important;
-}
-[data-testid="stTabs"] button[aria-selected="true"] {
-    color: var(--gold) !important;
-    border-bottom-color: var(--gold) !important;
-}
-
-/* ── Selectboxes & sliders ── */
-[data-testid="stSelectbox"] > div > div,
-[data-testid="stMultiSelect"] > div > div {
-    background-color: var(--surface2) !important;
-    border-color: var(--border) !important;
-    color: var(--text) !important;
-}
-
-/* ── Dividers ── */
-hr {
-    border-color: var(--border) !important;
-    margin: 2rem 0 !important;
-}
-
-/* ── Plotly charts: transparent background ── */
-.js-plotly-plot .plotly, .js-plotly-plot .plotly .main-svg {
-    background: transparent !important;
-}
-
-/* ── Custom hero banner ── */
-.hero-banner {
-    background: linear-gradient(135deg, #151820 0%, #1a1f2e 50%, #0d1117 100%);
-    border: 1px solid var(--border);
-    border-radius: 16px;
-    padding: 40px 48px;
-    margin-bottom: 2rem;
-    position: relative;
-    overflow: hidden;
-}
-.hero-banner::before {
-    content: '';
-    position: absolute;
-    top: -60px; right: -60px;
-    width: 300px; height: 300px;
-    background: radial-gradient(circle, rgba(232,184,75,0.08) 0%, transparent 70%);
-    pointer-events: none;
-}
-.hero-title {
-    font-family: 'DM Serif Display', serif;
-    font-size: 2.8rem;
-    line-height: 1.1;
-    color: var(--text);
-    margin: 0 0 8px 0;
-}
-.hero-subtitle {
-    font-size: 1rem;
-    color: var(--muted);
-    margin: 0;
-    max-width: 600px;
-    line-height: 1.6;
-}
-.hero-tag {
-    display: inline-block;
-    background: rgba(232,184,75,0.12);
-    color: var(--gold);
-    font-size: 0.7rem;
-    font-weight: 700;
-    letter-spacing: 0.15em;
-    text-transform: uppercase;
-    padding: 4px 12px;
-    border-radius: 100px;
-    border: 1px solid rgba(232,184,75,0.25);
-    margin-bottom: 16px;
-}
-
-/* ── Section labels ── */
-.section-label {
-    font-size: 0.7rem;
-    font-weight: 700;
-    letter-spacing: 0.18em;
-    text-transform: uppercase;
-    color: var(--gold);
-    margin-bottom: 4px;
-}
-.section-title {
-    font-family: 'DM Serif Display', serif;
-    font-size: 1.6rem;
-    color: var(--text);
-    margin: 0 0 8px 0;
-}
-.section-desc {
-    color: var(--text-dim);
-    font-size: 0.9rem;
-    line-height: 1.6;
-    margin-bottom: 24px;
-}
-
-/* ── Insight cards ── */
-.insight-card {
-    background: var(--surface2);
-    border: 1px solid var(--border);
-    border-left: 3px solid var(--gold);
-    border-radius: 10px;
-    padding: 16px 20px;
-    margin-top: 12px;
-    font-size: 0.88rem;
-    color: var(--text-dim);
-    line-height: 1.6;
-}
-.insight-card strong { color: var(--gold); }
-
-/* ── Stat highlight ── */
-.stat-row {
-    display: flex;
-    gap: 12px;
-    margin-bottom: 20px;
-    flex-wrap: wrap;
-}
-.stat-chip {
-    background: rgba(232,184,75,0.08);
-    border: 1px solid rgba(232,184,75,0.2);
-    border-radius: 8px;
-    padding: 8px 16px;
-    font-family: 'JetBrains Mono', monospace;
-    font-size: 0.85rem;
-    color: var(--gold-light);
-}
-
-/* ── Footer ── */
-.footer {
-    text-align: center;
-    color: var(--muted);
-    font-size: 0.78rem;
-    padding: 32px 0 16px;
-    border-top: 1px solid var(--border);
-    margin-top: 40px;
-}
-
-/* ── Hide streamlit branding ── */
-#MainMenu, footer, header { visibility: hidden; }
-</style>
-""", unsafe_allow_html=True)
-
-# ─────────────────────────────────────────────
-# PLOTLY THEME
-# ─────────────────────────────────────────────
-_BASE_LAYOUT = dict(
-    paper_bgcolor="rgba(0,0,0,0)",
-    plot_bgcolor="rgba(0,0,0,0)",
-    font=dict(family="DM Sans, sans-serif", color="#a0a8c0", size=12),
-    title_font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18),
-    legend=dict(
-        bgcolor="rgba(21,24,32,0.8)", bordercolor="#252b3b", borderwidth=1,
-        font=dict(color="#a0a8c0")
-    ),
-    margin=dict(l=20, r=20, t=50, b=20),
-    hoverlabel=dict(bgcolor="#1c2030", bordercolor="#252b3b", font=dict(color="#e8eaf2")),
-)
-
-_AXIS_STYLE = dict(
-    xaxis=dict(gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696")),
-    yaxis=dict(gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696")),
-)
-
-# Full layout with axes (for cartesian charts)
-PLOTLY_LAYOUT = {**_BASE_LAYOUT, **_AXIS_STYLE}
-
-# Map-safe layout without xaxis/yaxis (for choropleth/geo charts)
-PLOTLY_MAP_LAYOUT = {**_BASE_LAYOUT}
-
-GOLD = "#e8b84b"
-CRIMSON = "#d94f4f"
-TEAL = "#3ecfb2"
-MUTED = "#6b7696"
-
-COLOR_SEQ = [GOLD, TEAL, CRIMSON, "#9b7fe8", "#4fc3f7", "#ff8a65", "#81c784"]
-
-# ─────────────────────────────────────────────
-# DATA LOADING
-# ─────────────────────────────────────────────
-@st.cache_data(show_spinner=False)
-def load_data(file):
-    df_raw = pd.read_csv(file)
-    df_raw["date"] = pd.to_datetime(df_raw["TIME_PERIOD"], format="%Y-%m", errors="coerce")
-    df_raw["phase"] = df_raw["COMP_BREAKDOWN_2"].str.extract(r"PHASE(\d)").astype(float)
-
-    df = df_raw.rename(columns={
-        "REF_AREA": "iso3",
-        "REF_AREA_LABEL": "country",
-        "UNIT_MEASURE": "unit",
-        "OBS_VALUE": "value"
-    })[["iso3", "country", "date", "phase", "unit", "value"]]
-
-    df = df.dropna(subset=["date", "phase", "value"])
-    df["phase"] = df["phase"].astype(int)
-
-    west_africa = [
-        "Benin","Burkina Faso","Cabo Verde","Côte d'Ivoire","Gambia",
-        "Ghana","Guinea","Guinea-Bissau","Liberia","Mali","Mauritania",
-        "Niger","Nigeria","Senegal","Sierra Leone","Togo","Chad"
-    ]
-    east_africa = [
-        "Burundi","Djibouti","Eritrea","Ethiopia","Kenya","Rwanda",
-        "South Sudan","Sudan","Uganda","Tanzania"
-    ]
-
-    def assign_region(c):
-        if c in west_africa: return "West Africa"
-        elif c in east_africa: return "East Africa"
-        else: return "Other"
-
-    df["Region"] = df["country"].apply(assign_region)
-
-    df_people = df[df["unit"] == "PS"].copy()
-    df_pct    = df[df["unit"] == "PT"].copy()
-
-    wide_people = df_people.pivot_table(
-        index=["iso3","country","Region","date"],
-        columns="phase", values="value", aggfunc="sum"
-    ).reset_index()
-
-    wide_pct = df_pct.pivot_table(
-        index=["iso3","country","Region","date"],
-        columns="phase", values="value", aggfunc="mean"
-    ).reset_index()
-
-    wide_people.columns = [f"phase_{int(c)}_people" if isinstance(c, (int, float)) else c for c in wide_people.columns]
-    wide_pct.columns    = [f"phase_{int(c)}_pct"    if isinstance(c, (int, float)) else c for c in wide_pct.columns]
-
-    for p in [3,4,5]:
-        if f"phase_{p}_people" not in wide_people.columns:
-            wide_people[f"phase_{p}_people"] = 0
-        if f"phase_{p}_pct" not in wide_pct.columns:
-            wide_pct[f"phase_{p}_pct"] = 0
-
-    wide_people["crisis_plus_people"] = wide_people[["phase_3_people","phase_4_people","phase_5_people"]].fillna(0).sum(axis=1)
-    wide_pct["crisis_plus_pct"]       = wide_pct[["phase_3_pct","phase_4_pct","phase_5_pct"]].fillna(0).sum(axis=1)
-
-    wide_pct["severe_share"] = np.where(
-        wide_pct["crisis_plus_pct"] > 0,
-        wide_pct[["phase_4_pct","phase_5_pct"]].fillna(0).sum(axis=1) / wide_pct["crisis_plus_pct"],
-        np.nan
-    )
-
-    return wide_people, wide_pct
-
-# ─────────────────────────────────────────────
-# SIDEBAR
-# ─────────────────────────────────────────────
-with st.sidebar:
-    st.markdown("""
+# Per-rerun timings for the optional performance panel at the bottom of the sidebar
+perf_run = perf.start_run()
+
+# Profile only while the panel that shows the profiler is open; ``profiling``
+# stops it however the rerun ends (st.rerun, st.stop or an error)
+profile_rerun = bool(st.session_state.get("perf_panel") and st.session_state.get("perf_profile"))
+with perf.profiling(perf_run, enabled=profile_rerun):
+
+    # ─────────────────────────────────────────────
+    # CUSTOM CSS — Dark editorial aesthetic
+    # ─────────────────────────────────────────────
+    st.markdown(CSS, unsafe_allow_html=True)
+
+    # ─────────────────────────────────────────────
+    # FIGURE CACHE
+    # ─────────────────────────────────────────────
+    FIGURES = get_figure_cache()
+
+    # ─────────────────────────────────────────────
+    # SIDEBAR
+    # ─────────────────────────────────────────────
+    with st.sidebar:
+        st.markdown("""
     <div style='margin-bottom:24px'>
       <div class='section-label'>Dashboard</div>
       <div style='font-family:"DM Serif Display",serif;font-size:1.3rem;color:#e8eaf2;line-height:1.2'>
@@ -346,7 +59,7 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-    st.markdown("""
+        st.markdown("""
     <div style='font-size:0.8rem;color:#6b7696;line-height:1.8'>
     <b style='color:#e8b84b'>IPC Phases</b><br>
     Phase 1 — Minimal<br>
@@ -357,64 +70,116 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
-    DATA_PATH = os.path.join(os.path.dirname(__file__), "IPC_IPC_PHASE.csv")
-    if not os.path.exists(DATA_PATH):
-        st.error(f"Dataset not found at: {DATA_PATH}")
-        st.stop()
+        DATA_PATH = DEFAULT_DATA_PATH
+        if not os.path.exists(DATA_PATH):
+            st.error(f"Dataset not found at: {DATA_PATH}")
+            st.stop()
 
-    wide_people, wide_pct = load_data(DATA_PATH)
+        watcher = get_watcher(DATA_PATH, DATA_BACKEND)
+        backend = watcher.current  # one build for the whole rerun, even if a swap lands mid-run
+        meta = load_meta(DATA_PATH, DATA_BACKEND, backend.version)
 
-    all_countries = sorted(wide_pct["country"].unique())
-    all_regions   = sorted(wide_pct["Region"].unique())
+        all_countries = meta["countries"]
+        all_regions   = meta["regions"]
 
-    st.markdown("---")
-    st.markdown("### 🔍 Filters")
+        st.markdown("---")
+        st.markdown("### 🔍 Filters")
 
-    selected_regions = st.multiselect(
-        "Regions", all_regions, default=all_regions,
-        help="Filter all charts by region"
-    )
+        selected_regions = st.multiselect(
+            "Regions", all_regions, default=all_regions,
+            help="Filter all charts by region"
+        )
 
-    min_date = wide_pct["date"].min()
-    max_date = wide_pct["date"].max()
+        min_date = meta["min_date"]
+        max_date = meta["max_date"]
 
-    date_range = st.slider(
-        "Date range",
-        min_value=min_date.to_pydatetime(),
-        max_value=max_date.to_pydatetime(),
-        value=(min_date.to_pydatetime(), max_date.to_pydatetime()),
-        format="YYYY-MM"
-    )
+        date_range = st.slider(
+            "Date range",
+            min_value=min_date.to_pydatetime(),
+            max_value=max_date.to_pydatetime(),
+            value=(min_date.to_pydatetime(), max_date.to_pydatetime()),
+            format="YYYY-MM"
+        )
 
-    st.markdown("---")
-    st.markdown("""
+        quality = st.radio(
+            "Flagged observations", analytics.QUALITY_MODES, horizontal=True,
+            format_func={"include": "Include", "downweight": "Down-weight", "exclude": "Exclude"}.get,
+            help="How analyses with phase values marked missing (OBS_STATUS) count in trends, "
+                 "rankings and snapshots. Down-weight scales each by the share of phases reported; "
+                 "exclude drops those missing any of Phases 1–4 (Phase 5 is routinely withheld when nobody is in Famine)."
+        )
+
+        # Ad-hoc groupings, aggregated on the fly in the Regional Analysis tab
+        region_store = get_region_store()
+        custom_regions = region_store.all()
+        with st.expander("🧭 Custom regions"):
+            with st.form("custom_region_form", clear_on_submit=True):
+                cr_name = st.text_input("Name", placeholder="e.g. Sahel")
+                cr_members = st.multiselect("Countries", list(meta["iso3"]), format_func=lambda code: meta["iso3"][code])
+                if st.form_submit_button("Save region"):
+                    try:
+                        region_store.save(cr_name, cr_members)
+                        custom_regions = region_store.all()
+                    except ValueError as e:
+                        st.warning(str(e))
+            if custom_regions:
+                cr_saved = st.selectbox("Saved regions", list(custom_regions),
+                                        format_func=lambda n: f"{n} ({len(custom_regions[n])} countries)")
+                st.caption(", ".join(meta["iso3"].get(c, c) for c in custom_regions[cr_saved]))
+                if st.button("Delete region", key="cr_delete"):
+                    region_store.delete(cr_saved)
+                    st.rerun()
+
+        # Which build of the CSV this rerun is served from
+        data_status = (
+            f"<br><span style='color:{GOLD}'>⟳ newer file detected, rebuilding…</span>" if watcher.refreshing else
+            # The error text comes from the exception (paths, parser messages), so escape it
+            f"<br><span style='color:{CRIMSON}'>refresh failed: {html.escape(watcher.last_error)}</span>"
+            if watcher.last_error else ""
+        )
+        st.markdown(f"""
+    <div style='font-size:0.75rem;color:#6b7696;margin-top:0.6rem'>
+    Dataset version <code>{backend.version}</code><br>
+    loaded {datetime.fromtimestamp(watcher.loaded_at):%Y-%m-%d %H:%M}{data_status}
+    </div>
+    """, unsafe_allow_html=True)
+
+        st.markdown("---")
+        st.markdown("""
     <div style='font-size:0.75rem;color:#6b7696'>
     Built for DSCD 611 Final Project<br>
     IPC Phase Classification Analysis
     </div>
     """, unsafe_allow_html=True)
 
-# ─────────────────────────────────────────────
-# FILTER DATA
-# ─────────────────────────────────────────────
-mask_pct = (
-    wide_pct["Region"].isin(selected_regions) &
-    (wide_pct["date"] >= pd.Timestamp(date_range[0])) &
-    (wide_pct["date"] <= pd.Timestamp(date_range[1]))
-)
-mask_ppl = (
-    wide_people["Region"].isin(selected_regions) &
-    (wide_people["date"] >= pd.Timestamp(date_range[0])) &
-    (wide_people["date"] <= pd.Timestamp(date_range[1]))
-)
-
-wp  = wide_pct[mask_pct].copy()
-wpl = wide_people[mask_ppl].copy()
-
-# ─────────────────────────────────────────────
-# HERO
-# ─────────────────────────────────────────────
-st.markdown("""
+    perf_run.checkpoint("sidebar & data model")
+
+    # ─────────────────────────────────────────────
+    # FILTER DATA
+    # ─────────────────────────────────────────────
+    filter_key = (DATA_PATH, DATA_BACKEND, backend.version, tuple(selected_regions), date_range[0], date_range[1])
+    tables = compute_analytics(*filter_key, quality)
+    chart_series = load_chart_series(*filter_key, MAX_POINTS, quality)
+    coverage = tables["coverage"].set_index("frame")
+
+
+    def coverage_note(frame="pct"):
+        """Caption stating how many of the filtered analyses a figure rests on."""
+        c = coverage.loc[frame]
+        if not c["analyses"]:
+            return
+        used = f"{c['used']:.0f} of {c['analyses']:.0f} analyses used"
+        if quality == "downweight":
+            used += f" (effective {c['weight']:.0f})"
+        st.caption(f"Coverage: {used} · {c['complete']:.0f} report Phases 1–4 in full · "
+                   f"{c['reported']:.0%} of phase values reported")
+
+    perf_run.checkpoint("filtered analytics")
+
+    # ─────────────────────────────────────────────
+    # HERO
+    # ─────────────────────────────────────────────
+    st.markdown("""
 <div class='hero-banner'>
   <div class='hero-tag'>IPC Phase 3+ · Acute Food Insecurity</div>
   <div class='hero-title'>Global Food Crisis<br>Observatory</div>
@@ -426,203 +191,225 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-# ─────────────────────────────────────────────
-# KPI CARDS
-# ─────────────────────────────────────────────
-latest_pct = wp.loc[wp.groupby("country")["date"].idxmax()]
-latest_ppl = wpl.loc[wpl.groupby("country")["date"].idxmax()]
-
-total_crisis   = latest_ppl["crisis_plus_people"].sum()
-mean_pct       = latest_pct["crisis_plus_pct"].mean()
-n_countries    = latest_pct["country"].nunique()
-worst_country  = latest_pct.sort_values("crisis_plus_pct", ascending=False).iloc[0]
-
-top5_share = (
-    latest_ppl.sort_values("crisis_plus_people", ascending=False)
-    .head(5)["crisis_plus_people"].sum() / latest_ppl["crisis_plus_people"].sum() * 100
-)
-
-k1, k2, k3, k4, k5 = st.columns(5)
-k1.metric("People in Phase 3+", f"{total_crisis/1e6:.1f}M")
-k2.metric("Global Avg Severity", f"{mean_pct:.1f}%")
-k3.metric("Countries Monitored", str(n_countries))
-k4.metric("Most Affected", worst_country["country"], f"{worst_country['crisis_plus_pct']:.0f}%")
-k5.metric("Top 5 Countries Share", f"{top5_share:.0f}%", "of global crisis pop.")
-
-st.markdown("<br>", unsafe_allow_html=True)
-
-# ─────────────────────────────────────────────
-# TABS
-# ─────────────────────────────────────────────
-tab1, tab2, tab3, tab4, tab5 = st.tabs([
-    "🌐 Global Trends",
-    "🏆 Country Rankings",
-    "🌍 Regional Analysis",
-    "📉 Deterioration & Recovery",
-    "🔬 Statistical Insights",
-])
-
-# ══════════════════════════════════════════════
-# TAB 1 — GLOBAL TRENDS
-# ══════════════════════════════════════════════
-with tab1:
-    col_l, col_r = st.columns([3, 2])
-
-    with col_l:
-        st.markdown('<div class="section-label">Question 1</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Global Trend in Phase 3+ Severity</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Average percentage of population classified as Phase 3 or above across all monitored countries over time.</div>', unsafe_allow_html=True)
-
-        global_trend = wp.groupby("date")["crisis_plus_pct"].mean().reset_index()
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=global_trend["date"], y=global_trend["crisis_plus_pct"],
-            mode="lines",
-            line=dict(color=GOLD, width=2.5),
-            fill="tozeroy",
-            fillcolor="rgba(232,184,75,0.08)",
-            name="Phase 3+ %",
-            hovertemplate="<b>%{x|%b %Y}</b><br>%{y:.1f}%<extra></extra>"
-        ))
-
-        # Add rolling average
-        global_trend["roll"] = global_trend["crisis_plus_pct"].rolling(3, min_periods=1).mean()
-        fig.add_trace(go.Scatter(
-            x=global_trend["date"], y=global_trend["roll"],
-            mode="lines",
-            line=dict(color=TEAL, width=1.5, dash="dash"),
-            name="3-period avg",
-            hovertemplate="<b>%{x|%b %Y}</b><br>3-mo avg: %{y:.1f}%<extra></extra>"
-        ))
-
-        fig.update_layout(**PLOTLY_LAYOUT, height=340,
-                          title="Global Average % Population in Phase 3+")
-        st.plotly_chart(fig, use_container_width=True)
-
-    with col_r:
-        st.markdown('<div class="section-label">Phase Breakdown</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Phase Composition</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Average share of population in each IPC phase at latest snapshot.</div>', unsafe_allow_html=True)
-
-        phase_cols = ["phase_1_pct","phase_2_pct","phase_3_pct","phase_4_pct","phase_5_pct"]
-        phase_labels = ["Phase 1\nMinimal","Phase 2\nStressed","Phase 3\nCrisis",
-                        "Phase 4\nEmergency","Phase 5\nCatastrophe"]
-        phase_colors = ["#3a7d44","#8ab34a",GOLD,"#d97a2a",CRIMSON]
-
-        avgs = []
-        for col in phase_cols:
-            if col in latest_pct.columns:
-                avgs.append(latest_pct[col].mean())
-            else:
-                avgs.append(0)
-
-        fig2 = go.Figure(go.Bar(
-            x=avgs,
-            y=phase_labels,
-            orientation="h",
-            marker_color=phase_colors,
-            text=[f"{v:.1f}%" for v in avgs],
-            textposition="outside",
-            textfont=dict(color="#e8eaf2"),
-            hovertemplate="<b>%{y}</b><br>Avg: %{x:.1f}%<extra></extra>"
-        ))
-        fig2.update_layout(**PLOTLY_LAYOUT, height=340,
-                           title="Average % per Phase (Latest Data)",
-                           xaxis_title="Percentage (%)")
-        st.plotly_chart(fig2, use_container_width=True)
-
-    # World Map
-    st.markdown("---")
-    st.markdown('<div class="section-label">Geographic View</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">World Map of Phase 3+ Severity</div>', unsafe_allow_html=True)
-
-    map_data = latest_pct[["iso3","country","crisis_plus_pct"]].dropna()
-
-    clim = float(map_data["crisis_plus_pct"].quantile(0.97))
-    fig_map = go.Figure(go.Choropleth(
-        locations=map_data["iso3"],
-        z=map_data["crisis_plus_pct"],
-        text=map_data["country"],
-        hovertemplate="<b>%{text}</b><br>Phase 3+: %{z:.1f}%<extra></extra>",
-        colorscale=[
-            [0,   "#1c2030"],
-            [0.2, "#3a5a4a"],
-            [0.4, "#8ab34a"],
-            [0.6, "#e8b84b"],
-            [0.8, "#d97a2a"],
-            [1.0, "#d94f4f"],
-        ],
-        zmin=0,
-        zmax=clim,
-        colorbar=dict(
-            title=dict(text="Phase 3+ %", font=dict(color="#a0a8c0")),
-            tickfont=dict(color="#a0a8c0"),
-            bgcolor="rgba(21,24,32,0.8)",
-            bordercolor="#252b3b",
-            borderwidth=1,
-        ),
-        marker_line_color="#252b3b",
-        marker_line_width=0.5,
-    ))
-    fig_map.update_layout(
-        height=420,
-        paper_bgcolor="rgba(0,0,0,0)",
-        margin=dict(l=0, r=0, t=45, b=0),
-        title=dict(
-            text="World Map: Phase 3+ Severity (%)",
-            font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18)
-        ),
-        font=dict(family="DM Sans, sans-serif", color="#a0a8c0"),
-        hoverlabel=dict(bgcolor="#1c2030", bordercolor="#252b3b", font=dict(color="#e8eaf2")),
-        geo=dict(
-            bgcolor="rgba(0,0,0,0)",
-            showframe=False,
-            showcoastlines=True,
-            coastlinecolor="#252b3b",
-            showland=True, landcolor="#1a1f2c",
-            showocean=True, oceancolor="#0d0f14",
-            showlakes=True, lakecolor="#0d0f14",
-            showcountries=True, countrycolor="#252b3b",
-        ),
-    )
-    st.plotly_chart(fig_map, use_container_width=True)
-
-# ══════════════════════════════════════════════
-# TAB 2 — COUNTRY RANKINGS
-# ══════════════════════════════════════════════
-with tab2:
-    col_a, col_b = st.columns(2)
-
-    with col_a:
-        st.markdown('<div class="section-label">Question 2</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Global Burden Contributors</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Which countries account for the largest share of the world\'s food crisis population?</div>', unsafe_allow_html=True)
-
-        lat_ppl = wpl.loc[wpl.groupby("country")["date"].idxmax()].copy()
-        lat_ppl["global_share"] = lat_ppl["crisis_plus_people"] / lat_ppl["crisis_plus_people"].sum() * 100
-        top10 = lat_ppl.sort_values("global_share", ascending=True).tail(10)
-
-        fig3 = go.Figure(go.Bar(
-            x=top10["global_share"], y=top10["country"],
-            orientation="h",
-            marker=dict(
-                color=top10["global_share"],
-                colorscale=[[0,"#1c3040"],[1,GOLD]],
-                showscale=False,
-                line=dict(width=0)
-            ),
-            text=[f"{v:.1f}%" for v in top10["global_share"]],
-            textposition="outside",
-            textfont=dict(color="#e8eaf2"),
-            hovertemplate="<b>%{y}</b><br>Global share: %{x:.1f}%<extra></extra>"
-        ))
-        fig3.update_layout(**PLOTLY_LAYOUT, height=400,
-                           title="Top 10 Countries by Share of Global Crisis Pop.")
-        st.plotly_chart(fig3, use_container_width=True)
+    # ─────────────────────────────────────────────
+    # KPI CARDS
+    # ─────────────────────────────────────────────
+    latest_pct = tables["latest_pct"]
+    latest_ppl = tables["latest_people"]
+
+    total_crisis   = latest_ppl["crisis_plus_people"].sum()
+    mean_pct       = latest_pct["crisis_plus_pct"].mean()
+    n_countries    = latest_pct["country"].nunique()
+    worst_country  = latest_pct.sort_values("crisis_plus_pct", ascending=False).iloc[0]
+
+    crisis_people = latest_ppl["crisis_plus_people"].to_numpy(dtype=float)
+    top5_share = crisis_people[analytics.top_k_desc(crisis_people, 5)].sum() / np.nansum(crisis_people) * 100
+
+    k1, k2, k3, k4, k5 = st.columns(5)
+    k1.metric("People in Phase 3+", f"{total_crisis/1e6:.1f}M")
+    k2.metric("Global Avg Severity", f"{mean_pct:.1f}%")
+    k3.metric("Countries Monitored", str(n_countries))
+    k4.metric("Most Affected", worst_country["country"], f"{worst_country['crisis_plus_pct']:.0f}%")
+    k5.metric("Top 5 Countries Share", f"{top5_share:.0f}%", "of global crisis pop.")
+    coverage_note("people")
+
+    st.markdown("<br>", unsafe_allow_html=True)
+    startup.mark_once("first_paint")
+    perf_run.checkpoint("hero & KPIs")
+
+    # ─────────────────────────────────────────────
+    # TABS
+    # ─────────────────────────────────────────────
+    tab1, tab2, tab3, tab4, tab5 = st.tabs([
+        "🌐 Global Trends",
+        "🏆 Country Rankings",
+        "🌍 Regional Analysis",
+        "📉 Deterioration & Recovery",
+        "🔬 Statistical Insights",
+    ])
+
+    # ══════════════════════════════════════════════
+    # TAB 1 — GLOBAL TRENDS
+    # ══════════════════════════════════════════════
+    with tab1:
+        col_l, col_r = st.columns([3, 2])
+
+        with col_l:
+            st.markdown('<div class="section-label">Question 1</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Global Trend in Phase 3+ Severity</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Average percentage of population classified as Phase 3 or above across all monitored countries over time.</div>', unsafe_allow_html=True)
+
+            def _build_global_trend():
+                global_trend = chart_series["global_trend"]
+                Scatter = scatter_trace(2 * len(global_trend))
+
+                fig = go.Figure()
+                fig.add_trace(Scatter(
+                    x=global_trend["date"], y=global_trend["crisis_plus_pct"],
+                    mode="lines",
+                    line=dict(color=GOLD, width=2.5),
+                    fill="tozeroy",
+                    fillcolor="rgba(232,184,75,0.08)",
+                    name="Phase 3+ %",
+                    hovertemplate="<b>%{x|%b %Y}</b><br>%{y:.1f}%<extra></extra>"
+                ))
+
+                # Add rolling average
+                fig.add_trace(Scatter(
+                    x=global_trend["date"], y=global_trend["roll"],
+                    mode="lines",
+                    line=dict(color=TEAL, width=1.5, dash="dash"),
+                    name="3-period avg",
+                    hovertemplate="<b>%{x|%b %Y}</b><br>3-mo avg: %{y:.1f}%<extra></extra>"
+                ))
+
+                fig.update_layout(**PLOTLY_LAYOUT, height=340,
+                                  title="Global Average % Population in Phase 3+")
+                return fig
+
+            fig = FIGURES.get_or_build(figure_key("global_trend", chart_series["global_trend"]), _build_global_trend)
+            st.plotly_chart(fig, use_container_width=True)
+            coverage_note("pct")
+
+        with col_r:
+            st.markdown('<div class="section-label">Phase Breakdown</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Phase Composition</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Average share of population in each IPC phase at latest snapshot.</div>', unsafe_allow_html=True)
+
+            phase_cols = ["phase_1_pct","phase_2_pct","phase_3_pct","phase_4_pct","phase_5_pct"]
+            phase_labels = ["Phase 1\nMinimal","Phase 2\nStressed","Phase 3\nCrisis",
+                            "Phase 4\nEmergency","Phase 5\nCatastrophe"]
+
+            def _build_phase_composition():
+                avgs = []
+                for col in phase_cols:
+                    if col in latest_pct.columns:
+                        avgs.append(latest_pct[col].mean())
+                    else:
+                        avgs.append(0)
+
+                fig2 = go.Figure(go.Bar(
+                    x=avgs,
+                    y=phase_labels,
+                    orientation="h",
+                    marker_color=PHASE_COLORS,
+                    text=[f"{v:.1f}%" for v in avgs],
+                    textposition="outside",
+                    textfont=dict(color="#e8eaf2"),
+                    hovertemplate="<b>%{y}</b><br>Avg: %{x:.1f}%<extra></extra>"
+                ))
+                fig2.update_layout(**PLOTLY_LAYOUT, height=340,
+                                   title="Average % per Phase (Latest Data)",
+                                   xaxis_title="Percentage (%)")
+                return fig2
+
+            fig2 = FIGURES.get_or_build(
+                figure_key("phase_composition", latest_pct.reindex(columns=phase_cols)), _build_phase_composition
+            )
+            st.plotly_chart(fig2, use_container_width=True)
+            coverage_note("pct")
+
+        # World Map
+        st.markdown("---")
+        st.markdown('<div class="section-label">Geographic View</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">World Map of Phase 3+ Severity</div>', unsafe_allow_html=True)
+
+        animate_map = st.toggle(
+            "Animate over time", value=False,
+            help="Month-by-month map of all monitored countries, each showing its latest available value"
+        )
 
-        top5_val = lat_ppl.sort_values("global_share", ascending=False).head(5)["global_share"].sum()
-        st.markdown(f"""
+        def _build_world_map():
+            map_data = latest_pct[["iso3","country","crisis_plus_pct"]].dropna()
+
+            clim = float(map_data["crisis_plus_pct"].quantile(0.97))
+            fig_map = go.Figure(go.Choropleth(
+                locations=map_data["iso3"],
+                z=map_data["crisis_plus_pct"],
+                text=map_data["country"],
+                hovertemplate="<b>%{text}</b><br>Phase 3+: %{z:.1f}%<extra></extra>",
+                colorscale=MAP_COLORSCALE,
+                zmin=0,
+                zmax=clim,
+                colorbar=MAP_COLORBAR,
+                marker_line_color="#252b3b",
+                marker_line_width=0.5,
+            ))
+            fig_map.update_layout(
+                **MAP_FIGURE_LAYOUT,
+                height=420,
+                title=dict(
+                    text="World Map: Phase 3+ Severity (%)",
+                    font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18)
+                ),
+            )
+            return fig_map
+
+        def _build_animated_map():
+            # Frames depend only on the full dataset, never on the sidebar filters
+            fig_anim = build_animated_map(backend.crisis_series(), MAP_COLORSCALE, MAP_COLORBAR, MAP_FIGURE_LAYOUT)
+            fig_anim.update_layout(
+                height=480,
+                title=dict(
+                    text="World Map Over Time: Phase 3+ Severity (%)",
+                    font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18)
+                ),
+            )
+            return fig_anim
+
+        if animate_map:
+            fig_map = FIGURES.get_or_build(
+                figure_key("world_map_animated", backend.version),
+                _build_animated_map,
+            )
+        else:
+            fig_map = FIGURES.get_or_build(
+                figure_key("world_map", latest_pct[["iso3","country","crisis_plus_pct"]]),
+                _build_world_map,
+            )
+        st.plotly_chart(fig_map, use_container_width=True)
+
+    perf_run.checkpoint("tab 1 · global trends")
+
+    # ══════════════════════════════════════════════
+    # TAB 2 — COUNTRY RANKINGS
+    # ══════════════════════════════════════════════
+    with tab2:
+        col_a, col_b = st.columns(2)
+
+        with col_a:
+            st.markdown('<div class="section-label">Question 2</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Global Burden Contributors</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Which countries account for the largest share of the world\'s food crisis population?</div>', unsafe_allow_html=True)
+
+            lat_ppl = tables["burden_shares"]
+            top10 = lat_ppl.head(10).iloc[::-1]
+
+            def _build_burden_shares():
+                fig3 = go.Figure(go.Bar(
+                    x=top10["global_share"], y=top10["country"],
+                    orientation="h",
+                    marker=dict(
+                        color=top10["global_share"],
+                        colorscale=[[0,"#1c3040"],[1,GOLD]],
+                        showscale=False,
+                        line=dict(width=0)
+                    ),
+                    text=[f"{v:.1f}%" for v in top10["global_share"]],
+                    textposition="outside",
+                    textfont=dict(color="#e8eaf2"),
+                    hovertemplate="<b>%{y}</b><br>Global share: %{x:.1f}%<extra></extra>"
+                ))
+                fig3.update_layout(**PLOTLY_LAYOUT, height=400,
+                                   title="Top 10 Countries by Share of Global Crisis Pop.")
+                return fig3
+
+            fig3 = FIGURES.get_or_build(figure_key("burden_shares", top10[["country","global_share"]]), _build_burden_shares)
+            st.plotly_chart(fig3, use_container_width=True)
+            coverage_note("people")
+
+            top5_val = lat_ppl.head(5)["global_share"].sum()
+            st.markdown(f"""
         <div class='insight-card'>
         <strong>Concentration insight:</strong> The top 5 countries account for
         <strong>{top5_val:.1f}%</strong> of the global Phase 3+ population —
@@ -630,110 +417,187 @@ with tab2:
         </div>
         """, unsafe_allow_html=True)
 
-    with col_b:
-        st.markdown('<div class="section-label">Question 3</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Highest % Population in Crisis</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Countries where food insecurity affects the largest share of the total population.</div>', unsafe_allow_html=True)
-
-        top10_pct = latest_pct.sort_values("crisis_plus_pct", ascending=True).tail(10)
-
-        fig4 = go.Figure(go.Bar(
-            x=top10_pct["crisis_plus_pct"], y=top10_pct["country"],
-            orientation="h",
-            marker=dict(
-                color=top10_pct["crisis_plus_pct"],
-                colorscale=[[0,"#2a1a1a"],[0.5,"#d97a2a"],[1,CRIMSON]],
-                showscale=False,
-            ),
-            text=[f"{v:.0f}%" for v in top10_pct["crisis_plus_pct"]],
-            textposition="outside",
-            textfont=dict(color="#e8eaf2"),
-            hovertemplate="<b>%{y}</b><br>Phase 3+: %{x:.0f}%<extra></extra>"
-        ))
-        fig4.update_layout(**PLOTLY_LAYOUT, height=400,
-                           title="Top 10 Countries by % Population in Phase 3+")
-        st.plotly_chart(fig4, use_container_width=True)
-
-    # Crisis depth
-    st.markdown("---")
-    st.markdown('<div class="section-label">Question 7</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">Depth of Crisis: Phase 4–5 Dominance</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-desc">Among countries with high Phase 3+ populations, which have the most extreme crises? This ratio shows Phase 4 & 5 as a share of all Phase 3+ people.</div>', unsafe_allow_html=True)
-
-    depth = (
-        wp.groupby("country")["severe_share"]
-        .mean().reset_index()
-        .dropna()
-        .sort_values("severe_share", ascending=True)
-        .tail(12)
-    )
-
-    fig5 = go.Figure(go.Bar(
-        x=depth["severe_share"], y=depth["country"],
-        orientation="h",
-        marker=dict(
-            color=depth["severe_share"],
-            colorscale=[[0,"#1c2030"],[0.5,"#9b4dca"],[1,CRIMSON]],
-            showscale=False,
-        ),
-        text=[f"{v:.0%}" for v in depth["severe_share"]],
-        textposition="outside",
-        textfont=dict(color="#e8eaf2"),
-        hovertemplate="<b>%{y}</b><br>Severity ratio: %{x:.0%}<extra></extra>"
-    ))
-    fig5.update_layout(**{**PLOTLY_LAYOUT, "xaxis": dict(tickformat=".0%", gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696"))}, height=380,
-                       title="Countries with Deepest Crisis (Phase 4–5 Share of Phase 3+)")
-    st.plotly_chart(fig5, use_container_width=True)
-
-# ══════════════════════════════════════════════
-# TAB 3 — REGIONAL ANALYSIS
-# ══════════════════════════════════════════════
-with tab3:
-    st.markdown('<div class="section-label">Questions 5 & 6</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">West Africa vs East Africa</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-desc">Comparing the trajectory of acute food insecurity between the two most affected African regions over time.</div>', unsafe_allow_html=True)
-
-    regional_trend = (
-        wp[wp["Region"].isin(["West Africa","East Africa"])]
-        .groupby(["Region","date"])["crisis_plus_pct"]
-        .mean().reset_index()
-    )
-
-    fig6 = go.Figure()
-    palette = {"West Africa": GOLD, "East Africa": TEAL}
-    for region, grp in regional_trend.groupby("Region"):
-        grp = grp.sort_values("date")
-        fig6.add_trace(go.Scatter(
-            x=grp["date"], y=grp["crisis_plus_pct"],
-            mode="lines+markers",
-            name=region,
-            line=dict(color=palette[region], width=2.5),
-            marker=dict(size=5, color=palette[region]),
-            fill="tozeroy",
-            fillcolor=f"rgba{tuple(int(palette[region].lstrip('#')[i:i+2],16) for i in (0,2,4)) + (0.06,)}",
-            hovertemplate=f"<b>{region}</b><br>%{{x|%b %Y}}<br>%{{y:.1f}}%<extra></extra>"
-        ))
-
-    fig6.update_layout(**PLOTLY_LAYOUT, height=360,
-                       title="Average % Population in Phase 3+: West vs East Africa",
-                       yaxis_title="Phase 3+ (%)")
-    st.plotly_chart(fig6, use_container_width=True)
-
-    # T-test result
-    west = regional_trend[regional_trend["Region"]=="West Africa"]["crisis_plus_pct"]
-    east = regional_trend[regional_trend["Region"]=="East Africa"]["crisis_plus_pct"]
-
-    if len(west) > 1 and len(east) > 1:
-        t_stat, p_val = ttest_ind(west, east, equal_var=False)
-        sig = "statistically significant" if p_val < 0.05 else "not statistically significant"
-        sig_color = TEAL if p_val < 0.05 else GOLD
-
-        col1, col2, col3 = st.columns(3)
-        col1.metric("T-Statistic", f"{t_stat:.3f}")
-        col2.metric("P-Value", f"{p_val:.5f}")
-        col3.metric("Significance (α=0.05)", "✓ Significant" if p_val < 0.05 else "✗ Not Significant")
-
-        st.markdown(f"""
+        with col_b:
+            st.markdown('<div class="section-label">Question 3</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Highest % Population in Crisis</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Countries where food insecurity affects the largest share of the total population.</div>', unsafe_allow_html=True)
+
+            top10_pct = latest_pct.sort_values("crisis_plus_pct", ascending=True).tail(10)
+
+            def _build_top_pct():
+                fig4 = go.Figure(go.Bar(
+                    x=top10_pct["crisis_plus_pct"], y=top10_pct["country"],
+                    orientation="h",
+                    marker=dict(
+                        color=top10_pct["crisis_plus_pct"],
+                        colorscale=[[0,"#2a1a1a"],[0.5,"#d97a2a"],[1,CRIMSON]],
+                        showscale=False,
+                    ),
+                    text=[f"{v:.0f}%" for v in top10_pct["crisis_plus_pct"]],
+                    textposition="outside",
+                    textfont=dict(color="#e8eaf2"),
+                    hovertemplate="<b>%{y}</b><br>Phase 3+: %{x:.0f}%<extra></extra>"
+                ))
+                fig4.update_layout(**PLOTLY_LAYOUT, height=400,
+                                   title="Top 10 Countries by % Population in Phase 3+")
+                return fig4
+
+            fig4 = FIGURES.get_or_build(figure_key("top_pct", top10_pct[["country","crisis_plus_pct"]]), _build_top_pct)
+            st.plotly_chart(fig4, use_container_width=True)
+            coverage_note("pct")
+
+        # Crisis depth
+        st.markdown("---")
+        st.markdown('<div class="section-label">Question 7</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Depth of Crisis: Phase 4–5 Dominance</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Among countries with high Phase 3+ populations, which have the most extreme crises? This ratio shows Phase 4 & 5 as a share of all Phase 3+ people.</div>', unsafe_allow_html=True)
+
+        depth = tables["crisis_depth"].head(12).iloc[::-1]
+
+        def _build_crisis_depth():
+            fig5 = go.Figure(go.Bar(
+                x=depth["severe_share"], y=depth["country"],
+                orientation="h",
+                marker=dict(
+                    color=depth["severe_share"],
+                    colorscale=[[0,"#1c2030"],[0.5,"#9b4dca"],[1,CRIMSON]],
+                    showscale=False,
+                ),
+                text=[f"{v:.0%}" for v in depth["severe_share"]],
+                textposition="outside",
+                textfont=dict(color="#e8eaf2"),
+                hovertemplate="<b>%{y}</b><br>Severity ratio: %{x:.0%}<extra></extra>"
+            ))
+            fig5.update_layout(**{**PLOTLY_LAYOUT, "xaxis": dict(tickformat=".0%", gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696"))}, height=380,
+                               title="Countries with Deepest Crisis (Phase 4–5 Share of Phase 3+)")
+            return fig5
+
+        fig5 = FIGURES.get_or_build(figure_key("crisis_depth", depth[["country","severe_share"]]), _build_crisis_depth)
+        st.plotly_chart(fig5, use_container_width=True)
+        coverage_note("pct")
+
+        # Concentration over time
+        st.markdown("---")
+        st.markdown('<div class="section-label">Question 4 · Over Time</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">How Concentrated Is the Global Crisis?</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Each month counts every country at its latest analysis so far. A rising Gini or top-5 share means the Phase 3+ population is gathering in fewer countries; the Lorenz curves compare the first and last month of the selected range.</div>', unsafe_allow_html=True)
+
+        conc = compute_concentration(*filter_key)
+        conc_metrics, lorenz = conc["metrics"], conc["lorenz"]
+
+        if len(conc_metrics):
+            def _build_concentration():
+                fig_conc = go.Figure()
+                for col, name, color in (("top5_share", "Top 5 share", GOLD), ("top10_share", "Top 10 share", TEAL)):
+                    fig_conc.add_trace(go.Scatter(
+                        x=conc_metrics["date"], y=conc_metrics[col],
+                        mode="lines", name=name,
+                        line=dict(color=color, width=2.5),
+                        hovertemplate=f"<b>%{{x|%b %Y}}</b><br>{name}: %{{y:.1f}}%<extra></extra>",
+                    ))
+                fig_conc.add_trace(go.Scatter(
+                    x=conc_metrics["date"], y=conc_metrics["gini"],
+                    mode="lines", name="Gini (right)", yaxis="y2",
+                    line=dict(color=CRIMSON, width=2, dash="dash"),
+                    customdata=conc_metrics[["effective_countries","countries"]],
+                    hovertemplate=("<b>%{x|%b %Y}</b><br>Gini: %{y:.3f}<br>"
+                                   "Effective countries (1/HHI): %{customdata[0]:.1f} of %{customdata[1]}<extra></extra>"),
+                ))
+                fig_conc.update_layout(**PLOTLY_LAYOUT, height=380,
+                                       title="Concentration of the Phase 3+ Population",
+                                       yaxis_title="Share of Phase 3+ population (%)",
+                                       yaxis2=dict(overlaying="y", side="right", range=[0, 1], showgrid=False,
+                                                   title="Gini", color="#a0a8c0"))
+                return fig_conc
+
+            def _build_lorenz():
+                fig_lz = go.Figure()
+                fig_lz.add_trace(go.Scatter(
+                    x=[0, 100], y=[0, 100], mode="lines", name="Equal shares",
+                    line=dict(color="#a0a8c0", width=1, dash="dot"), hoverinfo="skip",
+                ))
+                ends = conc_metrics["date"].iloc[[0, -1]].drop_duplicates()
+                for date, color in zip(ends, (TEAL, GOLD)):
+                    pts = lorenz[lorenz["date"] == date]
+                    fig_lz.add_trace(go.Scatter(
+                        x=pts["country_share"], y=pts["people_share"],
+                        mode="lines", name=f"{date:%b %Y}",
+                        line=dict(color=color, width=2.5, shape="linear"),
+                        hovertemplate="Least-affected %{x:.0f}% of countries<br>hold %{y:.1f}% of Phase 3+ people<extra></extra>",
+                    ))
+                fig_lz.update_layout(**PLOTLY_LAYOUT, height=380, title="Lorenz Curve",
+                                     xaxis_title="Countries, fewest Phase 3+ first (%)",
+                                     yaxis_title="Phase 3+ population (%)")
+                return fig_lz
+
+            cz1, cz2 = st.columns([3, 2])
+            with cz1:
+                fig_conc = FIGURES.get_or_build(figure_key("concentration", conc_metrics), _build_concentration)
+                st.plotly_chart(fig_conc, use_container_width=True)
+            with cz2:
+                fig_lz = FIGURES.get_or_build(
+                    figure_key("lorenz", lorenz[lorenz["date"].isin(conc_metrics["date"].iloc[[0, -1]])]), _build_lorenz
+                )
+                st.plotly_chart(fig_lz, use_container_width=True)
+
+    perf_run.checkpoint("tab 2 · country rankings")
+
+    # ══════════════════════════════════════════════
+    # TAB 3 — REGIONAL ANALYSIS
+    # ══════════════════════════════════════════════
+    with tab3:
+        st.markdown('<div class="section-label">Questions 5 & 6</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">West Africa vs East Africa</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Comparing the trajectory of acute food insecurity between the two most affected African regions over time.</div>', unsafe_allow_html=True)
+
+        reg_summary = tables["regional_summary"]
+        regional_trend = reg_summary[reg_summary["Region"].isin(["West Africa","East Africa"])]
+        # Charts draw the downsampled series; the t-test below uses every point
+        reg_chart = chart_series["regional_summary"]
+        regional_chart = reg_chart[reg_chart["Region"].isin(["West Africa","East Africa"])]
+
+        def _build_west_east():
+            fig6 = go.Figure()
+            palette = {"West Africa": GOLD, "East Africa": TEAL}
+            Scatter = scatter_trace(len(regional_chart))
+            for region, grp in regional_chart.groupby("Region"):
+                grp = grp.sort_values("date")
+                fig6.add_trace(Scatter(
+                    x=grp["date"], y=grp["crisis_plus_pct"],
+                    mode="lines+markers",
+                    name=region,
+                    line=dict(color=palette[region], width=2.5),
+                    marker=dict(size=5, color=palette[region]),
+                    fill="tozeroy",
+                    fillcolor=f"rgba{tuple(int(palette[region].lstrip('#')[i:i+2],16) for i in (0,2,4)) + (0.06,)}",
+                    hovertemplate=f"<b>{region}</b><br>%{{x|%b %Y}}<br>%{{y:.1f}}%<extra></extra>"
+                ))
+
+            fig6.update_layout(**PLOTLY_LAYOUT, height=360,
+                               title="Average % Population in Phase 3+: West vs East Africa",
+                               yaxis_title="Phase 3+ (%)")
+            return fig6
+
+        fig6 = FIGURES.get_or_build(figure_key("west_east", regional_chart), _build_west_east)
+        st.plotly_chart(fig6, use_container_width=True)
+        coverage_note("pct")
+
+        # T-test result
+        west = regional_trend[regional_trend["Region"]=="West Africa"]["crisis_plus_pct"]
+        east = regional_trend[regional_trend["Region"]=="East Africa"]["crisis_plus_pct"]
+
+        if len(west) > 1 and len(east) > 1:
+            from scipy.stats import ttest_ind  # deferred: only this tab needs scipy
+            t_stat, p_val = ttest_ind(west, east, equal_var=False)
+            sig = "statistically significant" if p_val < 0.05 else "not statistically significant"
+            sig_color = TEAL if p_val < 0.05 else GOLD
+
+            col1, col2, col3 = st.columns(3)
+            col1.metric("T-Statistic", f"{t_stat:.3f}")
+            col2.metric("P-Value", f"{p_val:.5f}")
+            col3.metric("Significance (α=0.05)", "✓ Significant" if p_val < 0.05 else "✗ Not Significant")
+
+            st.markdown(f"""
         <div class='insight-card'>
         <strong>Welch's t-test result:</strong> The difference in Phase 3+ rates between
         West and East Africa is <strong style='color:{sig_color}'>{sig}</strong>
@@ -742,227 +606,874 @@ with tab3:
         </div>
         """, unsafe_allow_html=True)
 
-    # All regions comparison
-    st.markdown("---")
-    st.markdown('<div class="section-label">All Regions</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">Regional Comparison Overview</div>', unsafe_allow_html=True)
-
-    reg_summary = (
-        wp.groupby(["Region","date"])["crisis_plus_pct"]
-        .mean().reset_index()
-    )
-
-    fig7 = px.line(
-        reg_summary, x="date", y="crisis_plus_pct",
-        color="Region", color_discrete_sequence=COLOR_SEQ,
-        labels={"crisis_plus_pct":"Phase 3+ (%)","date":"Date"},
-    )
-    fig7.update_traces(line_width=2)
-    fig7.update_layout(**PLOTLY_LAYOUT, height=340, title="All Regions: Phase 3+ Trend")
-    st.plotly_chart(fig7, use_container_width=True)
-
-# ══════════════════════════════════════════════
-# TAB 4 — DETERIORATION & RECOVERY
-# ══════════════════════════════════════════════
-with tab4:
-    col_l2, col_r2 = st.columns(2)
-
-    # Slopes computation
-    slopes = []
-    for country, grp in wp.groupby("country"):
-        if len(grp) > 6:
-            grp = grp.sort_values("date")
-            X = np.arange(len(grp)).reshape(-1,1)
-            y = grp["crisis_plus_pct"].values
-            slope = LinearRegression().fit(X, y).coef_[0]
-            slopes.append((country, slope, grp["Region"].iloc[0]))
-
-    slope_df = pd.DataFrame(slopes, columns=["country","slope","region"])
-
-    with col_l2:
-        st.markdown('<div class="section-label">Question 8</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Fastest Deteriorating Countries</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Linear regression slope of Phase 3+ % over time — higher = worsening faster.</div>', unsafe_allow_html=True)
-
-        fastest = slope_df.sort_values("slope", ascending=True).tail(10)
-
-        fig8 = go.Figure(go.Bar(
-            x=fastest["slope"], y=fastest["country"],
-            orientation="h",
-            marker=dict(
-                color=fastest["slope"],
-                colorscale=[[0,"#1c2030"],[1,CRIMSON]],
-                showscale=False,
-            ),
-            text=[f"+{v:.2f}/period" for v in fastest["slope"]],
-            textposition="outside",
-            textfont=dict(color="#e8eaf2"),
-            hovertemplate="<b>%{y}</b><br>Slope: %{x:.3f}<extra></extra>"
-        ))
-        fig8.update_layout(**PLOTLY_LAYOUT, height=380,
-                           title="Fastest Worsening (Phase 3+ Slope)")
-        st.plotly_chart(fig8, use_container_width=True)
-
-    with col_r2:
-        st.markdown('<div class="section-label">Question 10</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-title">Countries Showing Recovery</div>', unsafe_allow_html=True)
-        st.markdown('<div class="section-desc">Countries with the most negative slope — suggesting genuine improvement in food security outcomes.</div>', unsafe_allow_html=True)
-
-        recovery = slope_df.sort_values("slope").head(10)
-
-        fig9 = go.Figure(go.Bar(
-            x=recovery["slope"].abs(), y=recovery["country"],
-            orientation="h",
-            marker=dict(
-                color=recovery["slope"].abs(),
-                colorscale=[[0,"#1c2030"],[1,TEAL]],
-                showscale=False,
-            ),
-            text=[f"-{abs(v):.2f}/period" for v in recovery["slope"]],
-            textposition="outside",
-            textfont=dict(color="#e8eaf2"),
-            hovertemplate="<b>%{y}</b><br>Improvement slope: %{x:.3f}<extra></extra>"
-        ))
-        fig9.update_layout(**PLOTLY_LAYOUT, height=380,
-                           title="Fastest Improving (Phase 3+ Decline)")
-        st.plotly_chart(fig9, use_container_width=True)
-
-    # Country deep-dive
-    st.markdown("---")
-    st.markdown('<div class="section-label">Country Explorer</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">Individual Country Trend</div>', unsafe_allow_html=True)
-
-    selected_countries = st.multiselect(
-        "Select up to 5 countries to compare",
-        options=sorted(wp["country"].unique()),
-        default=slope_df.sort_values("slope", ascending=False).head(3)["country"].tolist()[:3],
-        max_selections=5
-    )
+        # All regions comparison
+        st.markdown("---")
+        st.markdown('<div class="section-label">All Regions</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Regional Comparison Overview</div>', unsafe_allow_html=True)
+
+        import plotly.express as px  # deferred: first used here, not needed for first paint
+        def _build_all_regions():
+            fig7 = px.line(
+                reg_chart, x="date", y="crisis_plus_pct",
+                color="Region", color_discrete_sequence=COLOR_SEQ,
+                labels={"crisis_plus_pct":"Phase 3+ (%)","date":"Date"},
+                render_mode=render_mode(len(reg_chart)),
+            )
+            fig7.update_traces(line_width=2)
+            fig7.update_layout(**PLOTLY_LAYOUT, height=340, title="All Regions: Phase 3+ Trend")
+            return fig7
+
+        fig7 = FIGURES.get_or_build(figure_key("all_regions", reg_chart), _build_all_regions)
+        st.plotly_chart(fig7, use_container_width=True)
+        coverage_note("pct")
+
+        # Custom regions
+        st.markdown("---")
+        st.markdown('<div class="section-label">Custom Regions</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Your Own Country Groupings</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Average Phase 3+ share across the members of each saved custom region, for the selected date range. Build or edit regions in the sidebar; the region filter above does not apply to them.</div>', unsafe_allow_html=True)
+
+        custom_summary = pd.DataFrame(columns=["Region", "date", "crisis_plus_pct", "countries"])
+        if not custom_regions:
+            st.info("No custom regions yet. Add one under 🧭 Custom regions in the sidebar, e.g. the Sahel or a response plan's countries.")
+        else:
+            cr_groups = tuple(
+                (name, tuple(meta["iso3"][code] for code in members if code in meta["iso3"]))
+                for name, members in sorted(custom_regions.items())
+            )
+            custom_summary = compute_custom_regions(DATA_PATH, DATA_BACKEND, backend.version, cr_groups,
+                                                    date_range[0], date_range[1])
+
+            def _build_custom_regions():
+                fig21 = px.line(
+                    custom_summary, x="date", y="crisis_plus_pct",
+                    color="Region", color_discrete_sequence=COLOR_SEQ,
+                    labels={"crisis_plus_pct": "Phase 3+ (%)", "date": "Date", "countries": "Countries analysed"},
+                    hover_data=["countries"], markers=True,
+                    render_mode=render_mode(len(custom_summary)),
+                )
+                fig21.update_traces(line_width=2, marker_size=5)
+                fig21.update_layout(**PLOTLY_LAYOUT, height=340, title="Custom Regions: Phase 3+ Trend")
+                return fig21
+
+            if custom_summary.empty:
+                st.info("None of the saved regions' countries have analyses in the selected date range.")
+            else:
+                fig21 = FIGURES.get_or_build(figure_key("custom_regions", custom_summary), _build_custom_regions)
+                st.plotly_chart(fig21, use_container_width=True)
+
+    perf_run.checkpoint("tab 3 · regional analysis")
+
+    # ══════════════════════════════════════════════
+    # TAB 4 — DETERIORATION & RECOVERY
+    # ══════════════════════════════════════════════
+    with tab4:
+        col_l2, col_r2 = st.columns(2)
+
+        slope_df = tables["country_slopes"]
+
+        with col_l2:
+            st.markdown('<div class="section-label">Question 8</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Fastest Deteriorating Countries</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Linear regression slope of Phase 3+ % over time — higher = worsening faster.</div>', unsafe_allow_html=True)
+
+            fastest = slope_df.sort_values("slope", ascending=True).tail(10)
+
+            def _build_fastest():
+                fig8 = go.Figure(go.Bar(
+                    x=fastest["slope"], y=fastest["country"],
+                    orientation="h",
+                    marker=dict(
+                        color=fastest["slope"],
+                        colorscale=[[0,"#1c2030"],[1,CRIMSON]],
+                        showscale=False,
+                    ),
+                    text=[f"+{v:.2f}/period" for v in fastest["slope"]],
+                    textposition="outside",
+                    textfont=dict(color="#e8eaf2"),
+                    hovertemplate="<b>%{y}</b><br>Slope: %{x:.3f}<extra></extra>"
+                ))
+                fig8.update_layout(**PLOTLY_LAYOUT, height=380,
+                                   title="Fastest Worsening (Phase 3+ Slope)")
+                return fig8
+
+            fig8 = FIGURES.get_or_build(figure_key("fastest", fastest[["country","slope"]]), _build_fastest)
+            st.plotly_chart(fig8, use_container_width=True)
+            coverage_note("pct")
+
+        with col_r2:
+            st.markdown('<div class="section-label">Question 10</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-title">Countries Showing Recovery</div>', unsafe_allow_html=True)
+            st.markdown('<div class="section-desc">Countries with the most negative slope — suggesting genuine improvement in food security outcomes.</div>', unsafe_allow_html=True)
+
+            recovery = slope_df.sort_values("slope").head(10)
+
+            def _build_recovery():
+                fig9 = go.Figure(go.Bar(
+                    x=recovery["slope"].abs(), y=recovery["country"],
+                    orientation="h",
+                    marker=dict(
+                        color=recovery["slope"].abs(),
+                        colorscale=[[0,"#1c2030"],[1,TEAL]],
+                        showscale=False,
+                    ),
+                    text=[f"-{abs(v):.2f}/period" for v in recovery["slope"]],
+                    textposition="outside",
+                    textfont=dict(color="#e8eaf2"),
+                    hovertemplate="<b>%{y}</b><br>Improvement slope: %{x:.3f}<extra></extra>"
+                ))
+                fig9.update_layout(**PLOTLY_LAYOUT, height=380,
+                                   title="Fastest Improving (Phase 3+ Decline)")
+                return fig9
+
+            fig9 = FIGURES.get_or_build(figure_key("recovery", recovery[["country","slope"]]), _build_recovery)
+            st.plotly_chart(fig9, use_container_width=True)
+            coverage_note("pct")
+
+        # Country deep-dive
+        st.markdown("---")
+        st.markdown('<div class="section-label">Country Explorer</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Individual Country Trend</div>', unsafe_allow_html=True)
+
+        selected_countries = st.multiselect(
+            "Select up to 5 countries to compare",
+            options=latest_pct["country"].tolist(),
+            default=slope_df.sort_values("slope", ascending=False).head(3)["country"].tolist()[:3],
+            max_selections=5
+        )
 
-    if selected_countries:
-        country_data = wp[wp["country"].isin(selected_countries)]
-        fig10 = px.line(
-            country_data, x="date", y="crisis_plus_pct", color="country",
-            color_discrete_sequence=COLOR_SEQ,
-            labels={"crisis_plus_pct":"Phase 3+ (%)","date":"Date"},
-            markers=True
+        if selected_countries:
+            country_data = load_country_series(*filter_key[:3], tuple(selected_countries), *filter_key[3:], MAX_POINTS)
+            def _build_country_trends():
+                fig10 = px.line(
+                    country_data, x="date", y="crisis_plus_pct", color="country",
+                    color_discrete_sequence=COLOR_SEQ,
+                    labels={"crisis_plus_pct":"Phase 3+ (%)","date":"Date"},
+                    markers=True,
+                    render_mode=render_mode(len(country_data)),
+                )
+                fig10.update_traces(line_width=2, marker_size=5)
+                fig10.update_layout(**PLOTLY_LAYOUT, height=350,
+                                    title="Phase 3+ Trend: Selected Countries")
+                return fig10
+
+            fig10 = FIGURES.get_or_build(figure_key("country_trends", country_data), _build_country_trends)
+            st.plotly_chart(fig10, use_container_width=True)
+
+            # Deep links into the single-country drill-down page
+            iso3_of = {name: code for code, name in meta["iso3"].items()}
+            for link_col, country in zip(st.columns(len(selected_countries)), selected_countries):
+                if country in iso3_of:
+                    link_col.page_link("pages/country.py", label=f"{country} profile →",
+                                       query_params={"iso3": iso3_of[country]})
+
+        # Similar past crises
+        st.markdown("---")
+        st.markdown('<div class="section-label">Similar Past Crises</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Historical Analogues of the Latest Trajectory</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Past four-quarter stretches, in any country, whose Phase 1–5 composition most closely matched a country\'s latest four quarters — and where Phase 3+ stood a year after each of them.</div>', unsafe_allow_html=True)
+
+        sim_index = get_similarity_index(DATA_PATH, DATA_BACKEND, backend.version)
+        sim_countries = sorted(set(sim_index.units[sim_index.unit_of]))
+        worsening = [c for c in slope_df.sort_values("slope", ascending=False)["country"] if c in sim_countries]
+
+        sc1, sc2 = st.columns([3, 1])
+        analogue_country = sc1.selectbox(
+            "Country", sim_countries,
+            index=sim_countries.index(worsening[0]) if worsening else 0,
         )
-        fig10.update_traces(line_width=2, marker_size=5)
-        fig10.update_layout(**PLOTLY_LAYOUT, height=350,
-                            title="Phase 3+ Trend: Selected Countries")
-        st.plotly_chart(fig10, use_container_width=True)
-
-# ══════════════════════════════════════════════
-# TAB 5 — STATISTICAL INSIGHTS
-# ══════════════════════════════════════════════
-with tab5:
-    st.markdown('<div class="section-label">Question 9</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">Volatility vs Severity</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-desc">Does a higher average severity correlate with greater instability? This scatter explores the relationship between mean Phase 3+ % and its standard deviation.</div>', unsafe_allow_html=True)
-
-    stats = wp.groupby("country")["crisis_plus_pct"].agg(["mean","std"]).reset_index()
-    stats = stats.merge(wp[["country","Region"]].drop_duplicates(), on="country", how="left")
-    stats = stats.dropna()
-
-    if len(stats) > 2:
-        corr, p_corr = pearsonr(stats["mean"], stats["std"])
-
-        fig11 = go.Figure()
-        # Plot each region as a separate trace
-        for i, region in enumerate(stats["Region"].unique()):
-            grp = stats[stats["Region"] == region]
-            fig11.add_trace(go.Scatter(
-                x=grp["mean"], y=grp["std"],
-                mode="markers",
-                name=region,
-                text=grp["country"],
-                marker=dict(
-                    size=grp["mean"].clip(5, 30),
-                    color=COLOR_SEQ[i % len(COLOR_SEQ)],
-                    opacity=0.85,
-                    line=dict(width=1, color="#252b3b"),
-                ),
-                hovertemplate="<b>%{text}</b><br>Mean: %{x:.1f}%<br>Std Dev: %{y:.2f}<extra></extra>",
+        analogue_k = sc2.slider("Analogues", min_value=3, max_value=10, value=5)
+
+        analogues = sim_index.query(analogue_country, k=analogue_k)
+        unit, end_col = sim_index.latest_window(analogue_country)
+
+        def _build_analogues():
+            fig_sim = go.Figure()
+            for i, row in enumerate(analogues.itertuples()):
+                a_unit = int(np.flatnonzero(sim_index.units == row.country)[0])
+                a_end = int(sim_index.periods.get_loc(row.window_end))
+                path = sim_index.trajectory(a_unit, a_end)
+                fig_sim.add_trace(go.Scatter(
+                    x=path.index, y=path.values,
+                    mode="lines+markers",
+                    name=f"{row.country} ({row.window_end:%Y-%m})",
+                    line=dict(color=COLOR_SEQ[(i + 1) % len(COLOR_SEQ)], width=1.5),
+                    marker=dict(size=4),
+                    opacity=0.75,
+                    hovertemplate=f"<b>{row.country}</b><br>Quarter %{{x:+d}}<br>Phase 3+: %{{y:.1f}}%<extra></extra>",
+                ))
+            own = sim_index.trajectory(unit, end_col, after=0)
+            fig_sim.add_trace(go.Scatter(
+                x=own.index, y=own.values,
+                mode="lines+markers",
+                name=f"{analogue_country} (latest)",
+                line=dict(color=GOLD, width=3.5),
+                marker=dict(size=7),
+                hovertemplate=f"<b>{analogue_country}</b><br>Quarter %{{x:+d}}<br>Phase 3+: %{{y:.1f}}%<extra></extra>",
             ))
-        # Manual OLS trendline using numpy
-        x_vals = stats["mean"].values
-        y_vals = stats["std"].values
-        m, b = np.polyfit(x_vals, y_vals, 1)
-        x_line = np.linspace(x_vals.min(), x_vals.max(), 100)
-        fig11.add_trace(go.Scatter(
-            x=x_line, y=m * x_line + b,
-            mode="lines",
-            name="Trend",
-            line=dict(color=GOLD, width=2, dash="dash"),
-            hoverinfo="skip",
-        ))
-        fig11.update_layout(**PLOTLY_LAYOUT, height=420,
-                            title="Volatility vs Average Severity in Phase 3+",
-                            xaxis_title="Mean Phase 3+ (%)",
-                            yaxis_title="Volatility (Std Dev)")
-        st.plotly_chart(fig11, use_container_width=True)
-
-        c1, c2, c3 = st.columns(3)
-        c1.metric("Pearson r", f"{corr:.3f}")
-        c2.metric("P-value", f"{p_corr:.5f}")
-        c3.metric("Relationship", "Strong +" if corr > 0.5 else ("Moderate +" if corr > 0.3 else "Weak"))
-
-        interp = (
-            "Countries with higher average food insecurity also tend to experience greater fluctuation over time, "
-            "suggesting structural instability in the most crisis-prone nations."
-            if corr > 0.4
-            else "The relationship between average severity and volatility is moderate or weak."
+            fig_sim.add_vline(x=0, line=dict(color="#a0a8c0", width=1, dash="dot"))
+            fig_sim.update_layout(**PLOTLY_LAYOUT, height=380,
+                                  title=f"Analogues of {analogue_country}: Phase 3+ Before and After",
+                                  xaxis_title="Quarters relative to end of matched window",
+                                  yaxis_title="Phase 3+ (%)")
+            return fig_sim
+
+        fig_sim = FIGURES.get_or_build(
+            figure_key("analogues", analogues, analogue_country, backend.version), _build_analogues
         )
-        st.markdown(f"""
+        st.plotly_chart(fig_sim, use_container_width=True)
+
+        outcome_col = f"crisis_plus_pct_{sim_index.horizon}q_later"
+        st.dataframe(
+            analogues.assign(
+                window=analogues["window_start"].dt.strftime("%Y-%m") + " → " + analogues["window_end"].dt.strftime("%Y-%m")
+            )[["country","window","distance","crisis_plus_pct",outcome_col,"change"]]
+            .rename(columns={"crisis_plus_pct": "Phase 3+ % at match",
+                             outcome_col: f"Phase 3+ % {sim_index.horizon} quarters later",
+                             "change": "change (pts)"}),
+            use_container_width=True, hide_index=True,
+        )
+
+        # Phase-transition what-if
+        st.markdown("---")
+        st.markdown('<div class="section-label">What-if Projection</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Phase Transitions and Scenario Simulation</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Quarterly phase-to-phase transition rates estimated from consecutive analyses, then projected forward over thousands of simulated paths. The stress scenario makes moving to a worse phase more likely and recovering less likely; the band shows the 5th–95th percentile of outcomes.</div>', unsafe_allow_html=True)
+
+        transitions = fit_transitions(DATA_PATH, DATA_BACKEND, backend.version)
+        mk_regions = sorted(k for k, v in transitions.items() if v["kind"] == "region")
+        mk_countries = sorted(k for k, v in transitions.items() if v["kind"] == "country")
+
+        mc1, mc2, mc3, mc4 = st.columns([2, 2, 1, 1])
+        mk_unit = mc1.selectbox(
+            "Projection for", mk_regions + mk_countries,
+            index=(mk_regions + mk_countries).index(analogue_country) if analogue_country in transitions else 0,
+            format_func=lambda u: f"{u} (region)" if transitions[u]["kind"] == "region" else u,
+        )
+        mk_scenario = mc2.radio("Scenario", [*markov.SCENARIOS, "custom"], horizontal=True,
+                                format_func=str.capitalize)
+        mk_horizon = mc3.slider("Quarters ahead", min_value=1, max_value=12, value=8)
+        if mk_scenario == "custom":
+            mk_shock = mc4.slider("Deterioration shock (%)", min_value=-50, max_value=200, value=25, step=5) / 100
+        else:
+            mk_shock = markov.SCENARIOS[mk_scenario]
+            mc4.metric("Deterioration shock", f"{mk_shock:+.0%}")
+
+        mk_model = transitions[mk_unit]
+        mk_base = simulate_transitions(DATA_PATH, DATA_BACKEND, backend.version, mk_unit, mk_horizon, 0.0)
+        mk_run = mk_base if mk_shock == 0 else simulate_transitions(
+            DATA_PATH, DATA_BACKEND, backend.version, mk_unit, mk_horizon, mk_shock
+        )
+        mk_unit_col = "people" if "p50_people" in mk_run.columns else "pct"
+        mk_scale = 1e6 if mk_unit_col == "people" else 1
+        mk_axis = "Phase 3+ people (M)" if mk_unit_col == "people" else "Phase 3+ (%)"
+
+        def _build_projection_fan():
+            fig16 = go.Figure()
+            for lo, hi, opacity in (("p5", "p95", 0.18), ("p25", "p75", 0.32)):
+                fig16.add_trace(go.Scatter(
+                    x=pd.concat([mk_run["date"], mk_run["date"][::-1]]),
+                    y=pd.concat([mk_run[f"{hi}_{mk_unit_col}"], mk_run[f"{lo}_{mk_unit_col}"][::-1]]) / mk_scale,
+                    fill="toself", fillcolor=CRIMSON if mk_shock > 0 else TEAL, opacity=opacity,
+                    line=dict(width=0), hoverinfo="skip", name=f"{lo}–{hi}",
+                ))
+            fig16.add_trace(go.Scatter(
+                x=mk_run["date"], y=mk_run[f"p50_{mk_unit_col}"] / mk_scale,
+                mode="lines+markers", name=f"{mk_scenario.capitalize()} median",
+                line=dict(color=CRIMSON if mk_shock > 0 else TEAL, width=3), marker=dict(size=5),
+                hovertemplate="%{x|%b %Y}<br>Median: %{y:,.2f}<extra></extra>",
+            ))
+            if mk_shock != 0:
+                fig16.add_trace(go.Scatter(
+                    x=mk_base["date"], y=mk_base[f"p50_{mk_unit_col}"] / mk_scale,
+                    mode="lines", name="Baseline median",
+                    line=dict(color=GOLD, width=2, dash="dash"),
+                    hovertemplate="%{x|%b %Y}<br>Baseline: %{y:,.2f}<extra></extra>",
+                ))
+            fig16.update_layout(**PLOTLY_LAYOUT, height=400,
+                                title=f"Projected Phase 3+: {mk_unit}",
+                                yaxis_title=mk_axis)
+            return fig16
+
+        def _build_transition_matrix():
+            labels = ["P1","P2","P3","P4","P5"]
+            matrix = markov.apply_shock(mk_model["matrix"], mk_shock) * 100
+            fig17 = go.Figure(go.Heatmap(
+                z=matrix, x=labels, y=labels,
+                colorscale=[[0, "#12151f"], [0.1, TEAL], [1, GOLD]],
+                zmin=0, zmax=100,
+                text=np.round(matrix, 1), texttemplate="%{text}",
+                hovertemplate="From %{y} to %{x}: %{z:.2f}% per quarter<extra></extra>",
+                showscale=False,
+            ))
+            fig17.update_layout(**PLOTLY_LAYOUT, height=400,
+                                title="Quarterly Transition Rates (%)",
+                                xaxis_title="To phase", yaxis_title="From phase")
+            fig17.update_yaxes(autorange="reversed")
+            return fig17
+
+        mk_l, mk_r = st.columns([3, 2])
+        with mk_l:
+            fig16 = FIGURES.get_or_build(figure_key("markov_fan", mk_run, mk_base, mk_unit, mk_scenario, mk_shock),
+                                          _build_projection_fan)
+            st.plotly_chart(fig16, use_container_width=True)
+        with mk_r:
+            fig17 = FIGURES.get_or_build(figure_key("markov_matrix", mk_model["matrix"], mk_shock), _build_transition_matrix)
+            st.plotly_chart(fig17, use_container_width=True)
+
+        mk_end, mk_now = mk_run.iloc[-1], mk_run.iloc[0]
+        mk_m1, mk_m2, mk_m3 = st.columns(3)
+        if mk_unit_col == "people":
+            mk_m1.metric(f"Median Phase 3+ in {mk_end['date']:%b %Y}", f"{mk_end['p50_people']/1e6:.1f}M",
+                      f"{(mk_end['p50_people'] - mk_now['p50_people'])/1e6:+.1f}M vs {mk_now['date']:%b %Y}", delta_color="inverse")
+        else:
+            mk_m1.metric(f"Median Phase 3+ in {mk_end['date']:%b %Y}", f"{mk_end['p50_pct']:.1f}%",
+                      f"{mk_end['p50_pct'] - mk_now['p50_pct']:+.1f} pts", delta_color="inverse")
+        mk_m2.metric("Chance Phase 3+ share rises", f"{mk_end['p_worse']:.0%}")
+        mk_m3.metric("Transitions fitted from", f"{mk_model['pairs']} quarter pairs")
+
+        # Early-warning watchlist
+        st.markdown("---")
+        st.markdown('<div class="section-label">Early Warning</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Watchlist: Highest Composite Risk</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Each country is scored at the end of the selected period from its latest Phase 3+ share, the Phase 4–5 share of it, its trend and its volatility over the trailing year. Each is standardised across countries and then weighted. Bars show how much each component adds to or takes from the score.</div>', unsafe_allow_html=True)
+
+        with st.expander("Component weights"):
+            ew_cols = st.columns(len(earlywarning.COMPONENTS))
+            ew_weights = tuple(
+                (key, col.slider(key.capitalize(), min_value=0.0, max_value=1.0,
+                                 value=earlywarning.DEFAULT_WEIGHTS[key], step=0.05, key=f"ew_{key}"))
+                for key, col in zip(earlywarning.COMPONENTS, ew_cols)
+            )
+        ew_k = st.slider("Countries on the watchlist", min_value=5, max_value=25, value=10)
+        watchlist = compute_watchlist(DATA_PATH, DATA_BACKEND, backend.version, ew_weights,
+                                      date_range[1], ew_k, tuple(selected_regions))
+
+        def _build_watchlist():
+            ranked = watchlist.iloc[::-1]
+            fig20 = go.Figure()
+            for key, color in zip(earlywarning.COMPONENTS, (CRIMSON, PHASE_COLORS[3], GOLD, TEAL)):
+                fig20.add_trace(go.Bar(
+                    x=ranked[f"{key}_contribution"], y=ranked["country"], orientation="h",
+                    name=key.capitalize(), marker_color=color,
+                    customdata=ranked[key],
+                    hovertemplate=f"<b>%{{y}}</b><br>{key.capitalize()}: %{{customdata:.1f}}<br>Contribution: %{{x:+.2f}}<extra></extra>",
+                ))
+            fig20.add_trace(go.Scatter(
+                x=ranked["score"], y=ranked["country"], mode="markers", name="Score",
+                marker=dict(color="#e8eaf2", size=9, symbol="diamond"),
+                hovertemplate="<b>%{y}</b><br>Score: %{x:.2f}<extra></extra>",
+            ))
+            fig20.update_layout(**PLOTLY_LAYOUT, height=max(360, 30 * len(ranked)), barmode="relative",
+                                title=f"Early-Warning Score, {watchlist['month'].iloc[0]:%b %Y}" if len(watchlist) else "Early-Warning Score",
+                                xaxis_title="Score (weighted z-scores)")
+            return fig20
+
+        if watchlist.empty:
+            st.info("No analyses in the selected regions up to the end of the date range.")
+        else:
+            ew_l, ew_r = st.columns([3, 2])
+            with ew_l:
+                fig20 = FIGURES.get_or_build(figure_key("watchlist", watchlist, ew_weights), _build_watchlist)
+                st.plotly_chart(fig20, use_container_width=True)
+            with ew_r:
+                st.dataframe(
+                    watchlist[["rank", "country", "score", *earlywarning.COMPONENTS]].round(2),
+                    use_container_width=True, hide_index=True,
+                )
+
+    perf_run.checkpoint("tab 4 · deterioration & recovery")
+
+    # ══════════════════════════════════════════════
+    # TAB 5 — STATISTICAL INSIGHTS
+    # ══════════════════════════════════════════════
+    with tab5:
+        st.markdown('<div class="section-label">Question 9</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Volatility vs Severity</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Does a higher average severity correlate with greater instability? This scatter explores the relationship between mean Phase 3+ % and its standard deviation.</div>', unsafe_allow_html=True)
+
+        stats = tables["volatility_stats"]
+
+        if len(stats) > 2:
+            from scipy.stats import pearsonr
+            corr, p_corr = pearsonr(stats["mean"], stats["std"])
+
+            def _build_volatility():
+                fig11 = go.Figure()
+                # Plot each region as a separate trace
+                for i, region in enumerate(stats["Region"].unique()):
+                    grp = stats[stats["Region"] == region]
+                    fig11.add_trace(go.Scatter(
+                        x=grp["mean"], y=grp["std"],
+                        mode="markers",
+                        name=region,
+                        text=grp["country"],
+                        marker=dict(
+                            size=grp["mean"].clip(5, 30),
+                            color=COLOR_SEQ[i % len(COLOR_SEQ)],
+                            opacity=0.85,
+                            line=dict(width=1, color="#252b3b"),
+                        ),
+                        hovertemplate="<b>%{text}</b><br>Mean: %{x:.1f}%<br>Std Dev: %{y:.2f}<extra></extra>",
+                    ))
+                # Manual OLS trendline using numpy
+                x_vals = stats["mean"].values
+                y_vals = stats["std"].values
+                m, b = np.polyfit(x_vals, y_vals, 1)
+                x_line = np.linspace(x_vals.min(), x_vals.max(), 100)
+                fig11.add_trace(go.Scatter(
+                    x=x_line, y=m * x_line + b,
+                    mode="lines",
+                    name="Trend",
+                    line=dict(color=GOLD, width=2, dash="dash"),
+                    hoverinfo="skip",
+                ))
+                fig11.update_layout(**PLOTLY_LAYOUT, height=420,
+                                    title="Volatility vs Average Severity in Phase 3+",
+                                    xaxis_title="Mean Phase 3+ (%)",
+                                    yaxis_title="Volatility (Std Dev)")
+                return fig11
+
+            fig11 = FIGURES.get_or_build(figure_key("volatility", stats), _build_volatility)
+            st.plotly_chart(fig11, use_container_width=True)
+            coverage_note("pct")
+
+            c1, c2, c3 = st.columns(3)
+            c1.metric("Pearson r", f"{corr:.3f}")
+            c2.metric("P-value", f"{p_corr:.5f}")
+            c3.metric("Relationship", "Strong +" if corr > 0.5 else ("Moderate +" if corr > 0.3 else "Weak"))
+
+            interp = (
+                "Countries with higher average food insecurity also tend to experience greater fluctuation over time, "
+                "suggesting structural instability in the most crisis-prone nations."
+                if corr > 0.4
+                else "The relationship between average severity and volatility is moderate or weak."
+            )
+            st.markdown(f"""
         <div class='insight-card'>
         <strong>Interpretation:</strong> {interp}
         (r = {corr:.2f}, p = {p_corr:.5f})
         </div>
         """, unsafe_allow_html=True)
 
-    # Phase heatmap
+        # Phase heatmap
+        st.markdown("---")
+        st.markdown('<div class="section-label">Phase Heatmap</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Phase 3+ Severity Heatmap by Country & Period</div>', unsafe_allow_html=True)
+
+        hc1, hc2 = st.columns(2)
+        heat_granularity = hc1.radio(
+            "Granularity", analytics.GRANULARITIES, horizontal=True,
+            format_func=lambda g: {"year": "Annual", "quarter": "Quarterly"}[g]
+        )
+        heat_top_n = hc2.slider("Countries shown", min_value=5, max_value=50, value=20, step=5)
+
+        pivot_heat = compute_heatmap(*filter_key, heat_granularity, heat_top_n)
+        period_name = "Year" if heat_granularity == "year" else "Quarter"
+
+        def _build_heatmap():
+            fig12 = go.Figure(go.Heatmap(
+                z=pivot_heat.values,
+                x=pivot_heat.columns.astype(str),
+                y=pivot_heat.index,
+                colorscale=[
+                    [0,   "#1c2030"],
+                    [0.25,"#3a5a40"],
+                    [0.5, GOLD],
+                    [0.75,"#d97a2a"],
+                    [1.0, CRIMSON],
+                ],
+                hoverongaps=False,
+                hovertemplate=f"<b>%{{y}}</b><br>{period_name}: %{{x}}<br>Phase 3+: %{{z:.1f}}%<extra></extra>",
+                colorbar=dict(
+                    title=dict(text="Phase 3+ %", font=dict(color="#a0a8c0")),
+                    tickfont=dict(color="#a0a8c0"),
+                    bgcolor="rgba(21,24,32,0.8)",
+                    bordercolor="#252b3b",
+                )
+            ))
+            fig12.update_layout(**PLOTLY_LAYOUT, height=max(520, 22 * len(pivot_heat)),
+                                title=f"{'Annual' if heat_granularity == 'year' else 'Quarterly'} "
+                                      f"Phase 3+ Severity Heatmap (Top {heat_top_n} Countries)",
+                                xaxis_title=period_name, yaxis_title="")
+            return fig12
+
+        fig12 = FIGURES.get_or_build(figure_key("heatmap", pivot_heat, heat_granularity, heat_top_n), _build_heatmap)
+        st.plotly_chart(fig12, use_container_width=True)
+
+        # Trajectory clusters
+        st.markdown("---")
+        st.markdown('<div class="section-label">Crisis Profiles</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Countries Clustered by Phase Composition Trajectory</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Groups countries whose full Phase 1–5 composition evolved alike over the whole record, rather than by a single mean and standard deviation. k-means compares trajectories quarter by quarter; DTW also matches crises that followed the same path a few quarters apart.</div>', unsafe_allow_html=True)
+
+        cc1, cc2 = st.columns(2)
+        cluster_method = cc1.radio(
+            "Clustering", clustering.METHODS, horizontal=True,
+            format_func=lambda m: {"kmeans": "k-means", "dtw": "Dynamic time warping"}[m]
+        )
+        cluster_k = cc2.slider("Clusters", min_value=2, max_value=len(COLOR_SEQ), value=4)
+
+        clusters = compute_clusters(DATA_PATH, DATA_BACKEND, backend.version, cluster_method, cluster_k)
+        members, profiles = clusters["members"], clusters["profiles"]
+        cluster_colors = {c: COLOR_SEQ[(c - 1) % len(COLOR_SEQ)] for c in range(1, clusters["k"] + 1)}
+
+        def _build_cluster_profiles():
+            fig13 = go.Figure()
+            sizes = members["cluster"].value_counts()
+            for c, grp in profiles.groupby("cluster"):
+                fig13.add_trace(go.Scatter(
+                    x=grp["date"], y=grp["crisis_plus_pct"],
+                    mode="lines",
+                    name=f"Cluster {c} ({sizes.get(c, 0)})",
+                    line=dict(color=cluster_colors[c], width=2.5),
+                    customdata=grp[["phase_3_pct","phase_4_pct","phase_5_pct"]],
+                    hovertemplate=(f"<b>Cluster {c}</b><br>%{{x|%b %Y}}<br>Phase 3+: %{{y:.1f}}%"
+                                   "<br>P3 %{customdata[0]:.1f}% · P4 %{customdata[1]:.1f}% · P5 %{customdata[2]:.1f}%<extra></extra>"),
+                ))
+            fig13.update_layout(**PLOTLY_LAYOUT, height=420,
+                                title="Mean Phase 3+ Trajectory per Cluster",
+                                yaxis_title="Phase 3+ (%)")
+            return fig13
+
+        def _build_cluster_map():
+            k = clusters["k"]
+            # Stepped colorscale: one flat band per cluster number
+            steps = []
+            for c in range(1, k + 1):
+                steps += [[(c - 1) / k, cluster_colors[c]], [c / k, cluster_colors[c]]]
+            fig14 = go.Figure(go.Choropleth(
+                locations=members["iso3"],
+                z=members["cluster"],
+                text=members["country"],
+                zmin=0.5, zmax=k + 0.5,
+                colorscale=steps,
+                colorbar=dict(MAP_COLORBAR, title=dict(text="Cluster", font=dict(color="#a0a8c0")),
+                              tickvals=list(range(1, k + 1))),
+                hovertemplate="<b>%{text}</b><br>Cluster %{z}<extra></extra>",
+                marker_line_color="#252b3b",
+                marker_line_width=0.5,
+            ))
+            fig14.update_layout(
+                **MAP_FIGURE_LAYOUT,
+                height=420,
+                title=dict(
+                    text="World Map: Crisis Profile Clusters",
+                    font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18)
+                ),
+            )
+            return fig14
+
+        cl_l, cl_r = st.columns([2, 3])
+        with cl_l:
+            fig13 = FIGURES.get_or_build(figure_key("cluster_profiles", profiles, cluster_method), _build_cluster_profiles)
+            st.plotly_chart(fig13, use_container_width=True)
+        with cl_r:
+            fig14 = FIGURES.get_or_build(figure_key("cluster_map", members[["iso3","country","cluster"]]), _build_cluster_map)
+            st.plotly_chart(fig14, use_container_width=True)
+
+        s1, s2 = st.columns(2)
+        s1.metric("Silhouette score", "—" if np.isnan(clusters["silhouette"]) else f"{clusters['silhouette']:.3f}")
+        s2.metric("Countries clustered", f"{len(members)}")
+        with st.expander("Cluster membership"):
+            st.dataframe(
+                members[["cluster","country","Region","mean_crisis_plus_pct","distance"]]
+                .rename(columns={"mean_crisis_plus_pct": "mean Phase 3+ %", "distance": "distance to cluster"}),
+                use_container_width=True, hide_index=True,
+            )
+
+        # Co-movement
+        st.markdown("---")
+        st.markdown('<div class="section-label">Co-movement</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Which Countries\' Crises Move Together</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Correlation of monthly Phase 3+ shares for every pair of countries, using only the months both have on record. Countries are ordered so that those moving together sit side by side, which surfaces regional contagion such as in the Sahel or the Horn of Africa. Correlating month-on-month changes removes shared long-run trends.</div>', unsafe_allow_html=True)
+
+        cm1, cm2 = st.columns(2)
+        comove_mode = cm1.radio(
+            "Correlate", comovement.MODES, horizontal=True,
+            format_func=lambda m: {"levels": "Phase 3+ levels", "changes": "Month-on-month changes"}[m],
+        )
+        comove_min = cm2.slider("Minimum shared months", min_value=6, max_value=60, value=comovement.MIN_PERIODS, step=6)
+
+        comove = compute_comovement(DATA_PATH, DATA_BACKEND, backend.version, comove_mode, comove_min)
+        comove_keep = comove["countries"]["Region"].isin(selected_regions).to_numpy()
+        comove_matrix = comove["matrix"].iloc[comove_keep, comove_keep]
+        comove_pairs = comovement.strongest_pairs(comove, selected_regions, k=15)
+
+        def _build_comovement():
+            fig19 = go.Figure(go.Heatmap(
+                z=comove_matrix.to_numpy(),
+                x=comove_matrix.columns, y=comove_matrix.index,
+                zmin=-1, zmax=1,
+                colorscale=[[0, TEAL], [0.5, "#1c2030"], [1, CRIMSON]],
+                colorbar=dict(MAP_COLORBAR, title=dict(text="r", font=dict(color="#a0a8c0"))),
+                hovertemplate="<b>%{y}</b> × <b>%{x}</b><br>r = %{z:.2f}<extra></extra>",
+            ))
+            fig19.update_layout(**PLOTLY_LAYOUT, height=max(520, 14 * len(comove_matrix)),
+                                title="Pairwise Correlation of Phase 3+ (clustered order)")
+            fig19.update_xaxes(tickfont=dict(size=9), showgrid=False)
+            fig19.update_yaxes(tickfont=dict(size=9), showgrid=False, autorange="reversed")
+            return fig19
+
+        cm_l, cm_r = st.columns([3, 2])
+        with cm_l:
+            if len(comove_matrix) > 1:
+                fig19 = FIGURES.get_or_build(figure_key("comovement", comove_matrix, comove_mode), _build_comovement)
+                st.plotly_chart(fig19, use_container_width=True)
+            else:
+                st.info("Select regions with at least two countries to compare.")
+        with cm_r:
+            st.markdown("**Most correlated pairs**")
+            st.dataframe(
+                comove_pairs.assign(
+                    pair=comove_pairs["country_a"] + " · " + comove_pairs["country_b"],
+                    regions=np.where(comove_pairs["region_a"] == comove_pairs["region_b"], comove_pairs["region_a"],
+                                     comove_pairs["region_a"] + " · " + comove_pairs["region_b"]),
+                )[["pair","regions","correlation","months"]]
+                .rename(columns={"months": "shared months"}),
+                use_container_width=True, hide_index=True,
+            )
+
+        # Cross-indicator explorer
+        st.markdown("---")
+        st.markdown('<div class="section-label">Indicator Explorer</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-title">Relating Indicators Across Datasets</div>', unsafe_allow_html=True)
+        st.markdown('<div class="section-desc">Any two series from the Data360 indicators in the data folder, joined by country and month. Each country contributes its latest observation in the selected range. Indicators reported less often than Y (e.g. annually) use their latest value at or before each Y observation.</div>', unsafe_allow_html=True)
+
+        catalog = get_catalog(DATA_DIR)
+        catalog_series = catalog.series()
+        series_label = lambda pair: f"{catalog.entries[pair[0]].label} · {pair[1]}"
+        default_x = ("IPC_IPC_PHASE", "PT.PHASE3PLUS")
+        default_y = ("IPC_IPC_PHASE", "PT.PHASE4")
+
+        ic1, ic2 = st.columns(2)
+        y_series = ic1.selectbox(
+            "Y series", catalog_series, format_func=series_label,
+            index=catalog_series.index(default_y) if default_y in catalog_series else 0,
+        )
+        x_series = ic2.selectbox(
+            "X series", catalog_series, format_func=series_label,
+            index=catalog_series.index(default_x) if default_x in catalog_series else min(1, len(catalog_series) - 1),
+        )
+
+        joined = catalog.join([y_series, x_series], how="asof")
+        y_col, x_col = f"{y_series[0]}.{y_series[1]}", f"{x_series[0]}.{x_series[1]}"
+        joined["Region"] = joined["country"].map(analytics.assign_region)
+        joined = joined[
+            joined["Region"].isin(selected_regions) &
+            (joined["date"] >= pd.Timestamp(date_range[0])) & (joined["date"] <= pd.Timestamp(date_range[1]))
+        ].dropna(subset=[x_col, y_col])
+        latest_joined = joined.loc[joined.groupby("iso3")["date"].idxmax()] if len(joined) else joined
+
+        if len(latest_joined):
+            def _build_indicator_scatter():
+                fig15 = go.Figure()
+                for i, (region, grp) in enumerate(latest_joined.groupby("Region")):
+                    fig15.add_trace(go.Scatter(
+                        x=grp[x_col], y=grp[y_col],
+                        mode="markers", name=region,
+                        text=grp["country"], customdata=grp["date"].dt.strftime("%b %Y"),
+                        marker=dict(size=10, color=COLOR_SEQ[i % len(COLOR_SEQ)], opacity=0.85,
+                                    line=dict(width=1, color="#252b3b")),
+                        hovertemplate="<b>%{text}</b> (%{customdata})<br>X: %{x:,.2f}<br>Y: %{y:,.2f}<extra></extra>",
+                    ))
+                fig15.update_layout(**PLOTLY_LAYOUT, height=420,
+                                    title=f"{y_series[1]} vs {x_series[1]} (latest per country)",
+                                    xaxis_title=series_label(x_series), yaxis_title=series_label(y_series))
+                return fig15
+
+            fig15 = FIGURES.get_or_build(
+                figure_key("indicator_scatter", latest_joined[["country","date","Region",x_col,y_col]],
+                           series_label(x_series), series_label(y_series)),
+                _build_indicator_scatter,
+            )
+            st.plotly_chart(fig15, use_container_width=True)
+        else:
+            st.info("No country has both series in the selected regions and date range.")
+
+    perf_run.checkpoint("tab 5 · statistical insights")
+
+    # ─────────────────────────────────────────────
+    # RELEASE CHANGES
+    # ─────────────────────────────────────────────
     st.markdown("---")
-    st.markdown('<div class="section-label">Phase Heatmap</div>', unsafe_allow_html=True)
-    st.markdown('<div class="section-title">Phase 3+ Severity Heatmap by Country & Year</div>', unsafe_allow_html=True)
-
-    wp_heat = wp.copy()
-    wp_heat["year"] = wp_heat["date"].dt.year
-    pivot_heat = wp_heat.groupby(["country","year"])["crisis_plus_pct"].mean().unstack()
-    # top 20 countries by mean
-    top20 = pivot_heat.mean(axis=1).sort_values(ascending=False).head(20).index
-    pivot_heat = pivot_heat.loc[top20]
-
-    fig12 = go.Figure(go.Heatmap(
-        z=pivot_heat.values,
-        x=pivot_heat.columns.astype(str),
-        y=pivot_heat.index,
-        colorscale=[
-            [0,   "#1c2030"],
-            [0.25,"#3a5a40"],
-            [0.5, GOLD],
-            [0.75,"#d97a2a"],
-            [1.0, CRIMSON],
-        ],
-        hoverongaps=False,
-        hovertemplate="<b>%{y}</b><br>Year: %{x}<br>Phase 3+: %{z:.1f}%<extra></extra>",
-        colorbar=dict(
-            title=dict(text="Phase 3+ %", font=dict(color="#a0a8c0")),
-            tickfont=dict(color="#a0a8c0"),
-            bgcolor="rgba(21,24,32,0.8)",
-            bordercolor="#252b3b",
+    st.markdown('<div class="section-label">Release Changes</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-title">What Changed Since the Last Release</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-desc">Every dataset build served here is kept as a release. Only countries whose stored blocks differ between two releases are read and compared, month by month and phase by phase.</div>', unsafe_allow_html=True)
+
+    releases = get_snapshot_store().releases()
+    if len(releases) < 2:
+        st.info("Only one release has been recorded so far — changes appear here once a revised CSV is loaded.")
+    else:
+        release_label = dict(zip(
+            releases["version"],
+            releases["version"] + " · " + releases["ingested_at"].dt.strftime("%Y-%m-%d %H:%M"),
+        ))
+        versions = releases["version"].tolist()
+        rc1, rc2 = st.columns(2)
+        new_release = rc2.selectbox(
+            "Newer release", versions[::-1], format_func=release_label.get,
+            index=versions[::-1].index(backend.version) if backend.version in versions else 0,
         )
-    ))
-    fig12.update_layout(**PLOTLY_LAYOUT, height=520,
-                        title="Annual Phase 3+ Severity Heatmap (Top 20 Countries)",
-                        xaxis_title="Year", yaxis_title="")
-    st.plotly_chart(fig12, use_container_width=True)
+        older = versions[:versions.index(new_release)] or versions
+        old_release = rc1.selectbox("Older release", older[::-1], format_func=release_label.get)
+
+        release_diff = compute_release_diff(old_release, new_release)
+        rdiff, rsummary = release_diff["diff"], release_diff["summary"]
+        rm1, rm2, rm3, rm4 = st.columns(4)
+        rm1.metric("Countries changed", f"{len(rsummary)}")
+        rm2.metric("Months revised", f"{int(rsummary['revised'].sum()) if len(rsummary) else 0}")
+        rm3.metric("Months added / removed",
+                   f"{int(rsummary['added'].sum()) if len(rsummary) else 0} / {int(rsummary['removed'].sum()) if len(rsummary) else 0}")
+        net_people = rsummary["net_PS.PHASE3PLUS"].sum() if len(rsummary) else 0
+        rm4.metric("Net Phase 3+ people", f"{net_people/1e6:+.2f}M")
+
+        if len(rdiff):
+            rd_l, rd_r = st.columns([2, 3])
+            with rd_l:
+                top_changed = rsummary.head(15).iloc[::-1]
+                def _build_release_changes():
+                    fig18 = go.Figure(go.Bar(
+                        x=top_changed["net_PS.PHASE3PLUS"] / 1e6, y=top_changed["country"],
+                        orientation="h",
+                        marker_color=np.where(top_changed["net_PS.PHASE3PLUS"] > 0, CRIMSON, TEAL),
+                        customdata=top_changed[["revised","added","removed"]],
+                        hovertemplate=("<b>%{y}</b><br>Net Phase 3+: %{x:+.3f}M"
+                                       "<br>%{customdata[0]} revised · %{customdata[1]} added · %{customdata[2]} removed<extra></extra>"),
+                    ))
+                    fig18.update_layout(**PLOTLY_LAYOUT, height=max(300, 26 * len(top_changed)),
+                                        title="Net Change in Phase 3+ People by Country",
+                                        xaxis_title="People (M)")
+                    return fig18
+
+                fig18 = FIGURES.get_or_build(
+                    figure_key("release_changes", top_changed[["country","net_PS.PHASE3PLUS","revised","added","removed"]]),
+                    _build_release_changes,
+                )
+                st.plotly_chart(fig18, use_container_width=True)
+            with rd_r:
+                st.dataframe(
+                    rdiff.assign(date=rdiff["date"].dt.strftime("%Y-%m"))
+                    [["country","date","series","status","old","new","change"]],
+                    use_container_width=True, hide_index=True, height=max(300, 26 * min(len(top_changed), 15)),
+                )
+        else:
+            st.success("The two releases are identical.")
+
+    # ─────────────────────────────────────────────
+    # DATA EXPORT
+    # ─────────────────────────────────────────────
+    st.markdown("---")
+    st.markdown('<div class="section-label">Data Export</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-title">Download the Underlying Tables</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-desc">The tables behind the charts above, for the current region and date filters.</div>', unsafe_allow_html=True)
+
+    # Already computed for this filter state, so exporting never recomputes
+    export_tables = {
+        "country_slopes": slope_df,
+        "volatility_stats": stats,
+        "crisis_depth": tables["crisis_depth"],
+        "top_burden": tables["burden_shares"].head(10),
+        "regional_summary": reg_summary,
+        "severity_heatmap": pivot_heat.reset_index(),
+        "trajectory_clusters": members,
+        "concentration": conc_metrics,
+        "release_changes": rdiff if len(releases) >= 2 else pd.DataFrame(),
+        "comovement_pairs": comove_pairs,
+        "scenario_projection": mk_run.assign(unit=mk_unit, scenario=mk_scenario, shock=mk_shock),
+        "watchlist": watchlist,
+        "custom_regions": custom_summary,
+        "coverage": tables["coverage"].assign(quality=quality),
+    }
+    ALL_TABLES = "all"
+
+    e1, e2, e3 = st.columns([2, 2, 1])
+    export_choice = e1.selectbox(
+        "Table", [ALL_TABLES, *export_tables],
+        format_func=lambda n: "All tables (zip)" if n == ALL_TABLES else n.replace("_", " ").title()
+    )
+    export_fmt = e2.radio(
+        "Format", exports.available_formats(), horizontal=True,
+        format_func=lambda f: exports.FORMATS[f]["label"]
+    )
+    export_suffix = f"_{date_range[0]:%Y%m}-{date_range[1]:%Y%m}"
+
+    def _export_payload():
+        # Runs only when the button is clicked, in place of a rerun
+        if export_choice == ALL_TABLES:
+            return exports.export_bundle(export_tables, export_fmt, export_suffix)
+        return exports.export_table(export_tables[export_choice], export_fmt)
+
+    if export_choice == ALL_TABLES:
+        export_name, export_mime = f"ipc_analytics{export_suffix}.zip", "application/zip"
+    else:
+        export_name = exports.file_name(export_choice, export_fmt, export_suffix)
+        export_mime = exports.FORMATS[export_fmt]["mime"]
+
+    e3.markdown("<br>", unsafe_allow_html=True)
+    e3.download_button(
+        "⬇ Download", data=_export_payload, file_name=export_name,
+        mime=export_mime, on_click="ignore", use_container_width=True
+    )
 
-# ─────────────────────────────────────────────
-# FOOTER
-# ─────────────────────────────────────────────
-st.markdown("""
+    perf_run.checkpoint("data export")
+
+    # ─────────────────────────────────────────────
+    # FOOTER
+    # ─────────────────────────────────────────────
+    st.markdown("""
 <div class='footer'>
   Global Food Crisis Observatory &nbsp;·&nbsp; DSCD 611 Final Project &nbsp;·&nbsp;
   Data: IPC Global Platform &nbsp;·&nbsp; Built with Streamlit & Plotly
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+    # ─────────────────────────────────────────────
+    # PERFORMANCE PANEL (optional)
+    # ─────────────────────────────────────────────
+    perf_run.checkpoint("footer")
+    # Always stop the profiler, even when the panel was switched off during this rerun
+    profile_report = None
+    if perf_run.profiler is not None:
+        profile_report, profile_dump = perf.stop_profile(perf_run)
+
+    with st.sidebar:
+        st.markdown("---")
+        show_perf = st.toggle("⏱ Performance panel", key="perf_panel",
+                              help="Per-section timings, cache hit rates and memory for this rerun")
+        if show_perf:
+            st.checkbox("Profile reruns (cProfile)", key="perf_profile",
+                        help="Takes effect from the next rerun; adds profiler overhead to the timings")
+
+            stages = perf_run.frame()
+            sections = stages[stages["kind"] == "section"]
+            p1, p2 = st.columns(2)
+            p1.metric("Rerun", f"{perf_run.elapsed() * 1000:.0f} ms")
+            p2.metric("Process RSS", f"{perf.rss_bytes() / 2**20:.0f} MB")
+
+            st.markdown("**Sections**")
+            st.dataframe(
+                sections.assign(ms=(sections["seconds"] * 1000).round(1))[["name", "ms"]],
+                hide_index=True, use_container_width=True
+            )
+            st.markdown("**Functions & figures**")
+            work = stages[stages["kind"] != "section"]
+            st.dataframe(
+                work.assign(ms=(work["seconds"] * 1000).round(1))[["name", "kind", "cache", "ms", "rows_in", "rows_out"]],
+                hide_index=True, use_container_width=True
+            )
+            st.markdown("**Cache hit rates (process-wide)**")
+            fig_stats = FIGURES.stats()
+            cache_stats = pd.concat([
+                perf.CACHE_STATS.frame(),
+                pd.DataFrame([dict(function="figure cache", calls=fig_stats["hits"] + fig_stats["misses"],
+                                   hits=fig_stats["hits"], misses=fig_stats["misses"],
+                                   hit_rate=round(fig_stats["hits"] / max(fig_stats["hits"] + fig_stats["misses"], 1), 3))]),
+            ], ignore_index=True)
+            st.dataframe(cache_stats, hide_index=True, use_container_width=True)
+
+            if profile_report is not None:
+                with st.expander("cProfile (this rerun)"):
+                    st.code(profile_report, language="text")
+                st.download_button("⬇ Download .prof", data=profile_dump,
+                                   file_name="observatory_rerun.prof", on_click="ignore")
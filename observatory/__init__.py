@@ -0,0 +1 @@
+"""Shared building blocks for the Global Food Crisis Observatory dashboard."""
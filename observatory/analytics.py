@@ -0,0 +1,495 @@
+"""Data loading and vectorized analytics shared by the dashboard and tooling."""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from observatory import kernels
+from observatory.perf import profiled
+
+WEST_AFRICA = [
+    "Benin","Burkina Faso","Cabo Verde","Côte d'Ivoire","Gambia",
+    "Ghana","Guinea","Guinea-Bissau","Liberia","Mali","Mauritania",
+    "Niger","Nigeria","Senegal","Sierra Leone","Togo","Chad"
+]
+EAST_AFRICA = [
+    "Burundi","Djibouti","Eritrea","Ethiopia","Kenya","Rwanda",
+    "South Sudan","Sudan","Uganda","Tanzania"
+]
+
+# The bundled dataset; the dashboard, the API and every CLI default to it
+DEFAULT_DATA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "IPC_IPC_PHASE.csv")
+
+GRANULARITIES = ("year", "quarter")
+
+# ── observation quality ──
+# Each wide row carries ``obs_flags``: bit p-1 is set when phase p was not
+# reported as a normal value (OBS_STATUS other than "A", or no value)
+NORMAL_STATUS = "A"
+ALL_PHASES_MASK = 0b11111
+# Phase 5 is withheld whenever nobody is classified in Famine, so its absence
+# alone does not make an analysis incomplete
+CORE_PHASES_MASK = 0b01111
+QUALITY_MODES = ("include", "downweight", "exclude")
+_POPCOUNT = np.array([bin(i).count("1") for i in range(ALL_PHASES_MASK + 1)])
+
+
+def assign_region(c):
+    if c in WEST_AFRICA: return "West Africa"
+    elif c in EAST_AFRICA: return "East Africa"
+    else: return "Other"
+
+
+def dataset_version(file, chunk_size=1 << 20):
+    """Short content hash identifying one build of the source CSV."""
+    h = hashlib.sha1()
+    with open(file, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def is_dataset_version(text):
+    """Whether ``text`` has the form :func:`dataset_version` returns (12 lowercase hex digits)."""
+    return isinstance(text, str) and len(text) == 12 and all(c in "0123456789abcdef" for c in text)
+
+
+def write_atomic(path, write):
+    """Create ``path`` by calling ``write(tmp)`` on a temp file beside it, then renaming it into place.
+
+    Readers, including other processes, never see a partial file, and the
+    temp file is removed if ``write`` fails.
+    """
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    os.close(fd)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def cache_dir():
+    """Directory for derived artefacts persisted between runs (indexes, snapshots)."""
+    path = os.environ.get("OBSERVATORY_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "observatory"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@profiled
+def load_data(file):
+    """Parse a Data360 IPC_IPC_PHASE CSV into wide people / percentage frames."""
+    df_raw = pd.read_csv(file)
+    df_raw["date"] = pd.to_datetime(df_raw["TIME_PERIOD"], format="%Y-%m", errors="coerce")
+    df_raw["phase"] = df_raw["COMP_BREAKDOWN_2"].str.extract(r"PHASE(\d)").astype(float)
+
+    if "OBS_STATUS" not in df_raw.columns:
+        df_raw["OBS_STATUS"] = NORMAL_STATUS
+
+    df = df_raw.rename(columns={
+        "REF_AREA": "iso3",
+        "REF_AREA_LABEL": "country",
+        "UNIT_MEASURE": "unit",
+        "OBS_VALUE": "value",
+        "OBS_STATUS": "status",
+    })[["iso3", "country", "date", "phase", "unit", "value", "status"]]
+
+    df = df.dropna(subset=["date", "phase"])
+    df["phase"] = df["phase"].astype(int)
+
+    df["Region"] = df["country"].apply(assign_region)
+    # Bit of each phase reported as a normal value; missing rows never set theirs
+    df["reported"] = np.where((df["status"] == NORMAL_STATUS) & df["value"].notna(), np.left_shift(1, df["phase"] - 1), 0)
+
+    keys = ["iso3","country","Region","date"]
+    df_people = df[df["unit"] == "PS"]
+    df_pct    = df[df["unit"] == "PT"]
+
+    def _pivot(frame, how):
+        # keys × phase matrix of the values; same index and columns as pivot_table
+        frame = frame.dropna(subset=["value"])
+        grouped = frame.groupby(keys, sort=True)
+        phases, cols = np.unique(frame["phase"].to_numpy(), return_inverse=True)
+        values = kernels.pivot_reduce(grouped.ngroup().to_numpy(), cols, frame["value"].to_numpy(),
+                                      grouped.ngroups, len(phases), how)
+        return pd.DataFrame(values, index=grouped.size().index, columns=pd.Index(phases, name="phase"))
+
+    def _obs_flags(frame):
+        reported = frame.drop_duplicates([*keys, "phase", "reported"]).groupby(keys)["reported"].sum()
+        return (ALL_PHASES_MASK & ~reported.to_numpy(dtype=np.int64)).astype(np.uint8), reported.index
+
+    wide_people = _pivot(df_people, "sum")
+    wide_pct = _pivot(df_pct, "mean")
+    for wide, frame in ((wide_people, df_people), (wide_pct, df_pct)):
+        flags, index = _obs_flags(frame)
+        wide["obs_flags"] = pd.Series(flags, index=index).reindex(wide.index).to_numpy()
+    wide_people, wide_pct = wide_people.reset_index(), wide_pct.reset_index()
+
+    wide_people.columns = [f"phase_{int(c)}_people" if isinstance(c, (int, float)) else c for c in wide_people.columns]
+    wide_pct.columns    = [f"phase_{int(c)}_pct"    if isinstance(c, (int, float)) else c for c in wide_pct.columns]
+
+    for p in [3,4,5]:
+        if f"phase_{p}_people" not in wide_people.columns:
+            wide_people[f"phase_{p}_people"] = 0
+        if f"phase_{p}_pct" not in wide_pct.columns:
+            wide_pct[f"phase_{p}_pct"] = 0
+
+    wide_people["crisis_plus_people"] = wide_people[["phase_3_people","phase_4_people","phase_5_people"]].fillna(0).sum(axis=1)
+    wide_pct["crisis_plus_pct"]       = wide_pct[["phase_3_pct","phase_4_pct","phase_5_pct"]].fillna(0).sum(axis=1)
+
+    wide_pct["severe_share"] = np.where(
+        wide_pct["crisis_plus_pct"] > 0,
+        wide_pct[["phase_4_pct","phase_5_pct"]].fillna(0).sum(axis=1) / wide_pct["crisis_plus_pct"],
+        np.nan
+    )
+
+    return wide_people, wide_pct
+
+
+# ─────────────────────────────────────────────
+# PERIOD AGGREGATES
+# ─────────────────────────────────────────────
+@dataclass(frozen=True)
+class PeriodAggregates:
+    """Per-country cumulative monthly sums/counts of one metric.
+
+    ``csum[:, j]`` holds the sum over months ``[0, j)``, so the total over any
+    month range — and therefore any annual or quarterly bin clipped to a date
+    filter — is a single subtraction.
+    """
+    countries: np.ndarray
+    regions: np.ndarray
+    months: pd.DatetimeIndex
+    csum: np.ndarray
+    ccount: np.ndarray
+    period_starts: dict
+    period_labels: dict
+
+
+@profiled
+def build_period_aggregates(wide_pct, value="crisis_plus_pct"):
+    """Precompute the cumulative country × month sums/counts behind the heatmap."""
+    valid = wide_pct[["country","Region","date",value]].dropna(subset=[value])
+    countries, c_idx = np.unique(valid["country"].to_numpy(), return_inverse=True)
+    regions = valid.drop_duplicates("country").set_index("country")["Region"].reindex(countries).to_numpy()
+
+    months = pd.date_range(valid["date"].min().to_period("M").to_timestamp(),
+                           valid["date"].max(), freq="MS")
+    m_idx = (valid["date"].dt.year.to_numpy() - months[0].year) * 12 + valid["date"].dt.month.to_numpy() - months[0].month
+
+    sums = np.zeros((len(countries), len(months)))
+    counts = np.zeros((len(countries), len(months)))
+    np.add.at(sums, (c_idx, m_idx), valid[value].to_numpy(dtype=float))
+    np.add.at(counts, (c_idx, m_idx), 1)
+
+    csum = np.zeros((len(countries), len(months) + 1))
+    ccount = np.zeros_like(csum)
+    np.cumsum(sums, axis=1, out=csum[:, 1:])
+    np.cumsum(counts, axis=1, out=ccount[:, 1:])
+
+    years = months.year.to_numpy()
+    quarters = years * 10 + months.quarter.to_numpy()
+    period_starts, period_labels = {}, {}
+    for gran, keys in (("year", years), ("quarter", quarters)):
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+        period_starts[gran] = starts
+        period_labels[gran] = np.array(
+            [str(y) for y in years[starts]] if gran == "year"
+            else [f"{k // 10}-Q{k % 10}" for k in quarters[starts]]
+        )
+
+    return PeriodAggregates(countries, regions, months, csum, ccount, period_starts, period_labels)
+
+
+def top_k_desc(values, k):
+    """Indices of the ``k`` largest non-NaN values, largest first, without a full sort."""
+    idx = np.flatnonzero(~np.isnan(values))
+    if len(idx) > k:
+        idx = idx[np.argpartition(-values[idx], k - 1)[:k]]
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+@profiled
+def heatmap_matrix(aggs, regions, start, end, granularity="year", top_n=20):
+    """Country × period mean matrix for the top ``top_n`` countries by mean across periods."""
+    rows = np.flatnonzero(np.isin(aggs.regions, list(regions)))
+    m0 = aggs.months.searchsorted(pd.Timestamp(start), side="left")
+    m1 = aggs.months.searchsorted(pd.Timestamp(end), side="right")
+    if m1 <= m0 or len(rows) == 0:
+        return pd.DataFrame(dtype=float)
+
+    starts = aggs.period_starts[granularity]
+    inner = starts[(starts > m0) & (starts < m1)]
+    edges = np.r_[m0, inner, m1]
+    labels = aggs.period_labels[granularity][np.searchsorted(starts, edges[:-1], side="right") - 1]
+
+    csum, ccount = aggs.csum[rows], aggs.ccount[rows]
+    sums = csum[:, edges[1:]] - csum[:, edges[:-1]]
+    counts = ccount[:, edges[1:]] - ccount[:, edges[:-1]]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, sums / counts, np.nan)
+
+    has_data = counts.any(axis=0)
+    means, labels = means[:, has_data], labels[has_data]
+    n_periods = (~np.isnan(means)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        row_mean = np.where(n_periods > 0, np.nansum(means, axis=1) / n_periods, np.nan)
+    top = top_k_desc(row_mean, top_n)
+    return pd.DataFrame(means[top], index=pd.Index(aggs.countries[rows][top], name="country"),
+                        columns=pd.Index(labels, name=granularity))
+
+
+def membership_matrix(countries, groups):
+    """Sparse group × country 0/1 matrix; ``groups`` maps a group name to its member countries."""
+    from scipy import sparse  # deferred: only custom regions need it
+
+    col = {c: j for j, c in enumerate(countries)}
+    pairs = [(i, col[c]) for i, members in enumerate(groups.values()) for c in dict.fromkeys(members) if c in col]
+    rows, cols = np.array(pairs, dtype=np.int64).reshape(-1, 2).T
+    return sparse.csr_matrix((np.ones(len(pairs)), (rows, cols)), shape=(len(groups), len(countries)))
+
+
+@profiled
+def custom_region_summary(aggs, groups, start, end):
+    """``regional_summary`` for ad-hoc country groups, from the precomputed monthly sums.
+
+    Each group's monthly mean is one sparse product of its membership row
+    with the country × month sums and counts, so adding or editing a group
+    never touches the underlying frames.
+    """
+    columns = ["Region", "date", "crisis_plus_pct", "countries"]
+    m0 = aggs.months.searchsorted(pd.Timestamp(start), side="left")
+    m1 = aggs.months.searchsorted(pd.Timestamp(end), side="right")
+    if m1 <= m0 or not groups:
+        return pd.DataFrame(columns=columns)
+
+    membership = membership_matrix(aggs.countries, groups)
+    sums = membership @ np.diff(aggs.csum[:, m0:m1 + 1], axis=1)
+    counts = membership @ np.diff(aggs.ccount[:, m0:m1 + 1], axis=1)
+    g, m = np.nonzero(counts)
+    return pd.DataFrame({
+        "Region": np.asarray(list(groups), dtype=object)[g],
+        "date": aggs.months[m0:m1][m],
+        "crisis_plus_pct": sums[g, m] / counts[g, m],
+        "countries": counts[g, m].astype(int),
+    }, columns=columns)
+
+
+# ─────────────────────────────────────────────
+# PER-COUNTRY INDEX
+# ─────────────────────────────────────────────
+def row_ranges(labels):
+    """``{label: (start, stop)}`` for each run of equal values in an array sorted by label."""
+    labels = np.asarray(labels)
+    if len(labels) == 0:
+        return {}
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    stops = np.r_[starts[1:], len(labels)]
+    return dict(zip(labels[starts].tolist(), zip(starts.tolist(), stops.tolist())))
+
+
+def country_profile(pct, people):
+    """One country's full history plus the trend and volatility figures of the dashboard tables.
+
+    ``pct`` / ``people`` are that country's wide rows in date order.
+    """
+    y = pct["crisis_plus_pct"].to_numpy(dtype=float)
+    n = len(y)
+    peak = int(np.argmax(y)) if n else None
+    summary = dict(
+        observations=n,
+        # Same OLS slope per observation as country_slopes, which only
+        # ranks countries with more than six analyses
+        slope=float(np.polyfit(np.arange(n), y, 1)[0]) if n > 1 else np.nan,
+        ranked=n > 6,
+        mean=float(y.mean()) if n else np.nan,
+        std=float(y.std(ddof=1)) if n > 1 else np.nan,
+        latest_date=pct["date"].iloc[-1] if n else None,
+        latest_pct=float(y[-1]) if n else np.nan,
+        latest_people=float(people["crisis_plus_people"].iloc[-1]) if len(people) else np.nan,
+        peak_pct=float(y[peak]) if n else np.nan,
+        peak_date=pct["date"].iloc[peak] if n else None,
+    )
+    first = pct.iloc[0] if n else people.iloc[0]
+    return dict(iso3=first["iso3"], country=first["country"], region=first["Region"],
+                pct=pct.reset_index(drop=True), people=people.reset_index(drop=True), summary=summary)
+
+
+# ─────────────────────────────────────────────
+# FILTERED ANALYTICS
+# ─────────────────────────────────────────────
+@profiled
+def filter_frames(wide_people, wide_pct, regions, start, end):
+    """Apply the sidebar region/date filters to both wide frames."""
+    start, end = pd.Timestamp(start), pd.Timestamp(end)
+    mask_pct = (
+        wide_pct["Region"].isin(regions) &
+        (wide_pct["date"] >= start) &
+        (wide_pct["date"] <= end)
+    )
+    mask_ppl = (
+        wide_people["Region"].isin(regions) &
+        (wide_people["date"] >= start) &
+        (wide_people["date"] <= end)
+    )
+    return wide_pct[mask_pct].copy(), wide_people[mask_ppl].copy()
+
+
+def quality_weights(flags, mode="include"):
+    """Per-row weights for ``obs_flags`` under a :data:`QUALITY_MODES` policy.
+
+    ``include`` counts every analysis fully, ``downweight`` by the share of
+    its five phase values that were reported, and ``exclude`` gives 0 to
+    analyses missing any of Phases 1–4.
+    """
+    flags = np.asarray(flags, dtype=np.int64) & ALL_PHASES_MASK
+    if mode == "include":
+        return np.ones(len(flags))
+    if mode == "downweight":
+        return 1 - _POPCOUNT[flags] / 5
+    if mode == "exclude":
+        return ((flags & CORE_PHASES_MASK) == 0).astype(np.float64)
+    raise ValueError(f"Unknown quality mode {mode!r}; expected one of {', '.join(QUALITY_MODES)}")
+
+
+def _weights(frame, weights):
+    return np.ones(len(frame)) if weights is None else np.asarray(weights, dtype=np.float64)
+
+
+def _weighted_means(frame, keys, value, weights):
+    """Weighted mean of ``value`` per ``keys`` group; groups with no weight are dropped."""
+    grouped = frame.groupby(keys, sort=True)
+    codes = grouped.ngroup().to_numpy()
+    y = frame[value].to_numpy(dtype=np.float64)
+    w = np.where(np.isnan(y), 0.0, weights)
+    total = np.bincount(codes, weights=w, minlength=grouped.ngroups)
+    sums = np.bincount(codes, weights=np.where(w > 0, w * y, 0.0), minlength=grouped.ngroups)
+    out = grouped.size().index.to_frame(index=False)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out[value] = sums / total
+    return out[total > 0].reset_index(drop=True)
+
+
+@profiled
+def latest_snapshot(frame, weights=None):
+    """Most recent row per country, skipping rows with zero weight."""
+    used = frame.loc[_weights(frame, weights) > 0]
+    return frame.loc[used.groupby("country")["date"].idxmax()]
+
+
+@profiled
+def global_trend(wp, weights=None):
+    trend = _weighted_means(wp, "date", "crisis_plus_pct", _weights(wp, weights))
+    trend["roll"] = trend["crisis_plus_pct"].rolling(3, min_periods=1).mean()
+    return trend
+
+
+@profiled
+def burden_shares(latest_ppl):
+    """Latest Phase 3+ people per country with its share of the global total, largest first."""
+    lat_ppl = latest_ppl.copy()
+    lat_ppl["global_share"] = lat_ppl["crisis_plus_people"] / lat_ppl["crisis_plus_people"].sum() * 100
+    return lat_ppl.sort_values("global_share", ascending=False)
+
+
+@profiled
+def crisis_depth(wp, weights=None):
+    """Mean Phase 4–5 share of Phase 3+ per country, deepest first."""
+    return (
+        _weighted_means(wp, "country", "severe_share", _weights(wp, weights))
+        .sort_values(["severe_share","country"], ascending=[False, True])
+    )
+
+
+@profiled
+def regional_summary(wp, weights=None):
+    return _weighted_means(wp, ["Region","date"], "crisis_plus_pct", _weights(wp, weights))
+
+
+@profiled
+def country_slopes(wp, min_points=6, weights=None):
+    """Linear trend of Phase 3+ % per observation period for countries with enough data.
+
+    A weighted least-squares fit against each country's observation index,
+    finished from per-country sufficient statistics; zero-weight rows keep
+    their place on the index but do not count towards ``min_points``.
+    """
+    w = _weights(wp, weights)
+    order = np.lexsort((wp["date"].to_numpy(), wp["country"].to_numpy()))
+    countries, codes = np.unique(wp["country"].to_numpy()[order], return_inverse=True)
+    w, y = w[order], wp["crisis_plus_pct"].to_numpy(dtype=np.float64)[order]
+    starts = np.searchsorted(codes, np.arange(len(countries)))
+    x = np.arange(len(codes)) - starts[codes]
+    slope, used = kernels.grouped_wls(codes, len(countries), x, y, w)
+    keep = used > min_points
+    regions = wp["Region"].to_numpy()[order][starts]
+    return pd.DataFrame({"country": countries[keep], "slope": slope[keep], "region": regions[keep]})
+
+
+@profiled
+def volatility_stats(wp, weights=None):
+    """Weighted mean and standard deviation of Phase 3+ % per country.
+
+    The standard deviation uses reliability weights, so with equal weights it
+    is the usual sample (n − 1) estimate.
+    """
+    w = _weights(wp, weights)
+    codes, countries = pd.factorize(wp["country"], sort=True)
+    y = wp["crisis_plus_pct"].to_numpy(dtype=np.float64)
+    mean, std = kernels.grouped_mean_std(codes, len(countries), y, w)
+    stats = pd.DataFrame({"country": np.asarray(countries), "mean": mean, "std": std})
+    stats = stats.merge(wp[["country","Region"]].drop_duplicates(), on="country", how="left")
+    return stats.dropna()
+
+
+@profiled
+def coverage_summary(wp, wpl, weights_pct=None, weights_ppl=None):
+    """How much of each filtered frame the tables rest on, one row per frame.
+
+    ``analyses`` rows matched the filters, ``used`` carry weight, ``weight``
+    is their total and ``complete`` report all of Phases 1–4. ``reported``
+    is the mean share of the five phase values that were reported.
+    """
+    rows = []
+    for name, frame, weights in (("pct", wp, weights_pct), ("people", wpl, weights_ppl)):
+        w = _weights(frame, weights)
+        flags = frame["obs_flags"].to_numpy(dtype=np.int64) & ALL_PHASES_MASK
+        rows.append({
+            "frame": name,
+            "analyses": len(frame),
+            "used": int((w > 0).sum()),
+            "weight": float(w.sum()),
+            "complete": int(((flags & CORE_PHASES_MASK) == 0).sum()),
+            "reported": float(1 - _POPCOUNT[flags].mean() / 5) if len(frame) else np.nan,
+        })
+    return pd.DataFrame(rows)
+
+
+@profiled
+def compute_tables(wp, wpl, quality="include"):
+    """All filter-dependent tables behind the dashboard tabs, keyed by name.
+
+    ``quality`` (one of :data:`QUALITY_MODES`) sets how analyses with
+    unreported phases weigh in every aggregate.
+    """
+    w_pct = quality_weights(wp["obs_flags"], quality)
+    w_ppl = quality_weights(wpl["obs_flags"], quality)
+    latest_pct = latest_snapshot(wp, w_pct)
+    latest_ppl = latest_snapshot(wpl, w_ppl)
+    return {
+        "global_trend": global_trend(wp, w_pct),
+        "latest_pct": latest_pct,
+        "latest_people": latest_ppl,
+        "burden_shares": burden_shares(latest_ppl),
+        "crisis_depth": crisis_depth(wp, w_pct),
+        "regional_summary": regional_summary(wp, w_pct),
+        "country_slopes": country_slopes(wp, weights=w_pct),
+        "volatility_stats": volatility_stats(wp, w_pct),
+        "coverage": coverage_summary(wp, wpl, w_pct, w_ppl),
+    }
@@ -0,0 +1,275 @@
+"""Read-only HTTP/JSON API over the dashboard analytics.
+
+Serves the same numbers as the Streamlit app from one in-memory copy of the
+dataset::
+
+    python -m observatory.api --data IPC_IPC_PHASE.csv --port 8080
+
+Every endpoint accepts the sidebar filters as query parameters —
+``regions`` (comma-separated), ``start`` and ``end`` (``YYYY-MM``) and
+``quality`` (``include``, ``downweight`` or ``exclude`` for analyses with
+unreported phases; ``/coverage`` shows how many that affects) — and
+returns an ETag derived from the dataset version and the filters, so
+clients revalidating with ``If-None-Match`` get a 304 without any work.
+
+``/similar?country=Sudan&k=5`` returns the nearest historical analogues of
+a country's latest four quarters from the persisted similarity index.
+
+``/releases`` lists every dataset build recorded in the snapshot store and
+``/diff?old=<version>&new=<version>`` returns the values that changed
+between two of them (``new`` defaults to the one being served).
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+
+import pandas as pd
+from aiohttp import web
+
+from observatory import analytics, backends, similarity, snapshots
+from observatory.analytics import DEFAULT_DATA_PATH
+from observatory.watcher import DatasetWatcher
+
+MAX_ROWS = 1000
+
+# Endpoint name -> function of the cached tables producing the response frame
+ENDPOINTS = {
+    "global-trend": lambda t, n: t["global_trend"],
+    "top-burden":   lambda t, n: t["burden_shares"].head(n)[["iso3","country","Region","date","crisis_plus_people","global_share"]],
+    "slopes":       lambda t, n: t["country_slopes"].sort_values("slope", ascending=False),
+    "volatility":   lambda t, n: t["volatility_stats"],
+    "coverage":     lambda t, n: t["coverage"],
+}
+
+
+def _parse_month(query, name, default):
+    """``query[name]`` as a Timestamp, ``default`` when absent; empty or unparseable values raise ValueError."""
+    if name not in query:
+        return default
+    try:
+        value = pd.Timestamp(query[name])
+    except ValueError:
+        value = pd.NaT
+    if value is pd.NaT:
+        raise ValueError(f"{name} must be a date such as 2024-06")
+    return value
+
+
+class DataModel:
+    """Query backend over the dataset plus an LRU of analytics tables per filter state."""
+
+    def __init__(self, path, backend="pandas", max_entries=128):
+        self.path = path
+        # Swaps in a rebuilt backend when the CSV changes; cache keys carry
+        # the version so entries for the previous build are never served
+        self.snapshots = snapshots.SnapshotStore()
+        self.watcher = DatasetWatcher(path, backend, on_load=lambda p, v: self.snapshots.ingest(p, v))
+        self.max_entries = max_entries
+        self._tables = OrderedDict()
+        self._inflight = {}
+        self._similarity = {}
+        self._meta = {}
+
+    @property
+    def backend(self):
+        return self.watcher.current
+
+    @property
+    def version(self):
+        return self.watcher.version
+
+    def meta(self):
+        backend = self.backend
+        if backend.version not in self._meta:
+            self._meta = {backend.version: backend.meta()}
+        return self._meta[backend.version]
+
+    @property
+    def regions(self):
+        return self.meta()["regions"]
+
+    @property
+    def min_date(self):
+        return self.meta()["min_date"]
+
+    @property
+    def max_date(self):
+        return self.meta()["max_date"]
+
+    def parse_filters(self, query):
+        regions = [r.strip() for r in query.get("regions", "").split(",") if r.strip()] or self.regions
+        unknown = sorted(set(regions) - set(self.regions))
+        if unknown:
+            raise ValueError(f"unknown regions: {', '.join(unknown)}")
+        start = _parse_month(query, "start", self.min_date)
+        end = _parse_month(query, "end", self.max_date)
+        if start > end:
+            raise ValueError("start must not be after end")
+        quality = query.get("quality", "include")
+        if quality not in analytics.QUALITY_MODES:
+            raise ValueError(f"quality must be one of {', '.join(analytics.QUALITY_MODES)}")
+        return tuple(sorted(regions)), start, end, quality
+
+    def etag(self, endpoint, filters, n):
+        digest = hashlib.sha1(repr((endpoint, filters, n)).encode()).hexdigest()[:12]
+        return f'"{self.version}-{digest}"'
+
+    async def tables(self, filters):
+        """Tables for ``filters``; concurrent misses for the same key share one computation."""
+        backend = self.backend
+        key = (backend.version, filters)
+        if key in self._tables:
+            self._tables.move_to_end(key)
+            return self._tables[key]
+        if key not in self._inflight:
+            loop = asyncio.get_running_loop()
+            self._inflight[key] = loop.run_in_executor(None, backend.tables, *filters)
+        try:
+            tables = await self._inflight[key]
+        finally:
+            self._inflight.pop(key, None)
+        self._tables[key] = tables
+        while len(self._tables) > self.max_entries:
+            self._tables.popitem(last=False)
+        return tables
+
+    async def similarity_index(self):
+        """The persisted similar-crises index, loaded (or built) off the event loop on first use."""
+        backend = self.backend
+        if backend.version not in self._similarity:
+            loop = asyncio.get_running_loop()
+            self._similarity = {backend.version: loop.run_in_executor(None, similarity.load_or_build, backend)}
+        return await self._similarity[backend.version]
+
+
+def _json_error(status, message):
+    return web.json_response({"error": message}, status=status)
+
+
+async def handle_version(request):
+    model = request.app["model"]
+    return web.json_response({
+        "version": model.version,
+        "regions": model.regions,
+        "min_date": model.min_date.strftime("%Y-%m"),
+        "max_date": model.max_date.strftime("%Y-%m"),
+    })
+
+
+async def handle_similar(request):
+    model = request.app["model"]
+    try:
+        country = request.query["country"]
+        k = int(request.query.get("k", 5))
+    except (KeyError, ValueError):
+        return _json_error(400, "'country' is required and 'k' must be an integer")
+    if k < 1:
+        return _json_error(400, "'k' must be at least 1")
+    try:
+        end = pd.Timestamp(request.query["end"]) if request.query.get("end") else None
+    except ValueError:
+        end = pd.NaT
+    if end is pd.NaT:
+        return _json_error(400, "'end' must be a date such as 2024-06")
+    etag = model.etag("similar", (country, end), k)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {t.strip() for t in request.headers.get("If-None-Match", "").split(",")}:
+        return web.Response(status=304, headers=headers)
+    try:
+        frame = (await model.similarity_index()).query(country, k=k, end=end)
+    except KeyError as exc:
+        return _json_error(404, exc.args[0])
+    body = '{"version": %s, "country": %s, "data": %s}' % (
+        json.dumps(model.version), json.dumps(country), frame.to_json(orient="records", date_format="iso"),
+    )
+    return web.Response(text=body, content_type="application/json", headers=headers)
+
+
+async def handle_releases(request):
+    releases = request.app["model"].snapshots.releases()
+    body = '{"data": %s}' % releases.drop(columns="source").to_json(orient="records", date_format="iso")
+    return web.Response(text=body, content_type="application/json")
+
+
+async def handle_diff(request):
+    model = request.app["model"]
+    old, new = request.query.get("old"), request.query.get("new", model.version)
+    if not old:
+        return _json_error(400, "'old' is required")
+    if not (analytics.is_dataset_version(old) and analytics.is_dataset_version(new)):
+        return _json_error(400, "'old' and 'new' must be dataset versions (12 hex digits)")
+    # Stored releases are immutable, so the pair alone identifies the response
+    etag = f'"diff-{old}-{new}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {t.strip() for t in request.headers.get("If-None-Match", "").split(",")}:
+        return web.Response(status=304, headers=headers)
+    loop = asyncio.get_running_loop()
+    try:
+        diff = await loop.run_in_executor(None, model.snapshots.diff, old, new)
+    except KeyError as exc:
+        return _json_error(404, exc.args[0])
+    body = '{"old": %s, "new": %s, "summary": %s, "data": %s}' % (
+        json.dumps(old), json.dumps(new),
+        snapshots.summarize_diff(diff).to_json(orient="records"),
+        diff.to_json(orient="records", date_format="iso"),
+    )
+    return web.Response(text=body, content_type="application/json", headers=headers)
+
+
+async def handle_endpoint(request):
+    model = request.app["model"]
+    endpoint = request.match_info["endpoint"]
+    if endpoint not in ENDPOINTS:
+        return _json_error(404, f"unknown endpoint: {endpoint}")
+    try:
+        filters = model.parse_filters(request.query)
+        n = int(request.query.get("n", 10))
+        if not 1 <= n <= MAX_ROWS:
+            raise ValueError(f"n must be between 1 and {MAX_ROWS}")
+    except ValueError as exc:
+        return _json_error(400, str(exc))
+
+    etag = model.etag(endpoint, filters, n)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in {t.strip() for t in request.headers.get("If-None-Match", "").split(",")}:
+        return web.Response(status=304, headers=headers)
+
+    frame = ENDPOINTS[endpoint](await model.tables(filters), n)
+    body = (
+        '{"version": %s, "filters": %s, "data": %s}' % (
+            json.dumps(model.version),
+            json.dumps({"regions": list(filters[0]),
+                        "start": filters[1].strftime("%Y-%m"), "end": filters[2].strftime("%Y-%m"),
+                        "quality": filters[3]}),
+            frame.to_json(orient="records", date_format="iso"),
+        )
+    )
+    return web.Response(text=body, content_type="application/json", headers=headers)
+
+
+def create_app(data_path=DEFAULT_DATA_PATH, backend="pandas"):
+    app = web.Application()
+    app["model"] = DataModel(data_path, backend=backend)
+    app.router.add_get("/version", handle_version)
+    app.router.add_get("/similar", handle_similar)
+    app.router.add_get("/releases", handle_releases)
+    app.router.add_get("/diff", handle_diff)
+    app.router.add_get("/{endpoint}", handle_endpoint)
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="path to IPC_IPC_PHASE.csv")
+    parser.add_argument("--backend", choices=backends.BACKENDS, default="pandas")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args(argv)
+    web.run_app(create_app(args.data, args.backend), host=args.host, port=args.port,
+                backlog=1024, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
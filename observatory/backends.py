@@ -0,0 +1,427 @@
+"""Query backends serving the small result frames the dashboard charts need.
+
+``PandasBackend`` (the default) keeps the wide frames in memory and runs the
+analytics in pandas/NumPy. ``SQLBackend`` registers the raw CSV (or Parquet)
+in an embedded engine — DuckDB when installed, otherwise SQLite with indexes —
+and pushes filters, groupbys, latest-snapshot and heatmap aggregations down
+as SQL, so a worker only ever holds per-chart results.
+
+Both expose the same methods and return frames shaped like
+:func:`observatory.analytics.compute_tables`.
+"""
+import csv
+import importlib.util
+import os
+import sqlite3
+import threading
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, concentration
+from observatory.perf import profiled
+
+BACKENDS = ("pandas", "duckdb", "sqlite")
+PHASES = (1, 2, 3, 4, 5)
+PHASE_PCT_COLUMNS = tuple(f"phase_{p}_pct" for p in PHASES)
+RAW_COLUMNS = ("REF_AREA", "REF_AREA_LABEL", "UNIT_MEASURE", "COMP_BREAKDOWN_2", "TIME_PERIOD", "OBS_VALUE", "OBS_STATUS")
+
+
+def create_backend(kind, path):
+    """Instantiate the backend named ``kind`` (one of :data:`BACKENDS`) over ``path``."""
+    if kind == "pandas":
+        return PandasBackend(path)
+    if kind in ("duckdb", "sqlite"):
+        return SQLBackend(path, engine=kind)
+    raise ValueError(f"Unknown backend {kind!r}; expected one of {', '.join(BACKENDS)}")
+
+
+def _heatmap_from_means(means, top_n):
+    """Keep the ``top_n`` rows of a country × period mean matrix by their row mean."""
+    row_mean = means.mean(axis=1).to_numpy()
+    top = analytics.top_k_desc(row_mean, top_n)
+    return means.iloc[top]
+
+
+class PandasBackend:
+    """In-memory wide frames plus precomputed period aggregates."""
+
+    name = "pandas"
+
+    def __init__(self, path):
+        self.path = path
+        self.version = analytics.dataset_version(path)
+        # Sorted by (iso3, date) so each country's rows are one contiguous
+        # slice, found through the row-range index instead of a mask
+        self.wide_people, self.wide_pct = (
+            frame.sort_values(["iso3", "date"], ignore_index=True) for frame in analytics.load_data(path)
+        )
+        self.country_rows = {
+            "pct": analytics.row_ranges(self.wide_pct["iso3"].to_numpy()),
+            "people": analytics.row_ranges(self.wide_people["iso3"].to_numpy()),
+        }
+        self.period_aggs = analytics.build_period_aggregates(self.wide_pct)
+        self.people_panel = concentration.build_people_panel(self.wide_people)
+
+    def meta(self):
+        return dict(
+            regions=sorted(self.wide_pct["Region"].unique()),
+            countries=sorted(self.wide_pct["country"].unique()),
+            iso3=dict(self.wide_pct.drop_duplicates("iso3").sort_values("country")[["iso3","country"]].to_numpy()),
+            min_date=self.wide_pct["date"].min(),
+            max_date=self.wide_pct["date"].max(),
+        )
+
+    @profiled
+    def tables(self, regions, start, end, quality="include"):
+        wp, wpl = analytics.filter_frames(self.wide_people, self.wide_pct, regions, start, end)
+        return analytics.compute_tables(wp, wpl, quality)
+
+    @profiled
+    def heatmap(self, regions, start, end, granularity="year", top_n=20):
+        return analytics.heatmap_matrix(self.period_aggs, regions, start, end,
+                                        granularity=granularity, top_n=top_n)
+
+    @profiled
+    def concentration(self, regions, start, end):
+        return concentration.concentration(self.people_panel, regions, start, end)
+
+    @profiled
+    def country_series(self, countries, regions, start, end):
+        wp = self.wide_pct
+        mask = (
+            wp["country"].isin(countries) & wp["Region"].isin(regions) &
+            (wp["date"] >= pd.Timestamp(start)) & (wp["date"] <= pd.Timestamp(end))
+        )
+        return wp.loc[mask, ["country","date","crisis_plus_pct"]]
+
+    @profiled
+    def crisis_series(self):
+        return self.wide_pct[["iso3","country","date","crisis_plus_pct"]]
+
+    @profiled
+    def country_profile(self, iso3):
+        """Full history of one country; raises KeyError for an unknown ``iso3``."""
+        if iso3 not in self.country_rows["pct"] and iso3 not in self.country_rows["people"]:
+            raise KeyError(iso3)
+        a, b = self.country_rows["pct"].get(iso3, (0, 0))
+        c, d = self.country_rows["people"].get(iso3, (0, 0))
+        return analytics.country_profile(self.wide_pct.iloc[a:b], self.wide_people.iloc[c:d])
+
+    @profiled
+    def phase_composition(self):
+        return self.wide_pct.reindex(columns=["iso3","country","Region","date", *PHASE_PCT_COLUMNS])
+
+
+class SQLBackend:
+    """Embedded SQL engine holding the observations; queries return only result frames."""
+
+    def __init__(self, path, engine="duckdb", database=":memory:"):
+        if engine == "duckdb" and importlib.util.find_spec("duckdb") is None:
+            raise ImportError("The duckdb backend requires the 'duckdb' package; use 'sqlite' instead")
+        self.path = path
+        self.name = engine
+        self.version = analytics.dataset_version(path)
+        self._lock = threading.Lock()
+        self._people_panel = None
+        if engine == "duckdb":
+            import duckdb
+            self._conn = duckdb.connect(database)
+        else:
+            self._conn = sqlite3.connect(database, check_same_thread=False)
+        self._register_raw(path)
+        self._build_model()
+
+    # ── loading ──────────────────────────────
+    @profiled
+    def _register_raw(self, path):
+        cols = ", ".join(RAW_COLUMNS)
+        is_parquet = os.path.splitext(path)[1].lower() == ".parquet"
+        if self.name == "duckdb":
+            reader = "read_parquet(?)" if is_parquet else "read_csv(?, header=true, all_varchar=true)"
+            self._conn.execute(f"CREATE TABLE raw AS SELECT {cols} FROM {reader}", [path])
+            return
+
+        self._conn.execute(f"CREATE TABLE raw ({', '.join(f'{c} TEXT' for c in RAW_COLUMNS)})")
+        insert = f"INSERT INTO raw VALUES ({', '.join('?' * len(RAW_COLUMNS))})"
+        if is_parquet:
+            rows = pd.read_parquet(path, columns=list(RAW_COLUMNS)).astype(str).itertuples(index=False)
+            self._conn.executemany(insert, rows)
+        else:
+            with open(path, newline="", encoding="utf-8") as f:
+                reader = csv.DictReader(f)
+                self._conn.executemany(insert, ([row.get(c, "") for c in RAW_COLUMNS] for row in reader))
+
+    @profiled
+    def _build_model(self):
+        self._conn.execute("CREATE TABLE region_map (country TEXT, Region TEXT)")
+        self._conn.executemany(
+            "INSERT INTO region_map VALUES (?, ?)",
+            [(c, "West Africa") for c in analytics.WEST_AFRICA] +
+            [(c, "East Africa") for c in analytics.EAST_AFRICA],
+        )
+        # Same cleaning as analytics.load_data: monthly dates, phase digit. Rows
+        # without a value stay until the pivot so their status reaches obs_flags
+        self._conn.execute(f"""
+            CREATE TABLE obs AS
+            SELECT r.REF_AREA AS iso3,
+                   r.REF_AREA_LABEL AS country,
+                   COALESCE(m.Region, 'Other') AS Region,
+                   r.TIME_PERIOD || '-01' AS date,
+                   CAST(substr(r.COMP_BREAKDOWN_2, instr(r.COMP_BREAKDOWN_2, 'PHASE') + 5, 1) AS INTEGER) AS phase,
+                   r.UNIT_MEASURE AS unit,
+                   CAST(NULLIF(r.OBS_VALUE, '') AS DOUBLE) AS value,
+                   COALESCE(NULLIF(r.OBS_STATUS, ''), '{analytics.NORMAL_STATUS}') AS status
+            FROM raw r LEFT JOIN region_map m ON m.country = r.REF_AREA_LABEL
+            WHERE r.TIME_PERIOD LIKE '____-__'
+              AND instr(r.COMP_BREAKDOWN_2, 'PHASE') > 0
+        """)
+        self._conn.execute("DROP TABLE raw")
+
+        # Bit of each phase reported as a normal value; distinct bits sum to their OR
+        phase_bit = "CASE phase " + " ".join(f"WHEN {p} THEN {1 << (p - 1)}" for p in PHASES) + " END"
+        reported = (f"SUM(DISTINCT CASE WHEN status = '{analytics.NORMAL_STATUS}' AND value IS NOT NULL "
+                    f"THEN {phase_bit} ELSE 0 END)")
+        for unit, suffix, agg in (("PT", "pct", "AVG"), ("PS", "people", "SUM")):
+            phases = ",\n".join(
+                f"{agg}(CASE WHEN phase = {p} THEN value END) AS phase_{p}_{suffix}" for p in PHASES
+            )
+            self._conn.execute(f"""
+                CREATE TABLE wide_{suffix}_base AS
+                SELECT iso3, country, Region, date, {phases},
+                       {analytics.ALL_PHASES_MASK} - {reported} AS obs_flags
+                FROM obs WHERE unit = '{unit}'
+                GROUP BY iso3, country, Region, date
+                HAVING COUNT(value) > 0
+            """)
+        # Stored in (iso3, date) order so each country is one contiguous rowid range
+        self._conn.execute("""
+            CREATE TABLE wide_pct AS
+            SELECT *,
+                   CASE WHEN crisis_plus_pct > 0
+                        THEN (COALESCE(phase_4_pct, 0) + COALESCE(phase_5_pct, 0)) / crisis_plus_pct
+                   END AS severe_share
+            FROM (SELECT *, COALESCE(phase_3_pct, 0) + COALESCE(phase_4_pct, 0) + COALESCE(phase_5_pct, 0)
+                            AS crisis_plus_pct
+                  FROM wide_pct_base) t
+            ORDER BY iso3, date
+        """)
+        self._conn.execute("""
+            CREATE TABLE wide_people AS
+            SELECT *, COALESCE(phase_3_people, 0) + COALESCE(phase_4_people, 0) + COALESCE(phase_5_people, 0)
+                      AS crisis_plus_people
+            FROM wide_people_base
+            ORDER BY iso3, date
+        """)
+        self._conn.execute("DROP TABLE wide_pct_base")
+        self._conn.execute("DROP TABLE wide_people_base")
+        self._conn.execute("DROP TABLE obs")
+        if self.name == "sqlite":
+            for table in ("wide_pct", "wide_people"):
+                self._conn.execute(f"CREATE INDEX idx_{table}_region_date ON {table} (Region, date)")
+                self._conn.execute(f"CREATE INDEX idx_{table}_country_date ON {table} (country, date)")
+            self._conn.commit()
+        self.country_rows = {
+            suffix: {row.iso3: (int(row.start), int(row.stop)) for row in self._query(f"""
+                SELECT iso3, MIN(rowid) AS start, MAX(rowid) + 1 AS stop FROM wide_{suffix} GROUP BY iso3
+            """).itertuples()}
+            for suffix in ("pct", "people")
+        }
+
+    # ── querying ─────────────────────────────
+    def _query(self, sql, params=()):
+        params = list(params)
+        if self.name == "duckdb":
+            df = self._conn.cursor().execute(sql, params).df()
+        else:
+            with self._lock:
+                df = pd.read_sql_query(sql, self._conn, params=params)
+        if "date" in df.columns:
+            df["date"] = pd.to_datetime(df["date"])
+        # SQLite returns all-NULL columns as object None rather than NaN
+        for col in df.columns[df.columns.str.startswith("phase_")]:
+            df[col] = pd.to_numeric(df[col])
+        return df
+
+    @staticmethod
+    def _where(regions, start, end):
+        regions = list(regions)
+        clause = (f"Region IN ({', '.join('?' * len(regions))}) AND date BETWEEN ? AND ?"
+                  if regions else "1 = 0 AND date BETWEEN ? AND ?")
+        return clause, [*regions, pd.Timestamp(start).strftime("%Y-%m-%d"),
+                        pd.Timestamp(end).strftime("%Y-%m-%d")]
+
+    def meta(self):
+        bounds = self._query("SELECT MIN(date) AS min_date, MAX(date) AS max_date FROM wide_pct")
+        return dict(
+            regions=self._query("SELECT DISTINCT Region FROM wide_pct ORDER BY Region")["Region"].tolist(),
+            countries=self._query("SELECT DISTINCT country FROM wide_pct ORDER BY country")["country"].tolist(),
+            iso3=dict(self._query(
+                "SELECT iso3, MIN(country) AS country FROM wide_pct GROUP BY iso3 ORDER BY country"
+            ).to_numpy()),
+            min_date=pd.Timestamp(bounds["min_date"].iloc[0]),
+            max_date=pd.Timestamp(bounds["max_date"].iloc[0]),
+        )
+
+    @staticmethod
+    def _weight(quality):
+        """SQL expression for :func:`analytics.quality_weights` over a row's ``obs_flags``."""
+        if quality == "include":
+            return "1.0"
+        if quality == "downweight":
+            unreported = " + ".join(f"((obs_flags >> {i}) & 1)" for i in range(len(PHASES)))
+            return f"(1.0 - ({unreported}) / {float(len(PHASES))})"
+        if quality == "exclude":
+            return f"(CASE WHEN (obs_flags & {analytics.CORE_PHASES_MASK}) = 0 THEN 1.0 ELSE 0.0 END)"
+        raise ValueError(f"Unknown quality mode {quality!r}; expected one of {', '.join(analytics.QUALITY_MODES)}")
+
+    def _latest(self, table, where, params, weight="1.0"):
+        df = self._query(f"""
+            SELECT * FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY country ORDER BY date DESC) AS rn
+                FROM {table} WHERE {where} AND {weight} > 0
+            ) t WHERE rn = 1 ORDER BY country
+        """, params)
+        return df.drop(columns="rn").reset_index(drop=True)
+
+    @profiled
+    def tables(self, regions, start, end, quality="include"):
+        where, params = self._where(regions, start, end)
+        weight = self._weight(quality)
+        # Every aggregate below is a weighted one over this filtered view
+        pct = f"(SELECT *, {weight} AS w FROM wide_pct WHERE {where})"
+
+        trend = self._query(f"""
+            SELECT date, SUM(w * crisis_plus_pct) / SUM(w) AS crisis_plus_pct
+            FROM {pct} f GROUP BY date HAVING SUM(w) > 0 ORDER BY date
+        """, params)
+        trend["roll"] = trend["crisis_plus_pct"].rolling(3, min_periods=1).mean()
+
+        latest_pct = self._latest("wide_pct", where, params, weight)
+        latest_ppl = self._latest("wide_people", where, params, weight)
+
+        depth = self._query(f"""
+            SELECT country, SUM(w * severe_share) / SUM(CASE WHEN severe_share IS NOT NULL THEN w END) AS severe_share
+            FROM {pct} f GROUP BY country
+            HAVING SUM(CASE WHEN severe_share IS NOT NULL THEN w END) > 0
+            ORDER BY severe_share DESC, country
+        """, params)
+
+        reg_summary = self._query(f"""
+            SELECT Region, date, SUM(w * crisis_plus_pct) / SUM(w) AS crisis_plus_pct
+            FROM {pct} f GROUP BY Region, date HAVING SUM(w) > 0 ORDER BY Region, date
+        """, params)
+
+        # Weighted OLS slope against the observation index, finished from sufficient statistics
+        moments = self._query(f"""
+            SELECT country, MIN(Region) AS region, SUM(CASE WHEN w > 0 THEN 1 ELSE 0 END) AS n,
+                   SUM(w) AS sw, SUM(w * x) AS sx, SUM(w * y) AS sy, SUM(w * x * x) AS sxx, SUM(w * x * y) AS sxy
+            FROM (SELECT country, Region, w, crisis_plus_pct AS y,
+                         ROW_NUMBER() OVER (PARTITION BY country ORDER BY date) - 1 AS x
+                  FROM {pct} f) t
+            GROUP BY country HAVING SUM(CASE WHEN w > 0 THEN 1 ELSE 0 END) > 6 ORDER BY country
+        """, params)
+        moments["slope"] = ((moments["sw"] * moments["sxy"] - moments["sx"] * moments["sy"])
+                            / (moments["sw"] * moments["sxx"] - moments["sx"] ** 2))
+        slopes = moments[["country","slope","region"]]
+
+        vol = self._query(f"""
+            WITH f AS (SELECT country, Region, w, crisis_plus_pct AS y FROM {pct} p),
+                 m AS (SELECT country, MIN(Region) AS Region, SUM(w * y) / NULLIF(SUM(w), 0) AS mean,
+                              SUM(w) AS sw, SUM(w * w) AS sww
+                       FROM f GROUP BY country)
+            SELECT m.country, m.mean, m.sw, m.sww, m.Region,
+                   SUM(f.w * (f.y - m.mean) * (f.y - m.mean)) AS ss
+            FROM f JOIN m ON m.country = f.country
+            GROUP BY m.country, m.mean, m.sw, m.sww, m.Region ORDER BY m.country
+        """, params)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vol["std"] = np.sqrt(vol["ss"] / (vol["sw"] - vol["sww"] / vol["sw"]))
+        stats = vol[["country","mean","std","Region"]].replace([np.inf, -np.inf], np.nan).dropna()
+
+        unreported = " + ".join(f"((obs_flags >> {i}) & 1)" for i in range(len(PHASES)))
+        coverage = pd.concat([self._query(f"""
+            SELECT '{suffix}' AS frame, COUNT(*) AS analyses,
+                   COALESCE(SUM(CASE WHEN w > 0 THEN 1 ELSE 0 END), 0) AS used,
+                   COALESCE(SUM(w), 0.0) AS weight,
+                   COALESCE(SUM(CASE WHEN (obs_flags & {analytics.CORE_PHASES_MASK}) = 0 THEN 1 ELSE 0 END), 0) AS complete,
+                   1.0 - AVG({unreported}) / {float(len(PHASES))} AS reported
+            FROM (SELECT *, {weight} AS w FROM wide_{suffix} WHERE {where}) f
+        """, params) for suffix in ("pct", "people")], ignore_index=True)
+
+        return {
+            "global_trend": trend,
+            "latest_pct": latest_pct,
+            "latest_people": latest_ppl,
+            "burden_shares": analytics.burden_shares(latest_ppl),
+            "crisis_depth": depth,
+            "regional_summary": reg_summary,
+            "country_slopes": slopes.reset_index(drop=True),
+            "volatility_stats": stats.reset_index(drop=True),
+            "coverage": coverage,
+        }
+
+    @profiled
+    def heatmap(self, regions, start, end, granularity="year", top_n=20):
+        where, params = self._where(regions, start, end)
+        if granularity == "year":
+            period = "substr(date, 1, 4)"
+        else:
+            month = "CAST(substr(date, 6, 2) AS INTEGER)"
+            period = (f"substr(date, 1, 4) || '-Q' || CASE WHEN {month} <= 3 THEN '1' WHEN {month} <= 6 THEN '2' "
+                      f"WHEN {month} <= 9 THEN '3' ELSE '4' END")
+        long = self._query(f"""
+            SELECT country, {period} AS period, AVG(crisis_plus_pct) AS crisis_plus_pct
+            FROM wide_pct WHERE {where} GROUP BY country, period
+        """, params)
+        if long.empty:
+            return pd.DataFrame(dtype=float)
+        means = long.pivot(index="country", columns="period", values="crisis_plus_pct").sort_index(axis=1)
+        means.columns.name = granularity
+        return _heatmap_from_means(means, top_n)
+
+    @profiled
+    def concentration(self, regions, start, end):
+        # The dense country × month panel is tiny next to the observations,
+        # so it is pulled out of the engine once and reused for every filter
+        if self._people_panel is None:
+            self._people_panel = concentration.build_people_panel(self._query(
+                "SELECT country, Region, date, crisis_plus_people FROM wide_people"
+            ))
+        return concentration.concentration(self._people_panel, regions, start, end)
+
+    @profiled
+    def country_series(self, countries, regions, start, end):
+        countries = list(countries)
+        if not countries:
+            return pd.DataFrame(columns=["country","date","crisis_plus_pct"])
+        where, params = self._where(regions, start, end)
+        return self._query(f"""
+            SELECT country, date, crisis_plus_pct FROM wide_pct
+            WHERE {where} AND country IN ({', '.join('?' * len(countries))})
+            ORDER BY country, date
+        """, [*params, *countries])
+
+    @profiled
+    def crisis_series(self):
+        return self._query("SELECT iso3, country, date, crisis_plus_pct FROM wide_pct ORDER BY iso3, date")
+
+    @profiled
+    def country_profile(self, iso3):
+        """Full history of one country, read as its rowid range; KeyError for an unknown ``iso3``."""
+        if iso3 not in self.country_rows["pct"] and iso3 not in self.country_rows["people"]:
+            raise KeyError(iso3)
+        frames = []
+        for suffix in ("pct", "people"):
+            start, stop = self.country_rows[suffix].get(iso3, (0, 0))
+            frames.append(self._query(
+                f"SELECT * FROM wide_{suffix} WHERE rowid >= ? AND rowid < ? ORDER BY rowid", [start, stop]
+            ))
+        return analytics.country_profile(*frames)
+
+    @profiled
+    def phase_composition(self):
+        return self._query(f"""
+            SELECT iso3, country, Region, date, {', '.join(PHASE_PCT_COLUMNS)}
+            FROM wide_pct ORDER BY iso3, date
+        """)
@@ -0,0 +1,217 @@
+"""Streamlit-cached entry points into the query backends.
+
+They live in an importable module rather than in app.py so the dashboard
+script and the pre-warm hook in ``observatory.serve`` share cache entries.
+
+Data-dependent functions take the dataset ``version`` served by the
+watcher as an argument, so when a new CSV is swapped in every cache key
+changes and no session is served a stale parse. They query the build that
+serves that version, never whatever is current when the cache misses.
+"""
+import os
+
+import streamlit as st
+
+from observatory import analytics, clustering, comovement, datasets, earlywarning, markov, regions, similarity, snapshots
+from observatory.analytics import DEFAULT_DATA_PATH
+from observatory.downsample import MAX_POINTS, downsample_frame
+from observatory.figure_cache import FigureCache
+from observatory.perf import tracked_cache
+from observatory.watcher import DatasetWatcher
+
+# "pandas" (default) keeps the wide frames in memory; "duckdb" / "sqlite"
+# push filters and aggregations down to an embedded SQL engine instead
+DATA_BACKEND = os.environ.get("OBSERVATORY_BACKEND", "pandas")
+
+# Directory scanned for Data360 indicator CSVs (IPC_IPC_PHASE and any others)
+DATA_DIR = os.environ.get("OBSERVATORY_DATA_DIR", os.path.dirname(DEFAULT_DATA_PATH))
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_figure_cache():
+    # One LRU of built go.Figure objects per server process; every session and page
+    # reads the same objects, so they are treated as read-only once cached
+    return FigureCache(maxsize=128)
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_snapshot_store():
+    return snapshots.SnapshotStore()
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_region_store():
+    return regions.RegionStore()
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_watcher(file, kind):
+    # One watched dataset per server process, shared read-only by all sessions;
+    # every build it serves is also recorded as a release in the snapshot store
+    store = get_snapshot_store()
+    return DatasetWatcher(file, kind, on_load=lambda path, version: store.ingest(path, version))
+
+
+def get_backend(file, kind, version=None):
+    """The backend of the newest build of ``file``, or of the build serving ``version``.
+
+    Cached functions pass their ``version`` argument, so an entry stored under
+    a version always holds that build's data even if a swap lands mid-rerun.
+    """
+    watcher = get_watcher(file, kind)
+    if version is None:
+        return watcher.current
+    backend = watcher.backend(version)
+    if backend.version != version:
+        raise LookupError(f"{os.path.basename(file)} build {backend.version} was returned for version {version}")
+    return backend
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_catalog(data_dir):
+    # Indicators are parsed on first use and then stay in memory per content
+    # version, so joining a newly selected pair never re-reads the others and a
+    # swapped-in release is re-parsed on its next use
+    return datasets.Catalog(data_dir)
+
+
+@tracked_cache(st.cache_data(show_spinner=False))
+def load_meta(file, kind, version):
+    return get_backend(file, kind, version).meta()
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def compute_analytics(file, kind, version, regions, start, end, quality="include"):
+    # Everything downstream of the filters, cached per filter state so that
+    # reruns and exports reuse the same tables instead of recomputing them
+    return get_backend(file, kind, version).tables(regions, start, end, quality)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def compute_heatmap(file, kind, version, regions, start, end, granularity, top_n):
+    return get_backend(file, kind, version).heatmap(regions, start, end, granularity=granularity, top_n=top_n)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def compute_concentration(file, kind, version, regions, start, end):
+    return get_backend(file, kind, version).concentration(regions, start, end)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def load_chart_series(file, kind, version, regions, start, end, max_points, quality="include"):
+    # Downsampled trend series for the line charts, cached per filter state
+    # so LTTB only runs when the filters or the point budget change
+    tables = compute_analytics(file, kind, version, regions, start, end, quality)
+    return {
+        "global_trend": downsample_frame(tables["global_trend"], "date", "crisis_plus_pct", max_points),
+        "regional_summary": downsample_frame(tables["regional_summary"], "date", "crisis_plus_pct",
+                                             max_points, by="Region"),
+    }
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def load_country_series(file, kind, version, countries, regions, start, end, max_points=None):
+    series = get_backend(file, kind, version).country_series(countries, regions, start, end)
+    if max_points is not None:
+        series = downsample_frame(series, "date", "crisis_plus_pct", max_points, by="country")
+    return series
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=256))
+def load_country_profile(file, kind, version, iso3):
+    # A row-range lookup in the backend, so a deep link costs the same on any dataset size
+    return get_backend(file, kind, version).country_profile(iso3)
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_period_aggregates(file, kind, version):
+    # The pandas backend already holds these for the heatmap; SQL backends build them once per version
+    backend = get_backend(file, kind, version)
+    aggs = getattr(backend, "period_aggs", None)
+    if aggs is None:
+        series = backend.crisis_series()
+        aggs = analytics.build_period_aggregates(series.assign(Region=series["country"].map(analytics.assign_region)))
+    return aggs
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def compute_custom_regions(file, kind, version, groups, start, end):
+    # ``groups`` is a tuple of (name, member countries) pairs; only the aggregation reruns when it changes
+    return analytics.custom_region_summary(get_period_aggregates(file, kind, version), dict(groups), start, end)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=32))
+def compute_clusters(file, kind, version, method, k):
+    # Clusters span the whole dataset, so only ``version`` keys the cache
+    traj = clustering.build_trajectories(get_backend(file, kind, version).phase_composition())
+    return clustering.cluster_trajectories(traj, k=k, method=method)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=16))
+def compute_comovement(file, kind, version, mode, min_periods):
+    # The full matrix spans every country; region filters only slice it for display
+    composition = get_backend(file, kind, version).phase_composition()
+    return comovement.comovement(composition, mode=mode, min_periods=min_periods)
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_similarity_index(file, kind, version):
+    # Loaded from (or persisted to) the on-disk cache once per dataset version
+    return similarity.load_or_build(get_backend(file, kind, version))
+
+
+@tracked_cache(st.cache_data(show_spinner=False))
+def fit_transitions(file, kind, version):
+    # Transition matrices span the whole dataset, so only ``version`` keys the cache
+    backend = get_backend(file, kind, version)
+    meta = load_meta(file, kind, version)
+    latest = compute_analytics(file, kind, version, tuple(meta["regions"]),
+                               meta["min_date"].to_pydatetime(), meta["max_date"].to_pydatetime())["latest_people"]
+    traj = clustering.build_trajectories(backend.phase_composition())
+    return markov.fit_transition_model(traj, markov.analysed_population(latest))
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=128))
+def simulate_transitions(file, kind, version, unit, horizon, shock, n_paths=markov.N_PATHS):
+    model = fit_transitions(file, kind, version)[unit]
+    paths = markov.simulate(model["matrix"], model["start"], horizon=horizon, n_paths=n_paths, shock=shock)
+    return markov.summarize_paths(paths, model["as_of"], model["population"])
+
+
+@tracked_cache(st.cache_resource(show_spinner=False))
+def get_early_warning(file, kind, version):
+    # Components for every country × month; weights and filters only re-score them
+    return earlywarning.build(get_backend(file, kind, version))
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=64))
+def compute_watchlist(file, kind, version, weights, month, k, regions):
+    return get_early_warning(file, kind, version).watchlist(month, k=k, weights=dict(weights), regions=regions)
+
+
+@tracked_cache(st.cache_data(show_spinner=False, max_entries=16))
+def compute_release_diff(old, new):
+    # Stored releases never change, so their ids alone key the cache
+    diff = get_snapshot_store().diff(old, new)
+    return {"diff": diff, "summary": snapshots.summarize_diff(diff)}
+
+
+def default_filter_key(file, kind):
+    """Cache arguments produced by the sidebar widgets at their default values."""
+    version = get_backend(file, kind).version
+    meta = load_meta(file, kind, version)
+    return (file, kind, version, tuple(meta["regions"]),
+            meta["min_date"].to_pydatetime(), meta["max_date"].to_pydatetime())
+
+
+def prewarm(file=DEFAULT_DATA_PATH, kind=DATA_BACKEND):
+    """Populate the caches a first session with default filters will hit."""
+    key = default_filter_key(file, kind)
+    compute_analytics(*key)
+    load_chart_series(*key, MAX_POINTS)
+    compute_heatmap(*key, "year", 20)
+    version = key[2]
+    compute_clusters(file, kind, version, clustering.METHODS[0], 4)
+    get_similarity_index(file, kind, version)
+    fit_transitions(file, kind, version)
+    get_early_warning(file, kind, version)
@@ -0,0 +1,202 @@
+"""Clustering countries (or admin units) by their Phase 1–5 composition trajectories.
+
+IPC analyses are irregular — a handful per unit, at different months — so
+each unit's phase shares are first regularized onto a common quarterly grid
+by linear interpolation in time (held flat before the first and after the
+last analysis). Units are then clustered either with k-means on the
+flattened trajectories, which scales linearly and stays in the seconds for
+thousands of units, or hierarchically on dynamic-time-warping distances,
+which tolerates crises that follow the same path a few quarters apart but
+is quadratic in the number of units.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from observatory.perf import profiled
+
+PHASE_COLUMNS = tuple(f"phase_{p}_pct" for p in range(1, 6))
+METHODS = ("kmeans", "dtw")
+
+
+@dataclass(frozen=True)
+class Trajectories:
+    """Phase-share trajectories on a common grid: ``values[unit, period, phase]`` sums to 1.
+
+    ``observed[unit, period]`` is False where the value was held flat beyond
+    the unit's first or last analysis rather than interpolated between two.
+    """
+    iso3: np.ndarray
+    units: np.ndarray
+    regions: np.ndarray
+    periods: pd.DatetimeIndex
+    values: np.ndarray
+    observed: np.ndarray
+
+
+@profiled
+def build_trajectories(composition, freq="QS"):
+    """Regularize a long (iso3, country, Region, date, phase_*_pct) frame onto a ``freq`` grid."""
+    comp = composition.dropna(subset=["date"]).copy()
+    shares = comp.reindex(columns=list(PHASE_COLUMNS)).to_numpy(dtype=float)
+    # Missing phase 4/5 entries mean nobody was classified there
+    shares = np.nan_to_num(shares)
+    totals = shares.sum(axis=1)
+    keep = totals > 0
+    comp, shares = comp[keep], shares[keep] / totals[keep, None]
+
+    units, u_idx = np.unique(comp["country"].to_numpy(), return_inverse=True)
+    first = comp.drop_duplicates("country").set_index("country").reindex(units)
+    periods = pd.date_range(comp["date"].min().to_period("Q").to_timestamp(), comp["date"].max(), freq=freq)
+
+    # Time in days since the grid start, offset per unit so one sorted key
+    # array holds every unit's observations back to back
+    t_obs = (comp["date"].to_numpy() - periods[0].to_datetime64()) / np.timedelta64(1, "D")
+    span = float(max(t_obs.max(), 0) + (periods[-1] - periods[0]).days + 2)
+    key = u_idx * span + t_obs
+    order = np.argsort(key, kind="stable")
+    key, shares, u_sorted = key[order], shares[order], u_idx[order]
+    lo = np.searchsorted(u_sorted, np.arange(len(units)), side="left")
+    hi = np.searchsorted(u_sorted, np.arange(len(units)), side="right") - 1
+
+    t_grid = ((periods - periods[0]) / pd.Timedelta(days=1)).to_numpy()
+    query = np.arange(len(units))[:, None] * span + t_grid[None, :]
+    right = np.clip(np.searchsorted(key, query, side="left"), lo[:, None], hi[:, None])
+    left = np.clip(right - 1, lo[:, None], hi[:, None])
+    # Points outside a unit's observed span hold its nearest analysis
+    left = np.where((key[right] < query) | (key[left] > query), right, left)
+    gap = key[right] - key[left]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        w = np.where(gap > 0, (query - key[left]) / gap, 0.0)
+    values = shares[left] * (1 - w[..., None]) + shares[right] * w[..., None]
+    # Grid points up to one period before the first analysis still count
+    # as observed, so an analysis in a quarter's second month covers it
+    step = t_grid[1] - t_grid[0] if len(t_grid) > 1 else 0
+    observed = (query > key[lo][:, None] - step) & (query <= key[hi][:, None])
+
+    return Trajectories(first["iso3"].to_numpy(), units, first["Region"].to_numpy(), periods,
+                        values.astype(np.float32), observed)
+
+
+def _sq_norms(flat):
+    return np.einsum("ij,ij->i", flat, flat)
+
+
+@profiled
+def euclidean_distances_blocked(flat, block=1024):
+    """Pairwise Euclidean distances, computed ``block`` rows at a time via ||a||² + ||b||² − 2ab."""
+    n = len(flat)
+    norms = _sq_norms(flat)
+    out = np.empty((n, n), dtype=np.float32)
+    for a in range(0, n, block):
+        b = min(a + block, n)
+        d2 = norms[a:b, None] + norms[None, :] - 2.0 * (flat[a:b] @ flat.T)
+        np.sqrt(np.maximum(d2, 0), out=out[a:b])
+    np.fill_diagonal(out, 0)
+    return out
+
+
+@profiled
+def dtw_distances_blocked(values, window=2, block=64):
+    """Pairwise DTW distances between multivariate trajectories with a Sakoe–Chiba band.
+
+    Pairs are processed ``block`` rows against all later rows at a time, with
+    the dynamic programme vectorized across the pairs in the block.
+    """
+    n, T, _ = values.shape
+    out = np.zeros((n, n), dtype=np.float32)
+    for a in range(0, n, block):
+        b = min(a + block, n)
+        left, right = values[a:b, None], values[None, a:]
+        # Only the previous row of the cost matrix is needed at any time
+        prev = np.full((b - a, n - a, T + 1), np.inf, dtype=np.float32)
+        prev[:, :, 0] = 0
+        for i in range(1, T + 1):
+            cur = np.full_like(prev, np.inf)
+            for j in range(max(1, i - window), min(T, i + window) + 1):
+                cost = np.sqrt(((left[:, :, i - 1] - right[:, :, j - 1]) ** 2).sum(axis=-1))
+                cur[:, :, j] = cost + np.minimum(np.minimum(prev[:, :, j], cur[:, :, j - 1]), prev[:, :, j - 1])
+            prev = cur
+        out[a:b, a:] = prev[:, :, T]
+    upper = np.triu(out)
+    return upper + upper.T
+
+
+def _silhouette(labels, X=None, distances=None, sample_size=2000):
+    from sklearn.metrics import silhouette_score
+
+    if len(np.unique(labels)) < 2 or len(labels) <= len(np.unique(labels)):
+        return float("nan")
+    if distances is None:
+        # Score a fixed random sample so the n × n matrix stays bounded
+        idx = np.arange(len(X))
+        if len(idx) > sample_size:
+            idx = np.sort(np.random.default_rng(0).choice(idx, sample_size, replace=False))
+        distances, labels = euclidean_distances_blocked(X[idx]), labels[idx]
+        if len(np.unique(labels)) < 2:
+            return float("nan")
+    return float(silhouette_score(distances, labels, metric="precomputed"))
+
+
+@profiled
+def cluster_trajectories(traj, k=4, method="kmeans", window=2):
+    """Cluster ``traj`` into ``k`` groups.
+
+    Returns a dict of plain frames (so it can be cached) — ``members`` with
+    each unit's cluster, ``profiles`` with the mean phase shares per cluster
+    and period — plus the silhouette score. Clusters are numbered from the
+    mildest (lowest mean Phase 3+ share) to the most severe.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown clustering method {method!r}; expected one of {', '.join(METHODS)}")
+    n = len(traj.units)
+    k = max(1, min(k, n))
+    flat = traj.values.reshape(n, -1)
+
+    if method == "kmeans":
+        from sklearn.cluster import KMeans
+
+        labels = KMeans(n_clusters=k, n_init=10, random_state=0).fit_predict(flat)
+        silhouette = _silhouette(labels, X=flat)
+        distances = None
+    else:
+        from sklearn.cluster import AgglomerativeClustering
+
+        distances = dtw_distances_blocked(traj.values, window=window)
+        labels = (AgglomerativeClustering(n_clusters=k, metric="precomputed", linkage="average")
+                  .fit_predict(distances) if k > 1 else np.zeros(n, dtype=int))
+        silhouette = _silhouette(labels, distances=distances)
+
+    # Mean trajectory per cluster via one scatter-add, then renumber by severity
+    counts = np.bincount(labels, minlength=k).astype(float)
+    sums = np.zeros((k,) + traj.values.shape[1:])
+    np.add.at(sums, labels, traj.values)
+    centres = sums / counts[:, None, None]
+    severity = centres[:, :, 2:].sum(axis=2).mean(axis=1)
+    rank = np.empty(k, dtype=int)
+    rank[np.argsort(severity, kind="stable")] = np.arange(k)
+    labels, centres = rank[labels], centres[np.argsort(severity, kind="stable")]
+
+    # How typical each unit is of its cluster: distance to the centre for
+    # k-means, mean DTW distance to the other members otherwise
+    if distances is None:
+        to_centre = np.linalg.norm(flat - centres[labels].reshape(n, -1), axis=1)
+    else:
+        same = labels[:, None] == labels[None, :]
+        to_centre = np.where(same, distances, 0).sum(axis=1) / np.maximum(same.sum(axis=1) - 1, 1)
+
+    members = pd.DataFrame({
+        "iso3": traj.iso3, "country": traj.units, "Region": traj.regions,
+        "cluster": labels + 1, "distance": to_centre,
+        "mean_crisis_plus_pct": traj.values[:, :, 2:].sum(axis=2).mean(axis=1) * 100,
+    }).sort_values(["cluster", "distance"], ignore_index=True)
+
+    profiles = pd.DataFrame(
+        centres.reshape(-1, len(PHASE_COLUMNS)) * 100, columns=list(PHASE_COLUMNS)
+    )
+    profiles.insert(0, "date", np.tile(traj.periods.to_numpy(), k))
+    profiles.insert(0, "cluster", np.repeat(np.arange(1, k + 1), len(traj.periods)))
+    profiles["crisis_plus_pct"] = profiles[["phase_3_pct", "phase_4_pct", "phase_5_pct"]].sum(axis=1)
+
+    return dict(members=members, profiles=profiles, silhouette=silhouette, method=method, k=k)
@@ -0,0 +1,117 @@
+"""Which countries' Phase 3+ shares move together: pairwise-complete correlations.
+
+Each country's Phase 3+ share is placed on a common monthly grid by
+:func:`observatory.clustering.build_trajectories`. Months outside a country's
+first and last analysis are masked out rather than filled. Every pair is
+correlated over only the months both countries cover.
+
+With ``X`` zero-filled where masked and ``M`` the 0/1 mask, every sum the
+Pearson formula needs for every pair in a block — counts, sums, sums of
+squares and cross-products over the shared months — is a matrix product of
+``X``, ``X²`` and ``M``. The full matrix is therefore built ``block`` rows
+at a time with a handful of BLAS calls, in memory linear in the block size.
+"""
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, clustering
+from observatory.perf import profiled
+
+MODES = ("levels", "changes")
+MIN_PERIODS = 24
+
+
+@profiled
+def monthly_series(composition, mode="levels"):
+    """``(traj, X, mask)``: Phase 3+ % per country × month, or its month-on-month change."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown mode {mode!r}; expected one of {', '.join(MODES)}")
+    traj = clustering.build_trajectories(composition, freq="MS")
+    X = traj.values[:, :, 2:].sum(axis=2).astype(np.float64) * 100
+    mask = traj.observed.copy()
+    if mode == "changes":
+        X, mask = np.diff(X, axis=1), mask[:, 1:] & mask[:, :-1]
+    return traj, X, mask
+
+
+@profiled
+def pairwise_corr(X, mask, min_periods=MIN_PERIODS, block=512):
+    """Pearson correlation of every pair of rows over their jointly unmasked columns.
+
+    Returns ``(corr, overlap)``: float32 correlations (NaN where fewer than
+    ``min_periods`` shared columns or a constant series) and the number of
+    shared columns per pair.
+    """
+    n = len(X)
+    M = mask.astype(np.float64)
+    # Centre each row on its own mean first so the one-pass sums stay well conditioned
+    centre = np.where(mask, X, 0.0).sum(axis=1, keepdims=True) / np.maximum(M.sum(axis=1, keepdims=True), 1)
+    Z = np.where(mask, X - centre, 0.0)
+    Z2 = Z * Z
+
+    corr = np.empty((n, n), dtype=np.float32)
+    overlap = np.empty((n, n), dtype=np.int32)
+    for a in range(0, n, block):
+        b = min(a + block, n)
+        cnt = M[a:b] @ M.T
+        sx, sy = Z[a:b] @ M.T, M[a:b] @ Z.T
+        sxx, syy = Z2[a:b] @ M.T, M[a:b] @ Z2.T
+        sxy = Z[a:b] @ Z.T
+        with np.errstate(invalid="ignore", divide="ignore"):
+            cov = sxy - sx * sy / cnt
+            var = (sxx - sx * sx / cnt) * (syy - sy * sy / cnt)
+            r = cov / np.sqrt(var)
+        r[(cnt < min_periods) | ~(var > 1e-12)] = np.nan
+        corr[a:b] = np.clip(r, -1, 1)
+        overlap[a:b] = cnt
+    return corr, overlap
+
+
+def leaf_order(corr):
+    """Row order placing strongly correlated countries next to each other (average linkage on 1 − r)."""
+    from scipy.cluster.hierarchy import leaves_list, linkage
+    from scipy.spatial.distance import squareform
+
+    if len(corr) < 3:
+        return np.arange(len(corr))
+    # Pairs without enough overlap count as uncorrelated
+    dist = 1 - np.nan_to_num(corr.astype(np.float64), nan=0.0)
+    np.fill_diagonal(dist, 0)
+    return leaves_list(linkage(squareform(np.clip(dist, 0, 2), checks=False), method="average"))
+
+
+@profiled
+def comovement(composition, mode="levels", min_periods=MIN_PERIODS):
+    """Correlation matrix of monthly Phase 3+ series across all countries.
+
+    Returns a dict of plain frames (so it can be cached): ``matrix`` and
+    ``overlap`` (countries × countries, in clustered order) and ``countries``
+    with each one's iso3 and Region in that order.
+    """
+    traj, X, mask = monthly_series(composition, mode)
+    corr, overlap = pairwise_corr(X, mask, min_periods=min_periods)
+    np.fill_diagonal(corr, 1.0)
+    order = leaf_order(corr)
+    units = traj.units[order]
+    return dict(
+        matrix=pd.DataFrame(corr[np.ix_(order, order)], index=units, columns=units),
+        overlap=pd.DataFrame(overlap[np.ix_(order, order)], index=units, columns=units),
+        countries=pd.DataFrame({"iso3": traj.iso3[order], "country": units, "Region": traj.regions[order]}),
+        mode=mode, min_periods=min_periods,
+    )
+
+
+def strongest_pairs(result, regions=None, k=20):
+    """The ``k`` most positively correlated distinct pairs, optionally among ``regions`` only."""
+    countries = result["countries"]
+    keep = np.flatnonzero(countries["Region"].isin(regions)) if regions is not None else np.arange(len(countries))
+    corr = result["matrix"].to_numpy()[np.ix_(keep, keep)]
+    i, j = np.triu_indices(len(keep), k=1)
+    values = corr[i, j].astype(np.float64)
+    top = analytics.top_k_desc(values, k)
+    a, b = keep[i[top]], keep[j[top]]
+    return pd.DataFrame({
+        "country_a": countries["country"].to_numpy()[a], "region_a": countries["Region"].to_numpy()[a],
+        "country_b": countries["country"].to_numpy()[b], "region_b": countries["Region"].to_numpy()[b],
+        "correlation": values[top], "months": result["overlap"].to_numpy()[a, b],
+    })
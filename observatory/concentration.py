@@ -0,0 +1,115 @@
+"""How concentrated the Phase 3+ population is across countries, month by month.
+
+Phase 3+ people are laid out as a dense country × month array once per
+dataset. For a region subset and date range, each month holds every
+country's latest analysis as of that month (the same rule as the latest
+snapshot behind the KPI cards), and a single column-wise sort plus cumulative
+sum yields the Gini coefficient, Herfindahl–Hirschman index, top-k shares
+and Lorenz curve of every month at once.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from observatory.perf import profiled
+
+TOP_K = (5, 10)
+
+
+@dataclass(frozen=True)
+class PeoplePanel:
+    """Phase 3+ people per country (rows) and calendar month (columns), NaN when not analysed."""
+    countries: np.ndarray
+    regions: np.ndarray
+    months: pd.DatetimeIndex
+    values: np.ndarray
+
+
+@profiled
+def build_people_panel(wide_people, value="crisis_plus_people"):
+    valid = wide_people[["country","Region","date",value]].dropna(subset=["date", value])
+    countries, c_idx = np.unique(valid["country"].to_numpy(), return_inverse=True)
+    regions = valid.drop_duplicates("country").set_index("country")["Region"].reindex(countries).to_numpy()
+    months = pd.date_range(valid["date"].min().to_period("M").to_timestamp(),
+                           valid["date"].max(), freq="MS")
+    m_idx = (valid["date"].dt.year.to_numpy() - months[0].year) * 12 + valid["date"].dt.month.to_numpy() - months[0].month
+
+    values = np.zeros((len(countries), len(months)))
+    seen = np.zeros(values.shape, dtype=bool)
+    np.add.at(values, (c_idx, m_idx), valid[value].to_numpy(dtype=float))
+    seen[c_idx, m_idx] = True
+    values[~seen] = np.nan
+    return PeoplePanel(countries, regions, months, values)
+
+
+def asof_fill(values):
+    """Carry each row's last non-NaN value forward along the columns."""
+    cols = np.where(~np.isnan(values), np.arange(values.shape[1]), -1)
+    np.maximum.accumulate(cols, axis=1, out=cols)
+    out = np.take_along_axis(values, np.maximum(cols, 0), axis=1)
+    out[cols < 0] = np.nan
+    return out
+
+
+@profiled
+def concentration(panel, regions, start, end, top_k=TOP_K):
+    """Monthly concentration metrics and Lorenz curves for ``regions`` within [start, end].
+
+    Returns ``{"metrics": ..., "lorenz": ...}``: one row per month with the
+    number of countries, total Phase 3+ people, Gini, HHI, the effective
+    number of countries (1 / HHI) and ``top{k}_share`` percentages; and the
+    Lorenz curve points (cumulative share of countries vs of people, both %)
+    of every month in long form.
+    """
+    rows = np.flatnonzero(np.isin(panel.regions, list(regions)))
+    m0 = panel.months.searchsorted(pd.Timestamp(start), side="left")
+    m1 = panel.months.searchsorted(pd.Timestamp(end), side="right")
+    empty = dict(
+        metrics=pd.DataFrame(columns=["date", "countries", "total_people", "gini", "hhi",
+                                      "effective_countries", *(f"top{k}_share" for k in top_k)]),
+        lorenz=pd.DataFrame(columns=["date", "country_share", "people_share"]),
+    )
+    if m1 <= m0 or len(rows) == 0:
+        return empty
+
+    # Analyses before the filter start never carry into it
+    X = asof_fill(panel.values[rows, m0:m1])
+    n = (~np.isnan(X)).sum(axis=0)
+    # One ascending sort per month; NaN (not yet analysed) sorts last and adds nothing
+    Z = np.nan_to_num(np.sort(X, axis=0))
+    N, M = Z.shape
+    C = np.zeros((N + 1, M))
+    np.cumsum(Z, axis=0, out=C[1:])
+    total = C[-1]
+    keep = (n > 0) & (total > 0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        rank = np.arange(1, N + 1)[:, None]
+        gini = 2 * (rank * Z).sum(axis=0) / (n * total) - (n + 1) / n
+        hhi = ((Z / total) ** 2).sum(axis=0)
+        metrics = {
+            "date": panel.months[m0:m1],
+            "countries": n,
+            "total_people": total,
+            "gini": gini,
+            "hhi": hhi,
+            "effective_countries": 1 / hhi,
+        }
+        cols = np.arange(M)
+        for k in top_k:
+            metrics[f"top{k}_share"] = (total - C[np.maximum(n - k, 0), cols]) / total * 100
+    metrics = pd.DataFrame(metrics)[keep].reset_index(drop=True)
+
+    # Lorenz points j = 0..n of each kept month, read straight off the cumsum
+    j = np.arange(N + 1)[:, None]
+    valid = (j <= n) & keep
+    jj, mm = np.nonzero(valid)
+    order = np.lexsort((jj, mm))
+    jj, mm = jj[order], mm[order]
+    lorenz = pd.DataFrame({
+        "date": panel.months[m0:m1][mm],
+        "country_share": jj / n[mm] * 100,
+        "people_share": C[jj, mm] / total[mm] * 100,
+    })
+    return dict(metrics=metrics, lorenz=lorenz)
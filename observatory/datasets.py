@@ -0,0 +1,273 @@
+"""Registry of Data360 indicator schemas and a lazily loaded catalog of indicators.
+
+Every World Bank Data360 CSV shares one long layout (REF_AREA, TIME_PERIOD,
+OBS_VALUE plus breakdown dimensions), so a schema only has to say which
+dimensions split an indicator into separate series and how to aggregate
+duplicates. :data:`SCHEMAS` holds the known indicators; anything else falls
+back to :func:`generic_schema`.
+
+A :class:`Catalog` scans a directory for Data360 files by reading their
+first data row only. The first request for an indicator parses its file
+into a wide frame, one row per (iso3, month) and one column per series.
+That frame is written to a Parquet file in the columnar cache and reused by
+later processes until the file's contents change.
+
+Rows carry an int64 key packing iso3 and month and are kept sorted by it,
+so joining indicators is a vectorized sorted merge on integers
+(:func:`merge_sorted`) rather than a hash join on strings and timestamps.
+"""
+import csv
+import glob
+import os
+import threading
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics
+from observatory.perf import profiled
+
+# Breakdown dimensions that may distinguish series within one indicator file
+DIMENSIONS = ("UNIT_MEASURE", "SEX", "AGE", "URBANISATION",
+              "COMP_BREAKDOWN_1", "COMP_BREAKDOWN_2", "COMP_BREAKDOWN_3")
+MONTH_BITS = 20
+
+
+@dataclass(frozen=True)
+class DatasetSchema:
+    """How to turn one Data360 indicator's long rows into named series."""
+    indicator: str
+    label: str
+    # Dimensions whose codes, joined with ".", name each series; None = the ones that vary
+    series_columns: tuple = None
+    # Prefix dropped from dimension codes in series names (e.g. "IPC_IPC_")
+    strip_prefix: str = ""
+    aggfunc: str = "mean"
+    # Extra series defined as the sum of existing ones, e.g. Phase 3+
+    derived: dict = field(default_factory=dict)
+
+
+SCHEMAS = {}
+
+
+def register(schema):
+    """Add ``schema`` to the registry (replacing one for the same indicator)."""
+    SCHEMAS[schema.indicator] = schema
+    return schema
+
+
+def generic_schema(indicator, label=None):
+    return DatasetSchema(indicator=indicator, label=label or indicator)
+
+
+register(DatasetSchema(
+    indicator="IPC_IPC_PHASE",
+    label="People in each phase of food insecurity classification",
+    series_columns=("UNIT_MEASURE", "COMP_BREAKDOWN_2"),
+    strip_prefix="IPC_IPC_",
+    derived={
+        "PT.PHASE3PLUS": ("PT.PHASE3", "PT.PHASE4", "PT.PHASE5"),
+        "PS.PHASE3PLUS": ("PS.PHASE3", "PS.PHASE4", "PS.PHASE5"),
+    },
+))
+
+
+# ─────────────────────────────────────────────
+# INTEGER (iso3, month) KEYS
+# ─────────────────────────────────────────────
+def iso3_codes(iso3):
+    """Base-26 integer for each three-letter ISO code — stable across datasets, no vocabulary."""
+    letters = np.frombuffer(
+        "".join(s.upper().ljust(3)[:3] for s in iso3).encode("ascii"), dtype=np.uint8
+    ).reshape(-1, 3).astype(np.int64) - ord("A")
+    return (letters[:, 0] * 26 + letters[:, 1]) * 26 + letters[:, 2]
+
+
+def month_index(dates):
+    dates = pd.DatetimeIndex(dates)
+    return dates.year.to_numpy().astype(np.int64) * 12 + dates.month.to_numpy() - 1
+
+
+def make_keys(iso3, dates):
+    return (iso3_codes(iso3) << MONTH_BITS) | month_index(dates)
+
+
+def merge_sorted(left, right, how="inner"):
+    """Row positions pairing two sorted, unique int64 key arrays.
+
+    ``how="inner"`` returns ``(left_pos, right_pos)`` for equal keys;
+    ``how="asof"`` pairs every left row with the latest right row of the same
+    country at or before its month (right_pos is -1 where there is none),
+    which lines annual indicators up with monthly ones. An empty ``right``
+    pairs nothing: ``inner`` returns empty positions and ``asof`` all -1.
+    """
+    if how not in ("inner", "asof"):
+        raise ValueError(f"Unknown join {how!r}; expected 'inner' or 'asof'")
+    if len(right) == 0:
+        if how == "inner":
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        return np.arange(len(left)), np.full(len(left), -1, dtype=np.intp)
+    pos = np.searchsorted(right, left, side="right") - 1
+    clipped = np.maximum(pos, 0)
+    if how == "inner":
+        hit = (pos >= 0) & (right[clipped] == left)
+        return np.flatnonzero(hit), pos[hit]
+    same_country = (pos >= 0) & ((right[clipped] >> MONTH_BITS) == (left >> MONTH_BITS))
+    return np.arange(len(left)), np.where(same_country, pos, -1)
+
+
+# ─────────────────────────────────────────────
+# PARSING
+# ─────────────────────────────────────────────
+def sniff_indicator(path):
+    """(indicator code, label) from the first data row of a Data360 CSV, or None."""
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            row = next(csv.DictReader(f), None)
+    except (OSError, UnicodeDecodeError, csv.Error):
+        return None
+    if not row or not {"INDICATOR", "REF_AREA", "TIME_PERIOD", "OBS_VALUE"} <= row.keys():
+        return None
+    return row["INDICATOR"], row.get("INDICATOR_LABEL") or row["INDICATOR"]
+
+
+def _parse_periods(periods):
+    periods = periods.astype(str)
+    # Annual periods ("2023") are placed in January so they key like months
+    periods = periods.where(periods.str.len() != 4, periods + "-01")
+    return pd.to_datetime(periods.str[:7], format="%Y-%m", errors="coerce")
+
+
+@profiled
+def read_indicator(path, schema):
+    """Parse a Data360 CSV into a wide frame sorted by its (iso3, month) key."""
+    raw = pd.read_csv(path, dtype=str, keep_default_na=False)
+    raw = raw[raw["INDICATOR"] == schema.indicator]
+    raw = raw.assign(
+        date=_parse_periods(raw["TIME_PERIOD"]),
+        value=pd.to_numeric(raw["OBS_VALUE"].replace("", np.nan), errors="coerce"),
+    ).dropna(subset=["date", "value"])
+
+    dims = schema.series_columns or tuple(
+        d for d in DIMENSIONS if d in raw.columns and raw[d].nunique() > 1
+    )
+    if dims:
+        series = raw[list(dims)].apply(lambda c: c.str.removeprefix(schema.strip_prefix)).agg(".".join, axis=1)
+    else:
+        series = pd.Series("value", index=raw.index)
+
+    wide = (
+        raw.assign(series=series)
+        .pivot_table(index=["REF_AREA", "REF_AREA_LABEL", "date"], columns="series",
+                     values="value", aggfunc=schema.aggfunc)
+        .reset_index()
+        .rename(columns={"REF_AREA": "iso3", "REF_AREA_LABEL": "country"})
+    )
+    wide.columns.name = None
+    for name, parts in schema.derived.items():
+        present = [p for p in parts if p in wide.columns]
+        if present:
+            wide[name] = wide[present].sum(axis=1, min_count=1)
+
+    wide.insert(0, "key", make_keys(wide["iso3"], wide["date"]))
+    return wide.sort_values("key", ignore_index=True)
+
+
+# ─────────────────────────────────────────────
+# CATALOG
+# ─────────────────────────────────────────────
+@dataclass(frozen=True)
+class CatalogEntry:
+    indicator: str
+    label: str
+    path: str
+    schema: DatasetSchema
+
+
+class Catalog:
+    """Indicators available under ``data_dir``, loaded on first use through the columnar cache."""
+
+    def __init__(self, data_dir, cache_path=None):
+        self.data_dir = data_dir
+        self.cache_path = cache_path or os.path.join(analytics.cache_dir(), "columnar")
+        os.makedirs(self.cache_path, exist_ok=True)
+        self.entries = {}
+        for path in sorted(glob.glob(os.path.join(data_dir, "*.csv"))):
+            found = sniff_indicator(path)
+            if found and found[0] not in self.entries:
+                indicator, label = found
+                schema = SCHEMAS.get(indicator) or generic_schema(indicator, label)
+                self.entries[indicator] = CatalogEntry(indicator, schema.label, path, schema)
+        self._frames = {}
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def indicators(self):
+        return list(self.entries)
+
+    def _version(self, entry):
+        # Re-hash only when the file's mtime or size moved, so a swapped-in release is picked up cheaply
+        st = os.stat(entry.path)
+        stat = (st.st_mtime_ns, st.st_size)
+        cached = self._versions.get(entry.path)
+        if cached is None or cached[0] != stat:
+            cached = self._versions[entry.path] = (stat, analytics.dataset_version(entry.path))
+        return cached[1]
+
+    @profiled
+    def load(self, indicator):
+        """Wide frame of the current contents of ``indicator``: in memory, else from Parquet, else parsed from CSV."""
+        with self._lock:
+            entry = self.entries[indicator]
+            version = self._version(entry)
+            key = (indicator, version)
+            if key in self._frames:
+                return self._frames[key]
+            cache_file = os.path.join(self.cache_path, f"{indicator}-{version}.parquet")
+            try:
+                frame = pd.read_parquet(cache_file)
+            except (OSError, ValueError):
+                frame = read_indicator(entry.path, entry.schema)
+                analytics.write_atomic(cache_file, lambda tmp: frame.to_parquet(tmp, index=False))
+            # Only the newest build of each indicator stays in memory
+            self._frames = {k: v for k, v in self._frames.items() if k[0] != indicator}
+            self._frames[key] = frame
+            return frame
+
+    def series(self):
+        """Every ``(indicator, series)`` pair in the catalog (loads each indicator)."""
+        return [(ind, col) for ind in self.entries for col in self.load(ind).columns
+                if col not in ("key", "iso3", "country", "date")]
+
+    @profiled
+    def join(self, columns, how="inner"):
+        """One frame with ``columns`` — ``(indicator, series)`` pairs — aligned on (iso3, date).
+
+        The first pair's indicator provides the rows; the others are matched
+        to it with :func:`merge_sorted`.
+        """
+        base_ind = columns[0][0]
+        base = self.load(base_ind)
+        out = base[["iso3", "country", "date"]].copy()
+        rows = np.arange(len(base))
+        by_indicator = {}
+        for ind, col in columns:
+            by_indicator.setdefault(ind, []).append(col)
+
+        for ind, cols in by_indicator.items():
+            frame = self.load(ind)
+            if ind == base_ind:
+                values = {c: frame[c].to_numpy()[rows] for c in cols}
+            else:
+                left_pos, right_pos = merge_sorted(base["key"].to_numpy()[rows], frame["key"].to_numpy(), how)
+                if how == "inner":
+                    rows, out = rows[left_pos], out.iloc[left_pos].reset_index(drop=True)
+                values = {}
+                for c in cols:
+                    # A trailing NaN is what unmatched rows (-1) pick up, even from an empty frame
+                    src = np.append(frame[c].to_numpy(dtype=float), np.nan)
+                    values[c] = src[right_pos]
+            for c, v in values.items():
+                out[f"{ind}.{c}"] = v
+        return out
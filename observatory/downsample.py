@@ -0,0 +1,87 @@
+"""Server-side downsampling and WebGL switching for long time-series charts.
+
+Line charts send every point to the browser, so at admin-unit granularity
+with monthly or daily dates a single trend chart can run to megabytes of
+SVG paths. Series longer than a threshold are reduced with
+Largest-Triangle-Three-Buckets (LTTB), which keeps peaks and troughs, and
+are drawn with ``Scattergl`` so render time stays flat as the data grows.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from observatory.perf import profiled
+
+# Points per trace above which a series is downsampled with LTTB
+MAX_POINTS = int(os.environ.get("OBSERVATORY_MAX_POINTS", 2000))
+# Points per chart (all traces together) above which WebGL is used instead of SVG
+WEBGL_POINTS = int(os.environ.get("OBSERVATORY_WEBGL_POINTS", 1000))
+
+
+def _as_float(values):
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype("datetime64[ns]").astype(np.int64).astype(float)
+    return values.astype(float)
+
+
+def lttb_indices(x, y, n_out):
+    """Positions of the ``n_out`` points LTTB keeps from the series (x, y).
+
+    ``x`` must be sorted. The first and last points are always kept; NaN
+    values in ``y`` are treated as zero when scoring triangles.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = _as_float(x)
+    y = np.nan_to_num(_as_float(y))
+
+    # Bucket edges over the interior points; bucket i spans [edges[i], edges[i+1])
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    # Average of each bucket, used as the third vertex for the previous bucket
+    csx, csy = np.concatenate([[0], np.cumsum(x)]), np.concatenate([[0], np.cumsum(y)])
+    counts = np.diff(edges)
+    avg_x = (csx[edges[1:]] - csx[edges[:-1]]) / counts
+    avg_y = (csy[edges[1:]] - csy[edges[:-1]]) / counts
+    avg_x = np.append(avg_x[1:], x[-1])
+    avg_y = np.append(avg_y[1:], y[-1])
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        ax, ay = x[a], y[a]
+        area = np.abs((ax - avg_x[i]) * (y[lo:hi] - ay) - (ax - x[lo:hi]) * (avg_y[i] - ay))
+        a = lo + int(np.argmax(area))
+        keep[i + 1] = a
+    return keep
+
+
+@profiled
+def downsample_frame(df, x, y, max_points=MAX_POINTS, by=None):
+    """Reduce ``df`` to at most ``max_points`` rows per group, chosen by LTTB on (x, y).
+
+    All other columns follow the selected rows, so derived series such as a
+    rolling mean stay aligned with the primary one.
+    """
+    if by is None:
+        df = df.sort_values(x)
+        if len(df) <= max_points:
+            return df.reset_index(drop=True)
+        return df.iloc[lttb_indices(df[x].values, df[y].values, max_points)].reset_index(drop=True)
+    parts = [downsample_frame.__wrapped__(g, x, y, max_points) for _, g in df.groupby(by, sort=False)]
+    return pd.concat(parts, ignore_index=True) if parts else df.iloc[:0]
+
+
+def scatter_trace(n_points, threshold=WEBGL_POINTS):
+    """``go.Scattergl`` for charts with more than ``threshold`` points, ``go.Scatter`` otherwise."""
+    return go.Scattergl if n_points > threshold else go.Scatter
+
+
+def render_mode(n_points, threshold=WEBGL_POINTS):
+    """``render_mode`` for a plotly.express line chart with ``n_points`` points in total."""
+    return "webgl" if n_points > threshold else "svg"
@@ -0,0 +1,303 @@
+"""Composite early-warning score for every country and month, and its top-k watchlist.
+
+Four components describe each country at each month, computed from the
+analyses available up to that month:
+
+* ``level``: the latest Phase 3+ share (%)
+* ``depth``: the latest Phase 4–5 share of the Phase 3+ population (%)
+* ``slope``: the OLS trend of Phase 3+ over the trailing window (points/year)
+* ``volatility``: the standard deviation of Phase 3+ over the same window
+
+Each component is standardised across the countries analysed that month.
+The score is their weighted mean. All windows come from cumulative sums
+along the month axis, so every country and month is computed in one
+vectorized pass. A watchlist is the top-k of one month's scores, found
+with an argpartition.
+
+:meth:`EarlyWarning.update` takes new or revised analyses, and
+:meth:`EarlyWarning.sync` also drops withdrawn ones. Either recomputes only
+the months from the earliest one touched. Appending a new month
+therefore costs one column, not a rebuild::
+
+    python -m observatory.earlywarning --k 10
+    python -m observatory.earlywarning --all-months --weights level=1,slope=2 --csv
+    python -m observatory.earlywarning --state ew.pkl --data new_release.csv
+"""
+import argparse
+import os
+import pickle
+import sys
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, backends
+from observatory.analytics import DEFAULT_DATA_PATH
+from observatory.concentration import asof_fill
+from observatory.perf import profiled
+
+COMPONENTS = ("level", "depth", "slope", "volatility")
+DEFAULT_WEIGHTS = {"level": 0.4, "depth": 0.25, "slope": 0.25, "volatility": 0.1}
+WINDOW = 12
+
+
+def parse_weights(text):
+    """``"level=1,slope=2"`` → weights dict (unnamed components get 0)."""
+    weights = dict.fromkeys(COMPONENTS, 0.0)
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        name, _, value = part.partition("=")
+        if name not in weights:
+            raise ValueError(f"Unknown component {name!r}; expected one of {', '.join(COMPONENTS)}")
+        weights[name] = float(value)
+    return weights
+
+
+def _rolling_sums(values, window):
+    """Trailing-window sums along axis 1 of ``values`` (NaN counts as 0)."""
+    c = np.zeros((values.shape[0], values.shape[1] + 1))
+    np.cumsum(np.nan_to_num(values), axis=1, out=c[:, 1:])
+    lo = np.maximum(np.arange(1, values.shape[1] + 1) - window, 0)
+    return c[:, 1:] - c[:, lo]
+
+
+class EarlyWarning:
+    """Country × month early-warning components, kept up to date as analyses arrive."""
+
+    def __init__(self, window=WINDOW):
+        self.window = window
+        self.countries = np.array([], dtype=object)
+        self.regions = np.array([], dtype=object)
+        self.months = pd.DatetimeIndex([])
+        n = (0, 0)
+        self.raw = {"level": np.empty(n), "depth": np.empty(n)}
+        self.components = {c: np.empty(n) for c in COMPONENTS}
+
+    # ── ingesting ────────────────────────────
+    def _grow(self, countries, regions, first, last):
+        """Add rows for unseen countries and month columns to cover [first, last].
+
+        Returns the column of the first month that had no column before.
+        """
+        new = ~np.isin(countries, self.countries)
+        if new.any():
+            add, idx = np.unique(countries[new], return_index=True)
+            self.countries = np.concatenate([self.countries, add])
+            self.regions = np.concatenate([self.regions, regions[new][idx]])
+        start = min(first, self.months[0]) if len(self.months) else first
+        end = max(last, self.months[-1]) if len(self.months) else last
+        months = pd.date_range(start, end, freq="MS")
+        shift = months.get_loc(self.months[0]) if len(self.months) else 0
+        first_new = 0 if shift else len(self.months)
+        for store in (self.raw, self.components):
+            for key, arr in store.items():
+                out = np.full((len(self.countries), len(months)), np.nan)
+                out[:arr.shape[0], shift:shift + arr.shape[1]] = arr
+                store[key] = out
+        self.months = months
+        return first_new
+
+    @profiled
+    def update(self, frame):
+        """Add or revise analyses and recompute the months they affect.
+
+        ``frame`` has ``country``, ``Region``, ``date``, ``crisis_plus_pct``
+        and ``severe_share`` (a 0–1 fraction) columns. Returns the number of
+        month columns recomputed.
+        """
+        frame = frame.dropna(subset=["date", "crisis_plus_pct"])
+        if frame.empty:
+            return 0
+        dates = pd.DatetimeIndex(frame["date"]).to_period("M").to_timestamp()
+        first_new = self._grow(frame["country"].to_numpy(), frame["Region"].to_numpy(), dates.min(), dates.max())
+
+        rows, cols = self._cells(frame)
+        self.raw["level"][rows, cols] = frame["crisis_plus_pct"].to_numpy(dtype=float)
+        self.raw["depth"][rows, cols] = frame["severe_share"].to_numpy(dtype=float) * 100
+        # Months added without analyses of their own still need their carried-forward values
+        start = min(int(cols.min()), first_new)
+        self._recompute(start)
+        return len(self.months) - start
+
+    def _recompute(self, start):
+        """Refill and recompute every component for month columns ``start`` onward."""
+        lo = max(start - self.window + 1, 0)
+        # Carry the last analysis forward; analyses before ``lo`` enter via column lo - 1
+        seed = self.components["level"][:, lo - 1:lo] if lo else np.full((len(self.countries), 0), np.nan)
+        seed_d = self.components["depth"][:, lo - 1:lo] if lo else seed
+        level = asof_fill(np.concatenate([seed, self.raw["level"][:, lo:]], axis=1))[:, seed.shape[1]:]
+        depth = asof_fill(np.concatenate([seed_d, self.raw["depth"][:, lo:]], axis=1))[:, seed_d.shape[1]:]
+
+        # Trailing-window OLS and variance of the filled level from masked cumulative sums
+        seen = ~np.isnan(level)
+        t = np.where(seen, np.arange(lo, len(self.months), dtype=float), np.nan)
+        w = self.window
+        n = _rolling_sums(seen.astype(float), w)
+        st, sy = _rolling_sums(t, w), _rolling_sums(level, w)
+        stt, sty, syy = _rolling_sums(t * t, w), _rolling_sums(t * level, w), _rolling_sums(level * level, w)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            slope = (n * sty - st * sy) / (n * stt - st * st) * 12
+            var = (syy - sy * sy / n) / (n - 1)
+        slope[n < 2] = np.nan
+        volatility = np.sqrt(np.maximum(var, 0))
+        volatility[n < 2] = np.nan
+
+        keep = start - lo
+        for key, arr in (("level", level), ("depth", depth), ("slope", slope), ("volatility", volatility)):
+            self.components[key][:, start:] = arr[:, keep:]
+
+    # ── scoring ──────────────────────────────
+    @profiled
+    def scores(self, weights=None):
+        """``(score, contributions)`` for every country × month.
+
+        Components are z-scored across the countries analysed each month; a
+        missing slope or volatility (too few months) contributes 0.
+        """
+        weights = {**dict.fromkeys(COMPONENTS, 0.0), **(weights or DEFAULT_WEIGHTS)}
+        total = sum(abs(v) for v in weights.values()) or 1.0
+        analysed = ~np.isnan(self.components["level"])
+        contributions = {}
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for key in COMPONENTS:
+                x = np.where(analysed, self.components[key], np.nan)
+                valid = ~np.isnan(x)
+                count = valid.sum(axis=0)
+                mean = np.where(valid, x, 0).sum(axis=0) / count
+                std = np.sqrt(np.where(valid, (x - mean) ** 2, 0).sum(axis=0) / count)
+                z = np.where(std > 0, (x - mean) / std, 0.0)
+                contributions[key] = np.where(analysed, np.nan_to_num(z) * weights[key] / total, np.nan)
+        return sum(contributions.values()), contributions
+
+    def watchlist(self, month=None, k=10, weights=None, regions=None):
+        """Top ``k`` countries by score at ``month`` (default: the latest), highest first."""
+        if not len(self.months):
+            return pd.DataFrame(columns=["rank", "country", "Region", "score", *COMPONENTS])
+        col = len(self.months) - 1 if month is None else self.months.searchsorted(
+            pd.Timestamp(month).to_period("M").to_timestamp(), side="right") - 1
+        col = int(np.clip(col, 0, len(self.months) - 1))
+        score, contributions = self.scores(weights)
+        column = score[:, col].copy()
+        if regions is not None:
+            column[~np.isin(self.regions, list(regions))] = np.nan
+        top = analytics.top_k_desc(column, k)
+        out = pd.DataFrame({
+            "rank": np.arange(1, len(top) + 1),
+            "month": self.months[col],
+            "country": self.countries[top],
+            "Region": self.regions[top],
+            "score": column[top],
+            **{key: self.components[key][top, col] for key in COMPONENTS},
+            **{f"{key}_contribution": contributions[key][top, col] for key in COMPONENTS},
+        })
+        return out
+
+    def history(self, countries, weights=None):
+        """Long frame of the score over time for ``countries``."""
+        score, _ = self.scores(weights)
+        rows = pd.Index(self.countries).get_indexer(list(countries))
+        rows = rows[rows >= 0]
+        return pd.DataFrame({
+            "country": np.repeat(self.countries[rows], len(self.months)),
+            "date": np.tile(self.months, len(rows)),
+            "score": score[rows].ravel(),
+        }).dropna()
+
+    def changed_rows(self, frame):
+        """Rows of ``frame`` that are new or differ from what this model has ingested."""
+        frame = frame.dropna(subset=["date", "crisis_plus_pct"])
+        rows, cols = self._cells(frame)
+        known = (rows >= 0) & (cols >= 0)
+        level = np.full(len(frame), np.nan)
+        depth = np.full(len(frame), np.nan)
+        level[known] = self.raw["level"][rows[known], cols[known]]
+        depth[known] = self.raw["depth"][rows[known], cols[known]]
+        new_depth = frame["severe_share"].to_numpy(dtype=float) * 100
+        same = (level == frame["crisis_plus_pct"].to_numpy(dtype=float)) & (
+            (depth == new_depth) | (np.isnan(depth) & np.isnan(new_depth)))
+        return frame[~same]
+
+    def _cells(self, frame):
+        dates = pd.DatetimeIndex(frame["date"]).to_period("M").to_timestamp()
+        return pd.Index(self.countries).get_indexer(frame["country"]), self.months.get_indexer(dates)
+
+    @profiled
+    def sync(self, frame):
+        """Bring the model in line with ``frame``, a full release: add, revise and drop analyses.
+
+        Returns ``(changed rows, months recomputed)``.
+        """
+        frame = frame.dropna(subset=["date", "crisis_plus_pct"])
+        rows, cols = self._cells(frame)
+        present = np.zeros(self.raw["level"].shape, dtype=bool)
+        known = (rows >= 0) & (cols >= 0)
+        present[rows[known], cols[known]] = True
+        dropped = ~np.isnan(self.raw["level"]) & ~present
+        start = len(self.months)
+        if dropped.any():
+            self.raw["level"][dropped] = np.nan
+            self.raw["depth"][dropped] = np.nan
+            start = int(np.flatnonzero(dropped.any(axis=0))[0])
+        changed = self.changed_rows(frame)
+        recomputed = self.update(changed)
+        if start < len(self.months) - recomputed:
+            self._recompute(start)
+            recomputed = len(self.months) - start
+        return len(changed) + int(dropped.sum()), recomputed
+
+
+def composition_frame(backend):
+    """The score inputs from a backend's per-analysis phase shares."""
+    comp = backend.phase_composition()
+    crisis = comp[["phase_3_pct", "phase_4_pct", "phase_5_pct"]].fillna(0).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        severe = (comp["phase_4_pct"].fillna(0) + comp["phase_5_pct"].fillna(0)) / crisis
+    return comp.assign(crisis_plus_pct=crisis, severe_share=severe.where(crisis > 0))
+
+
+@profiled
+def build(backend, window=WINDOW):
+    model = EarlyWarning(window)
+    model.update(composition_frame(backend))
+    return model
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="path to IPC_IPC_PHASE.csv")
+    parser.add_argument("--backend", choices=backends.BACKENDS, default="pandas")
+    parser.add_argument("--k", type=int, default=10, help="countries per watchlist")
+    parser.add_argument("--month", help="YYYY-MM (default: latest)")
+    parser.add_argument("--all-months", action="store_true", help="one watchlist per month")
+    parser.add_argument("--weights", help="e.g. level=0.4,depth=0.25,slope=0.25,volatility=0.1")
+    parser.add_argument("--window", type=int, default=WINDOW, help="trailing months for slope and volatility")
+    parser.add_argument("--state", help="pickle to resume from and save to; only new or revised analyses are recomputed")
+    parser.add_argument("--csv", action="store_true", help="write CSV instead of a text table")
+    args = parser.parse_args(argv)
+    weights = parse_weights(args.weights) if args.weights else None
+
+    frame = composition_frame(backends.create_backend(args.backend, args.data))
+    if args.state and os.path.exists(args.state):
+        with open(args.state, "rb") as f:
+            model = pickle.load(f)
+        changed, recomputed = model.sync(frame)
+        print(f"{changed} new, revised or withdrawn analyses; {recomputed} of {len(model.months)} months recomputed",
+              file=sys.stderr)
+    else:
+        model = EarlyWarning(args.window)
+        model.update(frame)
+    if args.state:
+        def _dump(tmp):
+            with open(tmp, "wb") as f:
+                pickle.dump(model, f)
+
+        analytics.write_atomic(args.state, _dump)
+
+    months = model.months if args.all_months else [args.month]
+    out = pd.concat([model.watchlist(m, args.k, weights) for m in months], ignore_index=True)
+    cols = ["month", "rank", "country", "Region", "score", *COMPONENTS]
+    out = out[cols].assign(month=out["month"].dt.strftime("%Y-%m"))
+    print(out.to_csv(index=False) if args.csv else out.round(3).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
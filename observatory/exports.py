@@ -0,0 +1,69 @@
+"""Serialize analytics tables to CSV, Excel or Parquet for download.
+
+Each writer streams straight into a single in-memory buffer that is handed
+to the caller, so a table is never held as both an encoded string and a
+separate bytes copy.
+"""
+import importlib.util
+import io
+import re
+import zipfile
+
+FORMATS = {
+    "csv":     dict(label="CSV",     ext="csv",     mime="text/csv"),
+    "xlsx":    dict(label="Excel",   ext="xlsx",    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "parquet": dict(label="Parquet", ext="parquet", mime="application/vnd.apache.parquet"),
+}
+
+# Optional engines; formats whose engine is missing are hidden from the UI
+_ENGINES = {"xlsx": ("openpyxl", "xlsxwriter"), "parquet": ("pyarrow", "fastparquet")}
+
+
+def available_formats():
+    return [
+        fmt for fmt in FORMATS
+        if fmt not in _ENGINES or any(importlib.util.find_spec(m) for m in _ENGINES[fmt])
+    ]
+
+
+def file_name(name, fmt, suffix=""):
+    stem = re.sub(r"[^A-Za-z0-9_-]+", "_", f"{name}{suffix}").strip("_")
+    return f"{stem}.{FORMATS[fmt]['ext']}"
+
+
+def write_table(df, fmt, buf):
+    """Write ``df`` to the binary file-like ``buf`` in format ``fmt``."""
+    if fmt == "csv":
+        text = io.TextIOWrapper(buf, encoding="utf-8", newline="", write_through=True)
+        df.to_csv(text, index=False)
+        text.detach()
+    elif fmt == "xlsx":
+        df.to_excel(buf, index=False, sheet_name="data")
+    elif fmt == "parquet":
+        df.to_parquet(buf, index=False)
+    else:
+        raise ValueError(f"Unsupported export format: {fmt!r}")
+
+
+def export_table(df, fmt):
+    """Encode one table, returning a rewound buffer ready to be streamed."""
+    buf = io.BytesIO()
+    write_table(df, fmt, buf)
+    buf.seek(0)
+    return buf
+
+
+def export_bundle(tables, fmt, suffix=""):
+    """Zip every table in ``tables`` (name -> DataFrame), one file per table."""
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, df in tables.items():
+            # Stream each table straight into its archive member
+            with zf.open(file_name(name, fmt, suffix), "w") as member:
+                if fmt == "csv":
+                    write_table(df, fmt, member)
+                else:
+                    # Excel/Parquet writers need a seekable target
+                    member.write(export_table(df, fmt).getbuffer())
+    buf.seek(0)
+    return buf
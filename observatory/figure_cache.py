@@ -0,0 +1,132 @@
+"""LRU cache of built Plotly figures, shared across dashboard sessions.
+
+Figures are keyed by a hash of the data and layout options they were built
+from. A rerun whose inputs did not change skips the pandas preparation and
+trace construction entirely. A hit hands back the validated ``go.Figure``
+itself, never a copy re-parsed from JSON. Cached figures are therefore
+shared read-only: pass them straight to ``st.plotly_chart`` and never
+update them in place.
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from observatory import perf
+
+
+def _update_digest(h, part):
+    if isinstance(part, (pd.DataFrame, pd.Series)):
+        h.update(repr(part.columns if isinstance(part, pd.DataFrame) else part.name).encode())
+        h.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+    elif isinstance(part, np.ndarray):
+        h.update(f"{part.dtype}{part.shape}".encode())
+        h.update(np.ascontiguousarray(part).tobytes())
+    else:
+        h.update(json.dumps(part, sort_keys=True, default=str).encode())
+
+
+def figure_key(name, *parts):
+    """Stable cache key for a figure built from ``parts`` (frames, arrays or JSON-able values)."""
+    h = hashlib.sha1(name.encode())
+    for part in parts:
+        _update_digest(h, part)
+    return f"{name}:{h.hexdigest()}"
+
+
+class FigureCache:
+    """Thread-safe LRU mapping of figure keys to built, read-only Plotly figures."""
+
+    def __init__(self, maxsize=64):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._store = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_build(self, key, build):
+        """Return the cached figure for ``key``, calling ``build()`` only on a miss.
+
+        The returned figure may be shared with other sessions; do not mutate it.
+        """
+        start = time.perf_counter()
+        stage = f"figure.{key.split(':', 1)[0]}"
+        with self._lock:
+            fig = self._store.get(key)
+            if fig is not None:
+                self._store.move_to_end(key)
+                self.hits += 1
+        if fig is not None:
+            perf.record(stage, time.perf_counter() - start, kind="figure", cache="hit")
+            return fig
+
+        fig = build()
+        with self._lock:
+            self.misses += 1
+            self._store[key] = fig
+            self._store.move_to_end(key)
+            while len(self._store) > self.maxsize:
+                self._store.popitem(last=False)
+        perf.record(stage, time.perf_counter() - start, kind="figure", cache="miss")
+        return fig
+
+    def clear(self):
+        with self._lock:
+            self._store.clear()
+            self.hits = self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return dict(hits=self.hits, misses=self.misses, size=len(self._store),
+                        maxsize=self.maxsize)
+
+
+def build_animated_map(wide_pct, colorscale, colorbar, layout):
+    """Choropleth with one frame per month, carrying each country's last value forward."""
+    panel = (
+        wide_pct.pivot_table(index="date", columns="iso3", values="crisis_plus_pct", aggfunc="mean")
+        .sort_index()
+        .ffill()
+    )
+    names = wide_pct.drop_duplicates("iso3").set_index("iso3")["country"].reindex(panel.columns)
+    zmax = float(np.nanquantile(panel.values, 0.97))
+
+    def trace(row):
+        row = row.dropna()
+        return go.Choropleth(
+            locations=row.index, z=row.values, text=names.loc[row.index].values,
+            hovertemplate="<b>%{text}</b><br>Phase 3+: %{z:.1f}%<extra></extra>",
+            colorscale=colorscale, zmin=0, zmax=zmax, colorbar=colorbar,
+            marker_line_color="#252b3b", marker_line_width=0.5,
+        )
+
+    labels = [d.strftime("%Y-%m") for d in panel.index]
+    frames = [go.Frame(data=[trace(panel.iloc[i])], name=labels[i]) for i in range(len(panel))]
+    fig = go.Figure(data=frames[-1].data, frames=frames)
+    fig.update_layout(
+        **layout,
+        sliders=[dict(
+            active=len(frames) - 1,
+            currentvalue=dict(prefix="Month: ", font=dict(color="#e8eaf2")),
+            pad=dict(t=30), font=dict(color="#a0a8c0"),
+            steps=[dict(label=lbl, method="animate",
+                        args=[[lbl], dict(mode="immediate", frame=dict(duration=0, redraw=True))])
+                   for lbl in labels],
+        )],
+        updatemenus=[dict(
+            type="buttons", showactive=False, x=0.02, y=0.02, xanchor="left", yanchor="bottom",
+            bgcolor="#1c2030", bordercolor="#252b3b", font=dict(color="#e8eaf2"),
+            buttons=[
+                dict(label="▶ Play", method="animate",
+                     args=[None, dict(frame=dict(duration=300, redraw=True), fromcurrent=True)]),
+                dict(label="❚❚ Pause", method="animate",
+                     args=[[None], dict(mode="immediate", frame=dict(duration=0, redraw=False))]),
+            ],
+        )],
+    )
+    return fig
@@ -0,0 +1,265 @@
+"""Grouped reductions behind the analytics, JIT-compiled when Numba is installed.
+
+Each kernel reduces rows into groups given as integer codes, ``0 … n - 1``:
+
+* :func:`grouped_wls`: weighted least-squares slope per group (Q8 / Tab 4)
+* :func:`grouped_mean_std`: weighted mean and standard deviation per group (Q9 / Tab 5)
+* :func:`pivot_reduce`: sum or mean per (row, column) cell (the pivots in ``load_data``)
+
+Every kernel has two implementations with the same results. The NumPy one is
+built from ``np.bincount`` and makes one pass over the rows per statistic.
+The loop one makes a single pass that accumulates every statistic at once;
+on sorted codes each group is a contiguous run and its accumulators stay in
+cache. The loop versions are compiled with Numba when it is importable and
+``OBSERVATORY_JIT`` is not ``0``; otherwise the NumPy versions are used.
+:data:`BACKEND` says which.
+
+``python -m observatory.kernels`` checks both implementations against each
+other on random and edge-case inputs. Without Numba the loops run
+interpreted on small inputs, so their logic is checked either way. It then
+times them on a large input.
+"""
+import argparse
+import importlib.util
+import os
+import sys
+import time
+
+import numpy as np
+
+JIT = os.environ.get("OBSERVATORY_JIT", "1") != "0" and importlib.util.find_spec("numba") is not None
+BACKEND = "numba" if JIT else "numpy"
+PIVOT_HOWS = ("sum", "mean")
+
+
+# ─────────────────────────────────────────────
+# NUMPY IMPLEMENTATIONS
+# ─────────────────────────────────────────────
+def _wls_numpy(codes, n, x, y, w):
+    def _sum(values):
+        return np.bincount(codes, weights=values, minlength=n)
+
+    wx = w * x
+    sw, sx, sy = _sum(w), _sum(wx), _sum(w * y)
+    sxx, sxy = _sum(wx * x), _sum(wx * y)
+    used = np.bincount(codes, weights=(w > 0).astype(np.float64), minlength=n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        slope = (sw * sxy - sx * sy) / (sw * sxx - sx * sx)
+    return slope, used
+
+
+def _mean_std_numpy(codes, n, y, w):
+    def _sum(values):
+        return np.bincount(codes, weights=values, minlength=n)
+
+    sw, sww = _sum(w), _sum(w * w)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = _sum(w * y) / sw
+        d = y - mean[codes]
+        std = np.sqrt(_sum(w * (d * d)) / (sw - sww / sw))
+    return mean, std
+
+
+def _pivot_numpy(rows, cols, values, n_rows, n_cols, how):
+    cell = rows * n_cols + cols
+    sums = np.bincount(cell, weights=values, minlength=n_rows * n_cols)
+    counts = np.bincount(cell, minlength=n_rows * n_cols)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        out = sums / counts if how == "mean" else np.where(counts > 0, sums, np.nan)
+    return out.reshape(n_rows, n_cols)
+
+
+# ─────────────────────────────────────────────
+# SINGLE-PASS LOOP IMPLEMENTATIONS (compiled by Numba when available)
+# ─────────────────────────────────────────────
+def _wls_loop(codes, n, x, y, w):
+    sw = np.zeros(n)
+    sx = np.zeros(n)
+    sy = np.zeros(n)
+    sxx = np.zeros(n)
+    sxy = np.zeros(n)
+    used = np.zeros(n)
+    for i in range(len(codes)):
+        g = codes[i]
+        wi = w[i]
+        wx = wi * x[i]
+        sw[g] += wi
+        sx[g] += wx
+        sy[g] += wi * y[i]
+        sxx[g] += wx * x[i]
+        sxy[g] += wx * y[i]
+        if wi > 0:
+            used[g] += 1.0
+    slope = np.empty(n)
+    for g in range(n):
+        slope[g] = (sw[g] * sxy[g] - sx[g] * sy[g]) / (sw[g] * sxx[g] - sx[g] * sx[g])
+    return slope, used
+
+
+def _mean_std_loop(codes, n, y, w):
+    sw = np.zeros(n)
+    sww = np.zeros(n)
+    swy = np.zeros(n)
+    for i in range(len(codes)):
+        g = codes[i]
+        sw[g] += w[i]
+        sww[g] += w[i] * w[i]
+        swy[g] += w[i] * y[i]
+    mean = np.empty(n)
+    for g in range(n):
+        mean[g] = swy[g] / sw[g]
+    ss = np.zeros(n)
+    for i in range(len(codes)):
+        g = codes[i]
+        d = y[i] - mean[g]
+        ss[g] += w[i] * (d * d)
+    std = np.empty(n)
+    for g in range(n):
+        std[g] = np.sqrt(ss[g] / (sw[g] - sww[g] / sw[g]))
+    return mean, std
+
+
+def _pivot_loop(rows, cols, values, n_rows, n_cols, how):
+    sums = np.zeros((n_rows, n_cols))
+    counts = np.zeros((n_rows, n_cols), dtype=np.int64)
+    for i in range(len(rows)):
+        sums[rows[i], cols[i]] += values[i]
+        counts[rows[i], cols[i]] += 1
+    out = np.empty((n_rows, n_cols))
+    mean = how == "mean"
+    for r in range(n_rows):
+        for c in range(n_cols):
+            if counts[r, c] == 0:
+                out[r, c] = np.nan
+            elif mean:
+                out[r, c] = sums[r, c] / counts[r, c]
+            else:
+                out[r, c] = sums[r, c]
+    return out
+
+
+if JIT:
+    from numba import njit
+
+    # error_model="numpy": 0/0 gives NaN rather than raising, as in the NumPy versions
+    _wls_impl, _mean_std_impl, _pivot_impl = (
+        njit(cache=True, error_model="numpy")(f) for f in (_wls_loop, _mean_std_loop, _pivot_loop)
+    )
+else:
+    _wls_impl, _mean_std_impl, _pivot_impl = _wls_numpy, _mean_std_numpy, _pivot_numpy
+
+
+# ─────────────────────────────────────────────
+# PUBLIC API
+# ─────────────────────────────────────────────
+def _codes(codes):
+    return np.ascontiguousarray(codes, dtype=np.int64)
+
+
+def _floats(values):
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+
+def grouped_wls(codes, n, x, y, w):
+    """``(slope, used)`` per group: the weighted least-squares slope of ``y`` on ``x`` and the rows with ``w > 0``."""
+    return _wls_impl(_codes(codes), int(n), _floats(x), _floats(y), _floats(w))
+
+
+def grouped_mean_std(codes, n, y, w):
+    """``(mean, std)`` per group; ``std`` uses reliability weights (n − 1 for equal weights)."""
+    return _mean_std_impl(_codes(codes), int(n), _floats(y), _floats(w))
+
+
+def pivot_reduce(rows, cols, values, n_rows, n_cols, how="mean"):
+    """Dense ``n_rows × n_cols`` matrix of the sum or mean of ``values`` per cell, NaN where empty."""
+    if how not in PIVOT_HOWS:
+        raise ValueError(f"Unknown reduction {how!r}; expected one of {', '.join(PIVOT_HOWS)}")
+    return _pivot_impl(_codes(rows), _codes(cols), _floats(values), int(n_rows), int(n_cols), how)
+
+
+# ─────────────────────────────────────────────
+# PARITY CHECK
+# ─────────────────────────────────────────────
+def _cases(rng, rows, groups):
+    """Random inputs plus the edge cases the analytics hit: empty groups, one row, zero weights, ties."""
+    codes = np.sort(rng.integers(0, groups, rows))
+    x = np.concatenate([np.arange(c) for c in np.bincount(codes, minlength=groups)]).astype(np.float64)
+    y = rng.normal(20, 10, rows).round(1)
+    w = rng.choice([0.0, 0.4, 0.8, 1.0], rows)
+    yield "random", (codes, groups + 2, x, y, w)
+    yield "unit weights", (codes, groups, x, y, np.ones(rows))
+    yield "unsorted codes", (rng.permutation(codes), groups, x, y, w)
+    yield "constant y", (codes, groups, x, np.full(rows, 5.0), w)
+    yield "single row", (np.zeros(1, dtype=np.int64), 1, np.zeros(1), np.ones(1), np.ones(1))
+    yield "no rows", (np.zeros(0, dtype=np.int64), 3, np.zeros(0), np.zeros(0), np.zeros(0))
+
+
+def _same(a, b):
+    return all(np.allclose(p, q, rtol=1e-12, atol=0, equal_nan=True) for p, q in zip(a, b))
+
+
+def check(rows=2_000, groups=60, seed=0):
+    """Compare the loop (compiled or interpreted) and NumPy kernels; returns the failing cases."""
+    rng = np.random.default_rng(seed)
+    wls, mean_std, pivot = (_wls_impl, _mean_std_impl, _pivot_impl) if JIT else (_wls_loop, _mean_std_loop, _pivot_loop)
+    failures = []
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, (codes, n, x, y, w) in _cases(rng, rows, groups):
+            if not _same(wls(codes, n, x, y, w), _wls_numpy(codes, n, x, y, w)):
+                failures.append(f"grouped_wls · {name}")
+            if not _same(mean_std(codes, n, y, w), _mean_std_numpy(codes, n, y, w)):
+                failures.append(f"grouped_mean_std · {name}")
+            cols = (np.arange(len(codes)) % 5).astype(np.int64)
+            for how in PIVOT_HOWS:
+                if not _same([pivot(codes, cols, y, n, 5, how)], [_pivot_numpy(codes, cols, y, n, 5, how)]):
+                    failures.append(f"pivot_reduce/{how} · {name}")
+    return failures
+
+
+def benchmark(rows=5_000_000, groups=50_000, seed=0, repeat=3):
+    """Best-of-``repeat`` seconds per kernel for the active backend and for NumPy."""
+    rng = np.random.default_rng(seed)
+    _, (codes, n, x, y, w) = next(_cases(rng, rows, groups))
+    cols = (np.arange(rows) % 5).astype(np.int64)
+    kernels = {
+        "grouped_wls": (lambda: grouped_wls(codes, n, x, y, w), lambda: _wls_numpy(codes, n, x, y, w)),
+        "grouped_mean_std": (lambda: grouped_mean_std(codes, n, y, w), lambda: _mean_std_numpy(codes, n, y, w)),
+        "pivot_reduce": (lambda: pivot_reduce(codes, cols, y, n, 5), lambda: _pivot_numpy(codes, cols, y, n, 5, "mean")),
+    }
+    out = {}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for name, pair in kernels.items():
+            times = []
+            for fn in pair:
+                fn()  # compile / warm up
+                best = np.inf
+                for _ in range(repeat):
+                    start = time.perf_counter()
+                    fn()
+                    best = min(best, time.perf_counter() - start)
+                times.append(best)
+            out[name] = times
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=5_000_000, help="rows for the timing run")
+    parser.add_argument("--groups", type=int, default=50_000, help="groups for the timing run")
+    parser.add_argument("--no-bench", action="store_true", help="only run the parity check")
+    args = parser.parse_args(argv)
+
+    mode = "compiled" if JIT else "interpreted loops vs NumPy"
+    failures = check()
+    print(f"backend: {BACKEND} · parity ({mode}): {'ok' if not failures else 'FAILED'}")
+    for failure in failures:
+        print(f"  mismatch: {failure}")
+    if not args.no_bench:
+        for name, (active, reference) in benchmark(args.rows, args.groups).items():
+            print(f"{name:<18} {BACKEND} {active * 1e3:8.1f} ms · numpy {reference * 1e3:8.1f} ms · "
+                  f"{reference / active:4.1f}×")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""Headless load test: many concurrent dashboard sessions against a real server.
+
+    python -m observatory.loadtest --sessions 50 --steps 10
+
+Starts ``observatory.serve`` on a free port (or targets ``--url``), then opens
+one Streamlit websocket per simulated session and speaks the same protobuf
+protocol as the browser: an initial script run, followed by randomized
+widget changes — region selection, date range, heatmap granularity / top-N,
+country explorer and the animated map toggle — each of which triggers a
+rerun. Tab switches are client-side in Streamlit and never reach the server,
+so they are modelled as think time between interactions.
+
+Reports p50/p95/p99 rerun latency, throughput and the server's peak RSS.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import aiohttp
+import numpy as np
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ClientState_pb2 import ClientState
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState, WidgetStates
+
+from observatory import perf
+
+WIDGET_TYPES = ("multiselect", "slider", "radio", "checkbox")
+
+# Interaction name -> relative frequency
+ACTIONS = {
+    "regions": 3,
+    "date_range": 3,
+    "heatmap": 1.5,
+    "explorer": 1.5,
+    "animate_map": 1,
+}
+
+
+def _month_floor_micros(micros):
+    dt = datetime.fromtimestamp(micros / 1e6, tz=timezone.utc)
+    return int(datetime(dt.year, dt.month, 1, tzinfo=timezone.utc).timestamp() * 1e6)
+
+
+class SimulatedSession:
+    """One browser tab: a websocket plus the widget states it would send."""
+
+    def __init__(self, http, url, rng):
+        self.http = http
+        self.url = url
+        self.rng = rng
+        self.widgets = {}     # label -> (element type, proto)
+        self.states = {}      # widget id -> WidgetState
+        self.latencies = []   # (action, seconds)
+        self.errors = 0
+        self.ws = None
+
+    async def connect(self):
+        self.ws = await self.http.ws_connect(f"{self.url}/_stcore/stream", protocols=("streamlit",),
+                                             max_msg_size=0, heartbeat=30)
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    async def rerun(self, action):
+        msg = BackMsg(rerun_script=ClientState(
+            query_string="", widget_states=WidgetStates(widgets=list(self.states.values()))
+        ))
+        start = time.perf_counter()
+        await self.ws.send_bytes(msg.SerializeToString())
+        while True:
+            frame = await self.ws.receive()
+            if frame.type != aiohttp.WSMsgType.BINARY:
+                raise ConnectionError(f"websocket closed during rerun ({frame.type})")
+            fwd = ForwardMsg.FromString(frame.data)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta" and fwd.delta.WhichOneof("type") == "new_element":
+                element = fwd.delta.new_element
+                etype = element.WhichOneof("type")
+                if etype in WIDGET_TYPES:
+                    proto = getattr(element, etype)
+                    self.widgets[proto.label] = (etype, proto)
+                elif etype == "exception":
+                    self.errors += 1
+            elif kind == "script_finished":
+                if fwd.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self.errors += 1
+                break
+        self.latencies.append((action, time.perf_counter() - start))
+
+    def _set(self, label, **value):
+        if label not in self.widgets:
+            return False
+        _, proto = self.widgets[label]
+        self.states[proto.id] = WidgetState(id=proto.id, **value)
+        return True
+
+    def choose_action(self):
+        names = list(ACTIONS)
+        return self.rng.choices(names, weights=[ACTIONS[n] for n in names])[0]
+
+    def apply(self, action):
+        """Change the widget(s) behind ``action``; returns False if the widget is not on the page."""
+        rng = self.rng
+        if action == "regions":
+            _, ms = self.widgets.get("Regions", (None, None))
+            if ms is None:
+                return False
+            options = list(ms.options)
+            chosen = rng.sample(options, rng.randint(1, len(options)))
+            return self._set("Regions", string_array_value=dict(data=chosen))
+        if action == "date_range":
+            _, sl = self.widgets.get("Date range", (None, None))
+            if sl is None:
+                return False
+            lo, hi = sorted(rng.uniform(sl.min, sl.max) for _ in range(2))
+            lo, hi = _month_floor_micros(lo), max(_month_floor_micros(hi), _month_floor_micros(lo))
+            return self._set("Date range", double_array_value=dict(data=[lo, hi]))
+        if action == "heatmap":
+            ok = False
+            if "Granularity" in self.widgets:
+                options = list(self.widgets["Granularity"][1].options)
+                ok = self._set("Granularity", string_value=rng.choice(options))
+            if rng.random() < 0.5:
+                ok = self._set("Countries shown", double_array_value=dict(data=[rng.choice(range(5, 55, 5))])) or ok
+            return ok
+        if action == "explorer":
+            label = "Select up to 5 countries to compare"
+            if label not in self.widgets:
+                return False
+            options = list(self.widgets[label][1].options)
+            return self._set(label, string_array_value=dict(data=rng.sample(options, min(len(options), rng.randint(1, 5)))))
+        if action == "animate_map":
+            # Toggle on rarely and back off, like a user taking a quick look
+            return self._set("Animate over time", bool_value=rng.random() < 0.3)
+        raise ValueError(action)
+
+
+async def run_session(http, url, seed, steps, think_time, start_delay):
+    rng = random.Random(seed)
+    session = SimulatedSession(http, url, rng)
+    await asyncio.sleep(start_delay)
+    try:
+        await session.connect()
+        await session.rerun("initial")
+        for _ in range(steps):
+            await asyncio.sleep(rng.uniform(0, think_time))
+            action = session.choose_action()
+            if session.apply(action):
+                await session.rerun(action)
+    except (ConnectionError, aiohttp.ClientError, asyncio.TimeoutError):
+        session.errors += 1
+    finally:
+        await session.close()
+    return session
+
+
+async def _sample_rss(pid, peak, stop):
+    while not stop.is_set():
+        rss = perf.rss_bytes(pid)
+        if rss is not None:
+            peak[0] = max(peak[0], rss)
+        try:
+            await asyncio.wait_for(stop.wait(), 0.1)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def run_load(url, sessions, steps, think_time, ramp, seed=0, server_pid=None):
+    peak, stop = [0], asyncio.Event()
+    sampler = asyncio.create_task(_sample_rss(server_pid, peak, stop)) if server_pid else None
+    connector = aiohttp.TCPConnector(limit=0)
+    async with aiohttp.ClientSession(connector=connector) as http:
+        start = time.perf_counter()
+        results = await asyncio.gather(*[
+            run_session(http, url, seed + i, steps, think_time, ramp * i / max(sessions, 1))
+            for i in range(sessions)
+        ])
+        wall = time.perf_counter() - start
+    stop.set()
+    if sampler:
+        await sampler
+    return summarize(results, wall, peak[0] or None)
+
+
+def summarize(results, wall, peak_rss):
+    latencies = [(a, s) for r in results for a, s in r.latencies]
+    seconds = np.array([s for _, s in latencies]) * 1000
+    pct = lambda q: round(float(np.percentile(seconds, q)), 1) if len(seconds) else None
+    by_action = {}
+    for action in sorted({a for a, _ in latencies}):
+        vals = np.array([s for a, s in latencies if a == action]) * 1000
+        by_action[action] = dict(n=len(vals), p50_ms=round(float(np.percentile(vals, 50)), 1),
+                                 p95_ms=round(float(np.percentile(vals, 95)), 1))
+    return dict(
+        sessions=len(results),
+        reruns=len(latencies),
+        errors=sum(r.errors for r in results),
+        wall_s=round(wall, 2),
+        throughput_rps=round(len(latencies) / wall, 2) if wall else None,
+        p50_ms=pct(50), p95_ms=pct(95), p99_ms=pct(99),
+        max_ms=round(float(seconds.max()), 1) if len(seconds) else None,
+        peak_rss_mb=round(peak_rss / 2**20, 1) if peak_rss else None,
+        by_action=by_action,
+    )
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, prewarm=True):
+    """Launch the dashboard in a subprocess and wait until it reports healthy."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    target = ["-m", "observatory.serve"] if prewarm else ["-m", "streamlit", "run", os.path.join(root, "app.py")]
+    proc = subprocess.Popen(
+        [sys.executable, *target, "--server.headless", "true", "--server.port", str(port),
+         "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+        cwd=root, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+
+    async def wait_healthy(timeout=60):
+        deadline = time.monotonic() + timeout
+        async with aiohttp.ClientSession() as http:
+            while time.monotonic() < deadline:
+                if proc.poll() is not None:
+                    raise RuntimeError("dashboard server exited during startup")
+                try:
+                    async with http.get(f"{url}/_stcore/health") as resp:
+                        if resp.status == 200:
+                            return
+                except aiohttp.ClientError:
+                    pass
+                await asyncio.sleep(0.2)
+        raise TimeoutError("dashboard server did not become healthy")
+
+    return proc, url, wait_healthy
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=20, help="concurrent simulated sessions")
+    parser.add_argument("--steps", type=int, default=10, help="interactions per session after the first run")
+    parser.add_argument("--think-time", type=float, default=1.0, help="max seconds between interactions")
+    parser.add_argument("--ramp", type=float, default=2.0, help="seconds over which sessions connect")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--url", help="target an already running server instead of starting one")
+    parser.add_argument("--no-prewarm", action="store_true", help="start plain 'streamlit run' instead of observatory.serve")
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args(argv)
+
+    proc = None
+    try:
+        if args.url:
+            url, pid = args.url.rstrip("/"), None
+        else:
+            proc, url, wait_healthy = start_server(_free_port(), prewarm=not args.no_prewarm)
+            asyncio.run(wait_healthy())
+            pid = proc.pid
+        summary = asyncio.run(run_load(url, args.sessions, args.steps, args.think_time, args.ramp,
+                                       seed=args.seed, server_pid=pid))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""Phase-transition (Markov) model of IPC phase shares with Monte Carlo projections.
+
+IPC publishes how many people are in each phase, not who moved where, so
+transition matrices are estimated from consecutive aggregate snapshots.
+On the quarterly grid from :func:`observatory.clustering.build_trajectories`,
+each pair of observed quarters gives ``s[t+1] ≈ s[t] @ P``. ``P`` is the
+row-stochastic matrix that best fits all of a group's pairs in least
+squares, found by projected gradient descent onto the probability simplex.
+
+Regions are fitted by pooling their countries' pairs. Each country is then
+shrunk toward its region's matrix in proportion to how few pairs it has.
+
+Projections draw every step's matrix row by row from a Dirichlet centred
+on the estimate. Thousands of paths are propagated at once as a batched
+matrix product. A scenario "shock" scales the probability of moving to a
+worse phase (and, inversely, of improving) before sampling.
+"""
+import numpy as np
+import pandas as pd
+
+from observatory.perf import profiled
+
+PHASES = 5
+N_PATHS = 4000
+SCENARIOS = {"baseline": 0.0, "stress": 0.5}
+
+
+def project_rows_to_simplex(M):
+    """Euclidean projection of each row of ``M`` onto the probability simplex."""
+    n = M.shape[-1]
+    u = -np.sort(-M, axis=-1)
+    css = np.cumsum(u, axis=-1) - 1
+    ind = np.arange(1, n + 1)
+    rho = (u - css / ind > 0).sum(axis=-1, keepdims=True)
+    theta = np.take_along_axis(css, rho - 1, axis=-1) / rho
+    return np.maximum(M - theta, 0)
+
+
+def estimate_transition_matrix(S0, S1, prior=None, strength=1.0, iters=500):
+    """Row-stochastic ``P`` minimising ||S0 P − S1||² + strength·||P − prior||².
+
+    ``S0`` / ``S1`` are (pairs, phases) share arrays; ``prior`` defaults to
+    the identity (no movement), which also anchors groups with few pairs.
+    """
+    prior = np.eye(S0.shape[1]) if prior is None else prior
+    G = S0.T @ S0 + strength * np.eye(S0.shape[1])
+    B = S0.T @ S1 + strength * prior
+    # Step size from the Lipschitz constant of the gradient
+    step = 1.0 / np.linalg.eigvalsh(G).max()
+    P = prior.copy()
+    for _ in range(iters):
+        P_next = project_rows_to_simplex(P - step * (G @ P - B))
+        if np.abs(P_next - P).max() < 1e-9:
+            return P_next
+        P = P_next
+    return P
+
+
+@profiled
+def fit_transition_model(traj, population=None, strength=1.0):
+    """Region and country transition matrices plus each unit's latest shares.
+
+    ``population`` maps country → total population, used to weight regional
+    starting shares and to express projections in people.
+    """
+    values = traj.values.astype(float)
+    pair = traj.observed[:, :-1] & traj.observed[:, 1:]
+    unit_idx, t_idx = np.nonzero(pair)
+    S0, S1 = values[unit_idx, t_idx], values[unit_idx, t_idx + 1]
+
+    population = population or {}
+    last_obs = traj.observed.shape[1] - 1 - np.argmax(traj.observed[:, ::-1], axis=1)
+    latest = values[np.arange(len(traj.units)), last_obs]
+
+    units = {}
+    for region in np.unique(traj.regions):
+        rows = np.flatnonzero(traj.regions == region)
+        in_region = np.isin(unit_idx, rows)
+        P_region = estimate_transition_matrix(S0[in_region], S1[in_region], strength=strength)
+        pops = np.array([population.get(c, np.nan) for c in traj.units[rows]])
+        weights = np.where(np.isnan(pops), 0, pops)
+        start = (latest[rows] * weights[:, None]).sum(axis=0) / weights.sum() if weights.sum() > 0 \
+            else latest[rows].mean(axis=0)
+        units[region] = dict(kind="region", region=region, matrix=P_region, pairs=int(in_region.sum()),
+                             start=start, population=float(weights.sum()) or np.nan,
+                             as_of=traj.periods[last_obs[rows].max()])
+        for r in rows:
+            mine = unit_idx == r
+            # Shrink toward the regional matrix; the pull fades as pairs accumulate
+            P = estimate_transition_matrix(S0[mine], S1[mine], prior=P_region, strength=strength * 4) \
+                if mine.any() else P_region
+            units[traj.units[r]] = dict(kind="country", region=region, matrix=P, pairs=int(mine.sum()),
+                                        start=latest[r], population=population.get(traj.units[r], np.nan),
+                                        as_of=traj.periods[last_obs[r]])
+    return units
+
+
+def apply_shock(P, shock):
+    """Scale transitions to worse phases by (1 + shock) and to better ones by 1 / (1 + shock)."""
+    if shock == 0:
+        return P
+    n = P.shape[-1]
+    up, down = np.triu(np.ones((n, n), dtype=bool), 1), np.tril(np.ones((n, n), dtype=bool), -1)
+    Q = P.copy()
+    Q[..., up] *= 1 + shock
+    Q[..., down] /= 1 + shock
+    off = Q.sum(axis=-1) - np.diagonal(Q, axis1=-2, axis2=-1)
+    # Stay-put probability absorbs the difference; if movement alone exceeds 1, renormalise it
+    over = off > 1
+    diag = np.where(over, 0, 1 - off)
+    Q[..., np.arange(n), np.arange(n)] = diag
+    Q[over] /= Q[over].sum(axis=-1, keepdims=True)
+    return Q
+
+
+@profiled
+def simulate(P, start, horizon=8, n_paths=N_PATHS, concentration=200.0, shock=0.0, seed=0):
+    """Phase-share paths of shape (n_paths, horizon + 1, phases) from ``start``.
+
+    Every path draws a fresh matrix per step: row ``i`` ~ Dirichlet(concentration ·
+    P[i]), so ``concentration`` sets how far draws stray from the estimate.
+    """
+    rng = np.random.default_rng(seed)
+    Q = apply_shock(np.asarray(P, dtype=float), shock)
+    alpha = np.maximum(Q * concentration, 1e-3)
+    n = Q.shape[0]
+    paths = np.empty((n_paths, horizon + 1, n))
+    paths[:, 0] = start
+    # Dirichlet draws for all paths, steps and rows at once via normalised gammas
+    draws = rng.standard_gamma(np.broadcast_to(alpha, (horizon, n_paths, n, n)))
+    draws /= draws.sum(axis=-1, keepdims=True)
+    for h in range(horizon):
+        paths[:, h + 1] = np.einsum("pi,pij->pj", paths[:, h], draws[h])
+    return paths
+
+
+def summarize_paths(paths, as_of, population=np.nan, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95), freq="QS"):
+    """Quantiles of the Phase 3+ share (and people, when ``population`` is known) per step."""
+    crisis = paths[:, :, 2:].sum(axis=2) * 100
+    qs = np.quantile(crisis, quantiles, axis=0)
+    out = pd.DataFrame({"step": np.arange(paths.shape[1]),
+                        "date": pd.date_range(as_of, periods=paths.shape[1], freq=freq)})
+    out["mean_pct"] = crisis.mean(axis=0)
+    for q, row in zip(quantiles, qs):
+        out[f"p{int(q * 100)}_pct"] = row
+    if np.isfinite(population):
+        for col in [c for c in out.columns if c.endswith("_pct")]:
+            out[col.replace("_pct", "_people")] = out[col] / 100 * population
+    out["p_worse"] = (crisis > crisis[:, :1]).mean(axis=0)
+    return out
+
+
+def analysed_population(latest_people):
+    """Country → people covered by its latest analysis (the sum over all five phases)."""
+    cols = [f"phase_{p}_people" for p in range(1, PHASES + 1)]
+    totals = latest_people.set_index("country").reindex(columns=cols).sum(axis=1, min_count=1)
+    return totals.dropna().to_dict()
@@ -0,0 +1,213 @@
+"""Lightweight timing, cache and memory instrumentation.
+
+``profiled`` wraps analytics functions and records wall time plus the rows
+going in and out; ``checkpoint`` attributes script time to named sections of
+a dashboard rerun. Everything recorded while a run is active (see
+``start_run``) is collected for the debug panel, and every entry is also
+emitted as a JSON line on the ``observatory.perf`` logger at DEBUG level.
+"""
+import contextlib
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+logger = logging.getLogger("observatory.perf")
+
+_local = threading.local()
+
+
+class RunRecorder:
+    """Stages recorded during one dashboard rerun, in execution order."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []
+        self._last_mark = self.started
+        self.profiler = None
+
+    def add(self, entry):
+        self.stages.append(entry)
+
+    def checkpoint(self, name):
+        """Record the time since the previous checkpoint as section ``name``."""
+        now = time.perf_counter()
+        record(name, now - self._last_mark, kind="section")
+        self._last_mark = now
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def frame(self):
+        return pd.DataFrame(self.stages, columns=["kind", "name", "seconds", "rows_in", "rows_out", "cache"])
+
+
+def start_run():
+    """Begin collecting stages for the current thread's rerun."""
+    _local.run = RunRecorder()
+    return _local.run
+
+
+def current_run():
+    return getattr(_local, "run", None)
+
+
+def record(name, seconds, kind="function", **fields):
+    entry = dict(kind=kind, name=name, seconds=seconds, **fields)
+    run = current_run()
+    if run is not None:
+        run.add(entry)
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(json.dumps(entry, default=str))
+
+
+def _rows(obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return len(obj)
+    if isinstance(obj, tuple) and obj and all(isinstance(o, (pd.DataFrame, pd.Series)) for o in obj):
+        return sum(len(o) for o in obj)
+    if isinstance(obj, dict) and obj and all(isinstance(o, (pd.DataFrame, pd.Series)) for o in obj.values()):
+        return sum(len(o) for o in obj.values())
+    return None
+
+
+def profiled(func=None, *, name=None):
+    """Decorator recording wall time and input/output row counts of each call."""
+    if func is None:
+        return functools.partial(profiled, name=name)
+    stage = name or func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        rows_in = next((r for r in map(_rows, args) if r is not None), None)
+        record(stage, time.perf_counter() - start, rows_in=rows_in, rows_out=_rows(result))
+        return result
+
+    return wrapper
+
+
+# ─────────────────────────────────────────────
+# CACHE HIT / MISS COUNTS
+# ─────────────────────────────────────────────
+class CacheStats:
+    """Process-wide call and miss counters per cached function."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._misses = {}
+
+    def call(self, name):
+        with self._lock:
+            self._calls[name] = self._calls.get(name, 0) + 1
+
+    def miss(self, name):
+        with self._lock:
+            self._misses[name] = self._misses.get(name, 0) + 1
+
+    def frame(self):
+        with self._lock:
+            rows = [(n, c, c - self._misses.get(n, 0), self._misses.get(n, 0)) for n, c in self._calls.items()]
+        df = pd.DataFrame(rows, columns=["function", "calls", "hits", "misses"])
+        df["hit_rate"] = (df["hits"] / df["calls"]).round(3)
+        return df
+
+
+CACHE_STATS = CacheStats()
+
+
+def tracked_cache(cache_decorator):
+    """Apply ``cache_decorator`` (e.g. ``st.cache_data(...)``) while counting hits and misses.
+
+    The inner function only executes on a miss, so misses are counted there
+    and hits are the remaining calls.
+    """
+    def decorate(func):
+        name = func.__name__
+
+        @functools.wraps(func)
+        def on_miss(*args, **kwargs):
+            CACHE_STATS.miss(name)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            record(name, time.perf_counter() - start, kind="cache", cache="miss", rows_out=_rows(result))
+            return result
+
+        cached = cache_decorator(on_miss)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            CACHE_STATS.call(name)
+            return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+
+    return decorate
+
+
+def rss_bytes(pid=None):
+    """Current resident set size of ``pid`` (default: this process).
+
+    Falls back to this process's peak RSS where /proc is unavailable.
+    """
+    try:
+        with open(f"/proc/{pid or 'self'}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        if pid is not None:
+            return None
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, kilobytes elsewhere
+    return peak if os.uname().sysname == "Darwin" else peak * 1024
+
+
+# ─────────────────────────────────────────────
+# cPROFILE
+# ─────────────────────────────────────────────
+def start_profile(run):
+    import cProfile
+
+    run.profiler = cProfile.Profile()
+    run.profiler.enable()
+
+
+@contextlib.contextmanager
+def profiling(run, enabled=True):
+    """Profile the block with cProfile when ``enabled``.
+
+    The profiler is disabled on every way out of the block: normal exit,
+    ``st.rerun()`` / ``st.stop()`` (which raise) or an error. A stray
+    profiler would otherwise keep running, and on Python 3.12+ it would make
+    the next ``enable()`` fail.
+    """
+    if enabled:
+        start_profile(run)
+    try:
+        yield run
+    finally:
+        if run.profiler is not None:
+            run.profiler.disable()
+
+
+def stop_profile(run, limit=25):
+    """Stop ``run``'s profiler and return (top-functions report, .prof dump bytes)."""
+    import io
+    import marshal
+    import pstats
+
+    run.profiler.disable()
+    out = io.StringIO()
+    stats = pstats.Stats(run.profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(limit)
+    run.profiler.create_stats()
+    return out.getvalue(), marshal.dumps(run.profiler.stats)
@@ -0,0 +1,85 @@
+"""Saved custom regions: named sets of ISO3 codes defined from the dashboard.
+
+The built-in West / East Africa / Other split is fixed at load time. Custom
+regions are not: they are stored as a small JSON file in the cache dir and
+aggregated on demand by :func:`observatory.analytics.custom_region_summary`,
+so saving or deleting one never reloads or re-pivots the dataset::
+
+    python -m observatory.regions save Sahel BFA MLI NER TCD MRT SEN
+    python -m observatory.regions list
+    python -m observatory.regions delete Sahel
+"""
+import argparse
+import json
+import os
+import threading
+
+from observatory import analytics
+
+
+class RegionStore:
+    """``{name: [iso3, ...]}`` persisted at ``path`` (default: ``<cache dir>/custom_regions.json``)."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(analytics.cache_dir(), "custom_regions.json")
+        self._lock = threading.Lock()
+
+    def all(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, regions):
+        def _dump(tmp):
+            with open(tmp, "w") as f:
+                json.dump(regions, f, indent=1, sort_keys=True)
+
+        analytics.write_atomic(self.path, _dump)
+
+    def save(self, name, members):
+        """Create or replace region ``name``; returns its normalised member list."""
+        name = name.strip()
+        members = sorted({m.strip().upper() for m in members if m.strip()})
+        if not name:
+            raise ValueError("A custom region needs a name")
+        if not members:
+            raise ValueError(f"Custom region {name!r} has no countries")
+        with self._lock:
+            regions = self.all()
+            regions[name] = members
+            self._write(regions)
+        return members
+
+    def delete(self, name):
+        with self._lock:
+            regions = self.all()
+            if regions.pop(name, None) is not None:
+                self._write(regions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--path", help="store file (default: <cache dir>/custom_regions.json)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_save = sub.add_parser("save", help="create or replace a region")
+    p_save.add_argument("name")
+    p_save.add_argument("iso3", nargs="+")
+    p_delete = sub.add_parser("delete", help="remove a region")
+    p_delete.add_argument("name")
+    sub.add_parser("list", help="list saved regions")
+    args = parser.parse_args(argv)
+
+    store = RegionStore(args.path)
+    if args.command == "save":
+        print(f"{args.name}: {' '.join(store.save(args.name, args.iso3))}")
+    elif args.command == "delete":
+        store.delete(args.name)
+    else:
+        for name, members in store.all().items():
+            print(f"{name}: {' '.join(members)}")
+
+
+if __name__ == "__main__":
+    main()
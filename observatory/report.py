@@ -0,0 +1,393 @@
+"""Static HTML (and optional PDF) report of the ten analysis questions in final.py.
+
+    python -m observatory.report --out report.html --pdf report.pdf
+
+The questions are answered from the shared analytics tables rather than
+final.py's own pipeline. Each section's chart is drawn with
+matplotlib/seaborn in a pool of worker processes. A rendered section is
+stored under the cache directory keyed by a hash of its input data and the
+code that draws it, so regenerating the report after a data refresh only
+redraws the sections whose numbers actually changed. The HTML embeds its
+figures and needs no other files.
+"""
+import argparse
+import base64
+import html
+import inspect
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, backends, perf
+from observatory.analytics import DEFAULT_DATA_PATH
+from observatory.figure_cache import figure_key
+
+QUESTIONS = {
+    "q1": ("Global Trend in Phase 3+ Severity",
+           "How has the average share of the population in Phase 3+ changed over time?"),
+    "q2": ("Global Burden Contributors",
+           "Which countries account for the largest share of the world's Phase 3+ population?"),
+    "q3": ("Highest % Population in Crisis",
+           "Which five countries have the largest share of their population in Phase 3+?"),
+    "q4": ("Concentration of the Global Crisis",
+           "How much of the global Phase 3+ population lives in the top five countries?"),
+    "q5": ("West Africa vs East Africa",
+           "How do the two regions' Phase 3+ trajectories compare?"),
+    "q6": ("Statistical Significance",
+           "Is the difference between West and East Africa statistically significant?"),
+    "q7": ("Depth of Crisis",
+           "Where is the largest part of the Phase 3+ population in Phase 4 or 5?"),
+    "q8": ("Fastest Deteriorating Countries",
+           "Which countries' Phase 3+ share is rising fastest?"),
+    "q9": ("Volatility vs Severity",
+           "Do more severe crises also fluctuate more?"),
+    "q10": ("Recovery vs Persistence",
+            "Which countries show the strongest decline in Phase 3+ share?"),
+}
+
+
+# ─────────────────────────────────────────────
+# SECTION PAYLOADS (main process)
+# ─────────────────────────────────────────────
+def section_payloads(tables):
+    """Per-question inputs (small frames and scalars) computed from the analytics tables."""
+    from scipy.stats import pearsonr, ttest_ind
+
+    burden = tables["burden_shares"]
+    regional = tables["regional_summary"]
+    regional = regional[regional["Region"].isin(["West Africa", "East Africa"])]
+    west = regional.loc[regional["Region"] == "West Africa", "crisis_plus_pct"]
+    east = regional.loc[regional["Region"] == "East Africa", "crisis_plus_pct"]
+    slopes = tables["country_slopes"]
+    stats = tables["volatility_stats"]
+
+    t_stat, p_val = ttest_ind(west, east, equal_var=False) if len(west) > 1 and len(east) > 1 else (np.nan, np.nan)
+    corr, p_corr = pearsonr(stats["mean"], stats["std"]) if len(stats) > 2 else (np.nan, np.nan)
+
+    return {
+        "q1": dict(trend=tables["global_trend"][["date", "crisis_plus_pct"]]),
+        "q2": dict(top=burden.head(10)[["country", "global_share"]]),
+        "q3": dict(top=tables["latest_pct"].sort_values("crisis_plus_pct", ascending=False)
+                   .head(5)[["country", "crisis_plus_pct"]]),
+        "q4": dict(top=burden.head(5)[["country", "crisis_plus_people", "global_share"]]),
+        "q5": dict(regional=regional),
+        "q6": dict(t_stat=float(t_stat), p_val=float(p_val), n_west=len(west), n_east=len(east),
+                   mean_west=float(west.mean()), mean_east=float(east.mean())),
+        "q7": dict(depth=tables["crisis_depth"].head(10)),
+        "q8": dict(fastest=slopes.sort_values("slope", ascending=False).head(10)[["country", "slope"]]),
+        "q9": dict(stats=stats[["country", "mean", "std"]], corr=float(corr), p_corr=float(p_corr)),
+        "q10": dict(recovery=slopes.sort_values("slope").head(10)[["country", "slope"]]),
+    }
+
+
+# ─────────────────────────────────────────────
+# RENDERERS (worker processes)
+# ─────────────────────────────────────────────
+def _figure():
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set_theme(style="whitegrid")
+    plt.rcParams["font.size"] = 11
+    return plt.subplots(figsize=(10, 5))
+
+
+def _png(fig):
+    import matplotlib.pyplot as plt
+
+    buf = io.BytesIO()
+    fig.tight_layout()
+    fig.savefig(buf, format="png", dpi=110)
+    plt.close(fig)
+    return base64.b64encode(buf.getvalue()).decode()
+
+
+def _annotated_barh(ax, frame, x, fmt):
+    import seaborn as sns
+
+    sns.barplot(data=frame, y="country", x=x, ax=ax)
+    for p in ax.patches:
+        ax.annotate(format(p.get_width(), fmt), (p.get_width(), p.get_y() + p.get_height() / 2),
+                    ha="left", va="center")
+
+
+def _table(frame, **formats):
+    frame = frame.copy()
+    for col, fmt in formats.items():
+        frame[col] = frame[col].map(lambda v: format(v, fmt))
+    return dict(table=frame.to_html(index=False, border=0, classes="data"), table_text=frame.to_string(index=False))
+
+
+def render_q1(p):
+    fig, ax = _figure()
+    ax.plot(p["trend"]["date"], p["trend"]["crisis_plus_pct"], linewidth=2.5)
+    ax.set(title="Global Average % of Population in Phase 3+", ylabel="Percentage (%)", xlabel="Date")
+    first, last = p["trend"]["crisis_plus_pct"].iloc[[0, -1]]
+    return dict(figure=_png(fig),
+                summary=f"The average Phase 3+ share moved from {first:.1f}% to {last:.1f}% over the period.")
+
+
+def render_q2(p):
+    fig, ax = _figure()
+    _annotated_barh(ax, p["top"], "global_share", ".1f")
+    ax.set(title="Top Contributors to Global Phase 3+ Population",
+           xlabel="Share of Global Crisis Population (%)", ylabel="")
+    lead = p["top"].iloc[0]
+    return dict(figure=_png(fig),
+                summary=f"{lead['country']} alone accounts for {lead['global_share']:.1f}% of the global total.")
+
+
+def render_q3(p):
+    fig, ax = _figure()
+    _annotated_barh(ax, p["top"], "crisis_plus_pct", ".1f")
+    ax.set(title="Top 5 Countries by % of Population in Phase 3+", xlabel="Percentage (%)", ylabel="")
+    return dict(figure=_png(fig), summary=", ".join(
+        f"{r.country} ({r.crisis_plus_pct:.0f}%)" for r in p["top"].itertuples()))
+
+
+def render_q4(p):
+    share = p["top"]["global_share"].sum()
+    return dict(
+        summary=f"The top 5 countries account for {share:.1f}% of the global Phase 3+ population.",
+        **_table(p["top"].rename(columns={"crisis_plus_people": "Phase 3+ people", "global_share": "share %"}),
+                 **{"Phase 3+ people": ",.0f", "share %": ".1f"}),
+    )
+
+
+def render_q5(p):
+    import seaborn as sns
+
+    fig, ax = _figure()
+    sns.lineplot(data=p["regional"], x="date", y="crisis_plus_pct", hue="Region", ax=ax)
+    ax.set(title="West vs East Africa: Average % in Phase 3+", ylabel="Percentage (%)", xlabel="Date")
+    means = p["regional"].groupby("Region")["crisis_plus_pct"].mean()
+    return dict(figure=_png(fig), summary="Mean Phase 3+ share: " + ", ".join(
+        f"{region} {value:.1f}%" for region, value in means.items()))
+
+
+def render_q6(p):
+    if np.isnan(p["t_stat"]):
+        return dict(summary="Not enough observations in both regions for a t-test.")
+    verdict = "statistically significant" if p["p_val"] < 0.05 else "not statistically significant"
+    return dict(summary=(
+        f"Welch's t-test: t = {p['t_stat']:.3f}, p = {p['p_val']:.5f} "
+        f"(West Africa mean {p['mean_west']:.1f}%, n = {p['n_west']}; "
+        f"East Africa mean {p['mean_east']:.1f}%, n = {p['n_east']}). "
+        f"The difference is {verdict} at α = 0.05."
+    ))
+
+
+def render_q7(p):
+    fig, ax = _figure()
+    _annotated_barh(ax, p["depth"], "severe_share", ".2f")
+    ax.set(title="Countries with Deepest Crisis (Phase 4–5 Share of Phase 3+)", xlabel="Severity Ratio", ylabel="")
+    return dict(figure=_png(fig))
+
+
+def render_q8(p):
+    fig, ax = _figure()
+    _annotated_barh(ax, p["fastest"], "slope", ".2f")
+    ax.set(title="Fastest Deteriorating Countries (Increase in Phase 3+ %)", xlabel="Slope", ylabel="")
+    return dict(figure=_png(fig))
+
+
+def render_q9(p):
+    import seaborn as sns
+
+    fig, ax = _figure()
+    sns.scatterplot(data=p["stats"], x="mean", y="std", ax=ax)
+    ax.set(title="Volatility vs Average Severity in Phase 3+",
+           xlabel="Mean % in Phase 3+", ylabel="Volatility (Std Dev)")
+    summary = ("Not enough countries to estimate a correlation." if np.isnan(p["corr"]) else
+               f"Correlation between severity and volatility: r = {p['corr']:.2f}, p = {p['p_corr']:.5f}.")
+    return dict(figure=_png(fig), summary=summary)
+
+
+def render_q10(p):
+    return dict(
+        summary="Countries showing the strongest recovery (declining Phase 3+ %):",
+        **_table(p["recovery"], slope=".3f"),
+    )
+
+
+RENDERERS = {name: globals()[f"render_{name}"] for name in QUESTIONS}
+
+
+def render_section(name, payload):
+    """Worker entry point: the rendered parts of section ``name``."""
+    start = time.perf_counter()
+    parts = RENDERERS[name](payload)
+    parts["render_seconds"] = time.perf_counter() - start
+    return parts
+
+
+# ─────────────────────────────────────────────
+# CONTENT-HASH CACHE
+# ─────────────────────────────────────────────
+def _code_fingerprint(name):
+    # A section is redrawn when its renderer or a shared drawing helper changes
+    helpers = (_figure, _png, _annotated_barh, _table)
+    return "".join(inspect.getsource(f) for f in (RENDERERS[name], *helpers))
+
+
+def section_key(name, payload):
+    parts = [_code_fingerprint(name), QUESTIONS[name]]
+    for field in sorted(payload):
+        value = payload[field]
+        parts += [field, value if isinstance(value, (pd.DataFrame, pd.Series)) else repr(value)]
+    return figure_key(name, *parts).replace(":", "-")
+
+
+class SectionCache:
+    """Rendered sections as JSON files named by their content hash."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(analytics.cache_dir(), "report")
+        os.makedirs(self.path, exist_ok=True)
+
+    def _file(self, key):
+        return os.path.join(self.path, f"{key}.json")
+
+    def get(self, key):
+        try:
+            with open(self._file(key)) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key, parts):
+        def _dump(tmp):
+            with open(tmp, "w") as f:
+                json.dump(parts, f)
+
+        analytics.write_atomic(self._file(key), _dump)
+
+
+@perf.profiled
+def render_sections(payloads, cache, workers=None):
+    """Rendered parts per section, drawing only cache misses, in parallel."""
+    keys = {name: section_key(name, payload) for name, payload in payloads.items()}
+    sections = {name: cache.get(key) for name, key in keys.items()}
+    missing = [name for name, parts in sections.items() if parts is None]
+    if missing:
+        with ProcessPoolExecutor(max_workers=workers or min(len(missing), os.cpu_count() or 1)) as pool:
+            futures = {name: pool.submit(render_section, name, payloads[name]) for name in missing}
+            for name, future in futures.items():
+                sections[name] = future.result()
+                cache.put(keys[name], sections[name])
+    return sections, missing
+
+
+# ─────────────────────────────────────────────
+# ASSEMBLY
+# ─────────────────────────────────────────────
+CSS = """
+body { font-family: "DM Sans", Helvetica, Arial, sans-serif; max-width: 960px; margin: 2rem auto; color: #1c2030; }
+h1 { font-family: "DM Serif Display", Georgia, serif; margin-bottom: .2rem; }
+.meta { color: #6b7280; font-size: .9rem; }
+section { border-top: 1px solid #e5e7eb; padding: 1.2rem 0; page-break-inside: avoid; }
+.label { color: #b8862b; font-size: .75rem; letter-spacing: .1em; text-transform: uppercase; }
+.question { color: #4b5563; font-style: italic; }
+img { max-width: 100%; }
+table.data { border-collapse: collapse; margin-top: .6rem; }
+table.data th, table.data td { padding: .25rem .8rem; border-bottom: 1px solid #e5e7eb; text-align: left; }
+"""
+
+
+def build_html(sections, version, generated):
+    body = []
+    for i, (name, (title, question)) in enumerate(QUESTIONS.items(), 1):
+        parts = sections[name]
+        body.append("<section>")
+        body.append(f"<div class='label'>Question {i}</div><h2>{html.escape(title)}</h2>")
+        body.append(f"<p class='question'>{html.escape(question)}</p>")
+        if parts.get("figure"):
+            body.append(f"<img alt='{html.escape(title)}' src='data:image/png;base64,{parts['figure']}'>")
+        if parts.get("summary"):
+            body.append(f"<p>{html.escape(parts['summary'])}</p>")
+        if parts.get("table"):
+            body.append(parts["table"])
+        body.append("</section>")
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        "<title>Global Food Crisis Observatory — Report</title>"
+        f"<style>{CSS}</style></head><body>"
+        "<h1>Global Food Crisis Observatory</h1>"
+        f"<p class='meta'>Acute food insecurity (IPC Phase 3+) · dataset {html.escape(version)} · "
+        f"generated {generated:%Y-%m-%d %H:%M}</p>"
+        + "".join(body) + "</body></html>"
+    )
+
+
+def build_pdf(sections, version, generated, path):
+    """One page per question with matplotlib's PDF backend (figures are embedded as images)."""
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.image as mpimg
+    import matplotlib.pyplot as plt
+    from matplotlib.backends.backend_pdf import PdfPages
+
+    with PdfPages(path) as pdf:
+        for i, (name, (title, question)) in enumerate(QUESTIONS.items(), 1):
+            parts = sections[name]
+            fig = plt.figure(figsize=(8.27, 11.69))
+            fig.text(0.08, 0.95, f"Question {i}: {title}", fontsize=15, weight="bold")
+            fig.text(0.08, 0.925, question, fontsize=10, style="italic", wrap=True)
+            if parts.get("figure"):
+                ax = fig.add_axes([0.06, 0.5, 0.88, 0.4])
+                ax.imshow(mpimg.imread(io.BytesIO(base64.b64decode(parts["figure"])), format="png"))
+                ax.axis("off")
+            text = parts.get("summary", "")
+            if parts.get("table_text"):
+                text += "\n\n" + parts["table_text"]
+            fig.text(0.08, 0.46 if parts.get("figure") else 0.88, text, fontsize=9,
+                     family="monospace" if parts.get("table") else None, va="top", wrap=True)
+            fig.text(0.08, 0.03, f"dataset {version} · generated {generated:%Y-%m-%d %H:%M}", fontsize=7, color="grey")
+            pdf.savefig(fig)
+            plt.close(fig)
+
+
+def build_report(data_path=DEFAULT_DATA_PATH, out="report.html", pdf=None, backend="pandas",
+                 workers=None, cache_path=None):
+    """Write the report; returns the names of the sections that had to be redrawn."""
+    model = backends.create_backend(backend, data_path)
+    meta = model.meta()
+    tables = model.tables(meta["regions"], meta["min_date"], meta["max_date"])
+    sections, redrawn = render_sections(section_payloads(tables), SectionCache(cache_path), workers)
+
+    generated = datetime.now()
+    with open(out, "w", encoding="utf-8") as f:
+        f.write(build_html(sections, model.version, generated))
+    if pdf:
+        build_pdf(sections, model.version, generated, pdf)
+    return redrawn
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", default=DEFAULT_DATA_PATH, help="path to IPC_IPC_PHASE.csv")
+    parser.add_argument("--backend", choices=backends.BACKENDS, default="pandas")
+    parser.add_argument("--out", default="report.html", help="HTML file to write")
+    parser.add_argument("--pdf", help="also write a PDF to this path")
+    parser.add_argument("--workers", type=int, help="render processes (default: one per redrawn section, up to the CPU count)")
+    parser.add_argument("--cache-dir", help="section cache directory (default: <cache dir>/report)")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    redrawn = build_report(args.data, args.out, args.pdf, args.backend, args.workers, args.cache_dir)
+    print(f"Wrote {args.out}{' and ' + args.pdf if args.pdf else ''} in {time.perf_counter() - start:.1f}s "
+          f"({len(redrawn)} of {len(QUESTIONS)} sections redrawn{': ' + ', '.join(redrawn) if redrawn else ''})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""Run the ten-question analysis of final.py for many scenarios in parallel.
+
+A scenario is one dataset release, one set of regions, one date window and
+one :data:`observatory.analytics.QUALITY_MODES` policy. It answers the same
+questions as :mod:`observatory.report`, from the same
+:func:`observatory.report.section_payloads`.
+
+Each release is parsed once in the main process. Its wide frames go to
+uncompressed Arrow files under the cache dir, which every worker
+memory-maps instead of re-reading the CSV. Scenarios fan out over a process
+pool. Their outputs are collected into one SQLite results store with a table
+per question output and an index on the scenario key. A scenario already in
+the store is skipped, so re-running after adding a release only computes
+the new one::
+
+    python -m observatory.scenarios --data IPC_IPC_PHASE.csv old_release.csv --per-region --per-year
+    python -m observatory.scenarios --windows 2017-2020,2021-2025 --quality include exclude
+    python -m observatory.scenarios --list
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, perf, report
+
+ALL_REGIONS = "All regions"
+
+
+@dataclass(frozen=True)
+class Scenario:
+    release: str
+    source: str
+    base: tuple
+    regions: tuple
+    start: pd.Timestamp
+    end: pd.Timestamp
+    quality: str = "include"
+
+    @property
+    def key(self):
+        """Stable id of what the scenario computes; the base file location is not part of it."""
+        text = repr((self.release, self.regions, self.start.isoformat(), self.end.isoformat(), self.quality))
+        return hashlib.sha1(text.encode()).hexdigest()[:16]
+
+    @property
+    def label(self):
+        regions = ALL_REGIONS if len(self.regions) != 1 else self.regions[0]
+        return f"{self.release} · {regions} · {self.start:%Y-%m}–{self.end:%Y-%m} · {self.quality}"
+
+
+# ─────────────────────────────────────────────
+# SHARED BASE DATA
+# ─────────────────────────────────────────────
+@perf.profiled
+def write_base(path, root=None):
+    """Parse release ``path`` once into memory-mappable Arrow files; returns ``(version, files, meta)``."""
+    from pyarrow import feather
+
+    root = root or os.path.join(analytics.cache_dir(), "scenarios")
+    os.makedirs(root, exist_ok=True)
+    version = analytics.dataset_version(path)
+    files = tuple(os.path.join(root, f"{version}.{name}.arrow") for name in ("people", "pct"))
+    if not all(os.path.exists(f) for f in files):
+        for frame, file in zip(analytics.load_data(path), files):
+            # Uncompressed, so workers map the pages instead of decoding them
+            analytics.write_atomic(file, lambda tmp, frame=frame: feather.write_feather(frame, tmp, compression="uncompressed"))
+    wide_pct = feather.read_table(files[1], columns=["Region", "date"], memory_map=True).to_pandas()
+    meta = dict(regions=sorted(wide_pct["Region"].unique()),
+                min_date=wide_pct["date"].min(), max_date=wide_pct["date"].max())
+    return version, files, meta
+
+
+_BASES = {}
+_BASES_LOCK = threading.Lock()
+
+
+def _load_base(files):
+    # One mapping per worker process, reused by every scenario it runs
+    with _BASES_LOCK:
+        if files not in _BASES:
+            from pyarrow import feather
+
+            _BASES[files] = tuple(feather.read_table(f, memory_map=True).to_pandas() for f in files)
+        return _BASES[files]
+
+
+# ─────────────────────────────────────────────
+# SCENARIOS
+# ─────────────────────────────────────────────
+def parse_windows(text):
+    """``"2017-2019,2022"`` → ``[(2017, 2019), (2022, 2022)]``."""
+    windows = []
+    for part in filter(None, (p.strip() for p in text.split(","))):
+        first, _, last = part.partition("-")
+        windows.append((int(first), int(last or first)))
+    return windows
+
+
+def expand(release, source, files, meta, per_region=False, per_year=False, windows=(), qualities=("include",)):
+    """Every scenario for one release: all regions and the full range, plus the requested splits."""
+    region_sets = [tuple(meta["regions"])] + ([(r,) for r in meta["regions"]] if per_region else [])
+    first, last = meta["min_date"], meta["max_date"]
+    spans = [(first, last)]
+    if per_year:
+        spans += [(pd.Timestamp(year, 1, 1), pd.Timestamp(year, 12, 1)) for year in range(first.year, last.year + 1)]
+    spans += [(pd.Timestamp(a, 1, 1), pd.Timestamp(b, 12, 1)) for a, b in windows]
+    # Clip to the data so a window past the last release month keys like the full one
+    spans = list(dict.fromkeys((max(a, first), min(b, last)) for a, b in spans if a <= last and b >= first))
+    return [Scenario(release, source, files, regions, start, end, quality)
+            for regions in region_sets for start, end in spans for quality in qualities]
+
+
+def run_scenario(scenario):
+    """Worker entry point: the ten question payloads for ``scenario``."""
+    start = time.perf_counter()
+    wide_people, wide_pct = _load_base(scenario.base)
+    wp, wpl = analytics.filter_frames(wide_people, wide_pct, scenario.regions, scenario.start, scenario.end)
+    if wp.empty:
+        return scenario, None, time.perf_counter() - start
+    tables = analytics.compute_tables(wp, wpl, scenario.quality)
+    with warnings.catch_warnings():
+        # One region over one year is often a handful of near-identical values
+        warnings.simplefilter("ignore", RuntimeWarning)
+        payloads = report.section_payloads(tables)
+    return scenario, payloads, time.perf_counter() - start
+
+
+# ─────────────────────────────────────────────
+# RESULTS STORE
+# ─────────────────────────────────────────────
+class ResultsStore:
+    """SQLite file of scenario outputs, one table per question output, each indexed by scenario key."""
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(analytics.cache_dir(), "scenarios.sqlite")
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS scenarios (
+                    key TEXT PRIMARY KEY, label TEXT, release TEXT, source TEXT, regions TEXT,
+                    start TEXT, "end" TEXT, quality TEXT, status TEXT, seconds REAL, created REAL)
+            """)
+            self._conn.execute("CREATE TABLE IF NOT EXISTS scalars (key TEXT, question TEXT, name TEXT, value REAL)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scalars_key ON scalars (key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_scalars_name ON scalars (question, name)")
+
+    def keys(self):
+        with self._lock:
+            return {row[0] for row in self._conn.execute("SELECT key FROM scenarios")}
+
+    def outputs(self):
+        with self._lock:
+            return sorted(row[0] for row in self._conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT IN ('scenarios', 'scalars')"))
+
+    def write(self, scenario, payloads, seconds):
+        """Store one scenario's outputs in a single transaction."""
+        key = scenario.key
+        with self._lock, self._conn:
+            for question, payload in (payloads or {}).items():
+                for name, value in payload.items():
+                    if isinstance(value, pd.DataFrame):
+                        table = f"{question}_{name}"
+                        frame = value.reset_index(drop=True)
+                        for col in frame.columns[frame.dtypes.map(pd.api.types.is_datetime64_any_dtype)]:
+                            frame[col] = frame[col].dt.strftime("%Y-%m-%d")
+                        frame.insert(0, "key", key)
+                        frame.insert(1, "rank", np.arange(len(frame)))
+                        frame.to_sql(table, self._conn, if_exists="append", index=False)
+                        self._conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_key" ON "{table}" (key)')
+                    else:
+                        self._conn.execute("INSERT INTO scalars VALUES (?, ?, ?, ?)",
+                                           (key, question, name, float(value)))
+            self._conn.execute("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", (
+                key, scenario.label, scenario.release, scenario.source, ",".join(scenario.regions),
+                f"{scenario.start:%Y-%m-%d}", f"{scenario.end:%Y-%m-%d}", scenario.quality,
+                "ok" if payloads else "no data", seconds, time.time(),
+            ))
+
+    def scenarios(self):
+        with self._lock:
+            return pd.read_sql_query('SELECT * FROM scenarios ORDER BY release, regions, start, "end", quality',
+                                     self._conn)
+
+    def load(self, output, keys=None):
+        """One output (e.g. ``q8_fastest``) across scenarios, joined to their labels."""
+        if output == "scalars" or output in self.outputs():
+            where, params = "", []
+            if keys is not None:
+                keys = list(keys)
+                where, params = f"WHERE o.key IN ({', '.join('?' * len(keys))})", keys
+            with self._lock:
+                return pd.read_sql_query(
+                    f'SELECT s.label, o.* FROM "{output}" o JOIN scenarios s ON s.key = o.key {where}',
+                    self._conn, params=params)
+        raise KeyError(f"No output {output!r}; stored: {', '.join(['scalars', *self.outputs()])}")
+
+
+# ─────────────────────────────────────────────
+# RUNNER
+# ─────────────────────────────────────────────
+@perf.profiled
+def run(paths, store, workers=None, per_region=False, per_year=False, windows=(), qualities=("include",),
+        base_dir=None):
+    """Compute every scenario not yet in ``store``; returns ``(ran, skipped)`` counts."""
+    scenarios = []
+    for path in paths:
+        version, files, meta = write_base(path, base_dir)
+        scenarios += expand(version, os.path.abspath(path), files, meta,
+                            per_region=per_region, per_year=per_year, windows=windows, qualities=qualities)
+    done = store.keys()
+    todo = list({s.key: s for s in scenarios if s.key not in done}.values())
+    if todo:
+        with ProcessPoolExecutor(max_workers=workers or min(len(todo), os.cpu_count() or 1)) as pool:
+            # Results are written as they arrive; the store has a single writer, this process
+            for scenario, payloads, seconds in pool.map(run_scenario, todo, chunksize=max(1, len(todo) // 32)):
+                store.write(scenario, payloads, seconds)
+    return len(todo), len(scenarios) - len(todo)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--data", nargs="+", default=[analytics.DEFAULT_DATA_PATH], help="one CSV per dataset release")
+    parser.add_argument("--store", help="results database (default: <cache dir>/scenarios.sqlite)")
+    parser.add_argument("--per-region", action="store_true", help="also run each region on its own")
+    parser.add_argument("--per-year", action="store_true", help="also run each calendar year on its own")
+    parser.add_argument("--windows", type=parse_windows, default=[], help="extra year windows, e.g. 2017-2019,2022")
+    parser.add_argument("--quality", nargs="+", choices=analytics.QUALITY_MODES, default=["include"])
+    parser.add_argument("--workers", type=int, help="worker processes (default: up to the CPU count)")
+    parser.add_argument("--list", action="store_true", help="list stored scenarios and outputs instead")
+    parser.add_argument("--show", help="print one stored output (e.g. q8_fastest or scalars)")
+    args = parser.parse_args(argv)
+
+    store = ResultsStore(args.store)
+    if args.list:
+        print(store.scenarios()[["key", "label", "status", "seconds"]].to_string(index=False))
+        print("\noutputs: " + ", ".join(["scalars", *store.outputs()]))
+        return
+    if args.show:
+        try:
+            output = store.load(args.show)
+        except KeyError:
+            parser.error(f"no stored output {args.show!r}; choose from: {', '.join(['scalars', *store.outputs()])}")
+        print(output.to_string(index=False))
+        return
+
+    start = time.perf_counter()
+    ran, skipped = run(args.data, store, args.workers, args.per_region, args.per_year, args.windows, tuple(args.quality))
+    print(f"{ran} scenarios run, {skipped} already stored, in {time.perf_counter() - start:.1f}s → {store.path}")
+
+
+if __name__ == "__main__":
+    main()
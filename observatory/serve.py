@@ -0,0 +1,58 @@
+"""Launch the dashboard with its caches warmed before the first session.
+
+    python -m observatory.serve [streamlit run options ...]
+
+The dataset is loaded into the shared backend before the server starts
+listening. The default-filter analytics and the deferred imports in
+``startup.HEAVY_MODULES`` (scipy.stats, sklearn's clustering and
+nearest-neighbour modules, plotly.express) are then warmed in the background
+as soon as the Streamlit runtime exists, so the first user after a deploy
+renders from warm caches.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from observatory import startup
+
+# The cached functions are decorated before the runtime exists; that is
+# expected here, so silence streamlit's "No runtime found" warning
+logging.getLogger("streamlit.runtime.caching.cache_data_api").addFilter(
+    lambda record: "No runtime found" not in record.getMessage()
+)
+
+with startup.timed("import.streamlit"):
+    from streamlit.web import cli as stcli
+    from observatory import cached
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+
+def _warm_when_ready(file, kind):
+    from streamlit.runtime import Runtime
+
+    while not Runtime.exists():
+        time.sleep(0.05)
+    with startup.timed("prewarm.analytics"):
+        cached.prewarm(file, kind)
+    startup.import_heavy()
+    startup.mark_once("prewarm.done")
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+    argv = sys.argv[1:] if argv is None else argv
+
+    file, kind = cached.DEFAULT_DATA_PATH, cached.DATA_BACKEND
+    with startup.timed("prewarm.backend"):
+        cached.get_backend(file, kind)
+    threading.Thread(target=_warm_when_ready, args=(file, kind), daemon=True).start()
+
+    sys.argv = ["streamlit", "run", APP_PATH, *argv]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""Similar-crises search: nearest historical analogues of a country's recent trajectory.
+
+Every (country, window) slice of the quarterly phase-composition trajectories
+from :mod:`observatory.clustering` becomes one feature vector — the Phase 1–5
+shares over ``window`` consecutive quarters, flattened. A BallTree over those
+vectors is built once per dataset version and pickled to the cache directory,
+so later processes load it instead of rebuilding, and a query costs a single
+tree lookup.
+
+Only windows inside a country's observed span are embedded. The outcome of a
+window is its Phase 3+ share ``horizon`` quarters after the window ends, and
+only windows whose outcome is already on record go into the tree, so every
+analogue returned comes with what happened next.
+"""
+import os
+import pickle
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, clustering
+from observatory.perf import profiled
+
+WINDOW = 4
+HORIZON = 4
+
+
+@dataclass
+class SimilarityIndex:
+    """BallTree over trajectory windows plus what is needed to describe each hit."""
+    version: str
+    window: int
+    horizon: int
+    units: np.ndarray
+    periods: pd.DatetimeIndex
+    crisis_plus: np.ndarray     # unit × period Phase 3+ share (%), NaN where unobserved
+    unit_of: np.ndarray         # per embedded window: unit row
+    end_of: np.ndarray          # per embedded window: period column of its last quarter
+    features: np.ndarray
+    candidates: np.ndarray      # embedded windows with a known outcome, in tree order
+    tree: object
+
+    def window_features(self, unit, end):
+        match = np.flatnonzero((self.unit_of == unit) & (self.end_of == end))
+        if not len(match):
+            raise KeyError(f"no fully observed {self.window}-quarter window for {self.units[unit]!r} "
+                           f"ending {self.periods[min(end, len(self.periods) - 1)]:%Y-%m}")
+        return self.features[match[0]]
+
+    def latest_window(self, country):
+        """(unit, end) of the most recent indexed window for ``country``, or None."""
+        unit = np.flatnonzero(self.units == country)
+        if not len(unit):
+            return None
+        ends = self.end_of[self.unit_of == unit[0]]
+        return (int(unit[0]), int(ends.max())) if len(ends) else None
+
+    @profiled
+    def query(self, country, k=5, end=None):
+        """Top ``k`` analogues of ``country``'s window ending at ``end`` (default: its latest).
+
+        Windows of the same country that overlap the query window are
+        skipped, since they trivially resemble it.
+        """
+        if k < 1:
+            raise ValueError(f"k must be at least 1, got {k}")
+        if end is None:
+            found = self.latest_window(country)
+            if found is None:
+                raise KeyError(f"no indexed window for {country!r}")
+            unit, end_col = found
+        else:
+            unit = np.flatnonzero(self.units == country)
+            if not len(unit):
+                raise KeyError(f"unknown country {country!r}")
+            unit = int(unit[0])
+            end_col = int(self.periods.searchsorted(pd.Timestamp(end), side="right")) - 1
+            if end_col < 0:
+                raise KeyError(f"no indexed window for {country!r} ending {pd.Timestamp(end):%Y-%m}; "
+                               f"the first indexed quarter is {self.periods[0]:%Y-%m}")
+        x = self.window_features(unit, end_col)
+
+        # At most 2·window − 1 hits can be overlapping windows of the same unit
+        n_query = min(len(self.candidates), k + 2 * self.window - 1)
+        dist, idx = self.tree.query(x[None, :], k=n_query)
+        dist, idx = dist[0], self.candidates[idx[0]]
+        overlap = (self.unit_of[idx] == unit) & (np.abs(self.end_of[idx] - end_col) < self.window)
+        dist, idx = dist[~overlap][:k], idx[~overlap][:k]
+
+        units, ends = self.unit_of[idx], self.end_of[idx]
+        now = self.crisis_plus[units, ends]
+        later = self.crisis_plus[units, ends + self.horizon]
+        return pd.DataFrame({
+            "country": self.units[units],
+            "window_start": self.periods[ends - self.window + 1],
+            "window_end": self.periods[ends],
+            "distance": dist,
+            "crisis_plus_pct": now,
+            f"crisis_plus_pct_{self.horizon}q_later": later,
+            "change": later - now,
+        })
+
+    def trajectory(self, unit, end, before=None, after=None):
+        """Phase 3+ share around window ``(unit, end)``, indexed by quarters relative to ``end``."""
+        before = self.window - 1 if before is None else before
+        after = self.horizon if after is None else after
+        cols = np.arange(end - before, end + after + 1)
+        valid = (cols >= 0) & (cols < len(self.periods))
+        values = np.full(len(cols), np.nan)
+        values[valid] = self.crisis_plus[unit, cols[valid]]
+        return pd.Series(values, index=pd.Index(cols - end, name="quarter"))
+
+
+@profiled
+def build_index(traj, version, window=WINDOW, horizon=HORIZON):
+    """Embed every fully observed ``window``-quarter slice of ``traj`` and index it."""
+    from sklearn.neighbors import BallTree
+
+    n, T, P = traj.values.shape
+    if T < window:
+        raise ValueError(f"need at least {window} periods to index windows, have {T}")
+    # Sliding windows as a strided view: (unit, start, quarter, phase)
+    views = np.lib.stride_tricks.sliding_window_view(traj.values, window, axis=1)
+    views = np.moveaxis(views, -1, 2)
+    full = np.lib.stride_tricks.sliding_window_view(traj.observed, window, axis=1).all(axis=2)
+    unit_of, start_of = np.nonzero(full)
+    features = np.ascontiguousarray(views[unit_of, start_of].reshape(len(unit_of), window * P))
+
+    crisis_plus = traj.values[:, :, 2:].sum(axis=2).astype(float) * 100
+    crisis_plus[~traj.observed] = np.nan
+    end_of = start_of + window - 1
+    outcome_col = end_of + horizon
+    has_outcome = np.zeros(len(end_of), dtype=bool)
+    in_range = outcome_col < T
+    has_outcome[in_range] = traj.observed[unit_of[in_range], outcome_col[in_range]]
+    candidates = np.flatnonzero(has_outcome)
+    if not len(candidates):
+        raise ValueError(f"no window has an observed outcome {horizon} quarters later")
+    return SimilarityIndex(
+        version=version, window=window, horizon=horizon,
+        units=traj.units, periods=traj.periods, crisis_plus=crisis_plus,
+        unit_of=unit_of, end_of=end_of, features=features,
+        candidates=candidates, tree=BallTree(features[candidates]),
+    )
+
+
+def index_path(version, window=WINDOW, horizon=HORIZON):
+    return os.path.join(analytics.cache_dir(), f"similarity-{version}-w{window}-h{horizon}.pkl")
+
+
+@profiled
+def load_or_build(backend, window=WINDOW, horizon=HORIZON):
+    """The persisted index for ``backend``'s dataset version, building and saving it on first use."""
+    path = index_path(backend.version, window, horizon)
+    try:
+        with open(path, "rb") as f:
+            return pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+    traj = clustering.build_trajectories(backend.phase_composition())
+    index = build_index(traj, backend.version, window, horizon)
+    def _dump(tmp):
+        with open(tmp, "wb") as f:
+            pickle.dump(index, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+    # Write then rename, so concurrent workers never read a partial file
+    analytics.write_atomic(path, _dump)
+    return index
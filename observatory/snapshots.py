@@ -0,0 +1,236 @@
+"""Every ingested IPC release, kept side by side, and a fast diff between any two.
+
+Each release is parsed into the wide (iso3, month) frame of
+:func:`observatory.datasets.read_indicator` and split into one block per
+country. A block is stored as a Parquet file named by a digest of its keys
+and per-row content hashes. An unchanged country therefore maps to the
+same file in every release and is written once. A release itself is a
+small JSON manifest mapping iso3 to block digest::
+
+    <cache_dir>/snapshots/blocks/ab/abcdef….parquet
+    <cache_dir>/snapshots/releases/<version>.json
+
+Diffing two releases compares their manifests first. Only countries whose
+digests differ have their blocks read, and only those rows are compared.
+A new release that revises a handful of countries costs a handful of small
+reads, not two full datasets::
+
+    python -m observatory.snapshots ingest IPC_IPC_PHASE.csv
+    python -m observatory.snapshots list
+    python -m observatory.snapshots diff <old> <new>
+"""
+import argparse
+import hashlib
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from observatory import analytics, datasets
+from observatory.perf import profiled
+
+INDICATOR = "IPC_IPC_PHASE"
+ID_COLUMNS = ("key", "iso3", "country", "date")
+DIFF_COLUMNS = ["iso3", "country", "date", "series", "old", "new", "change", "status"]
+
+
+def row_hashes(frame, columns):
+    """One uint64 per row over ``columns``; NaN hashes consistently."""
+    return pd.util.hash_pandas_object(frame[list(columns)], index=False).to_numpy()
+
+
+def block_digest(keys, hashes, columns):
+    h = hashlib.sha256()
+    h.update("\0".join(columns).encode())
+    h.update(np.ascontiguousarray(keys, dtype=np.int64).tobytes())
+    h.update(np.ascontiguousarray(hashes, dtype=np.uint64).tobytes())
+    return h.hexdigest()[:32]
+
+
+class SnapshotStore:
+    """Content-addressed store of IPC releases under ``root`` (default: the cache dir)."""
+
+    def __init__(self, root=None):
+        self.root = root or os.path.join(analytics.cache_dir(), "snapshots")
+        self.blocks_dir = os.path.join(self.root, "blocks")
+        self.releases_dir = os.path.join(self.root, "releases")
+        os.makedirs(self.blocks_dir, exist_ok=True)
+        os.makedirs(self.releases_dir, exist_ok=True)
+        self._lock = threading.Lock()
+
+    # ── writing ──────────────────────────────
+    def _block_path(self, digest):
+        return os.path.join(self.blocks_dir, digest[:2], f"{digest}.parquet")
+
+    def _release_path(self, version):
+        # Versions may come from a query string; never let one name a path outside the store
+        if not analytics.is_dataset_version(version):
+            raise ValueError(f"Not a dataset version: {version!r}")
+        return os.path.join(self.releases_dir, f"{version}.json")
+
+    @profiled
+    def ingest(self, path, version=None):
+        """Store the release in ``path`` unless it is already stored; returns its manifest."""
+        version = version or analytics.dataset_version(path)
+        with self._lock:
+            if os.path.exists(self._release_path(version)):
+                return self.manifest(version)
+
+            frame = datasets.read_indicator(path, datasets.SCHEMAS[INDICATOR])
+            columns = [c for c in frame.columns if c not in ID_COLUMNS]
+            hashes = row_hashes(frame, columns)
+            iso3 = frame["iso3"].to_numpy()
+            # Frames are sorted by key, whose high bits are the country, so
+            # every country's rows are one contiguous run
+            starts = np.flatnonzero(np.r_[True, iso3[1:] != iso3[:-1]])
+            ends = np.r_[starts[1:], len(frame)]
+
+            blocks, written = {}, 0
+            keys = frame["key"].to_numpy()
+            for a, b in zip(starts, ends):
+                digest = block_digest(keys[a:b], hashes[a:b], columns)
+                blocks[iso3[a]] = digest
+                block_path = self._block_path(digest)
+                if not os.path.exists(block_path):
+                    os.makedirs(os.path.dirname(block_path), exist_ok=True)
+                    block = frame.iloc[a:b].assign(row_hash=hashes[a:b])
+                    analytics.write_atomic(block_path, lambda tmp: block.to_parquet(tmp, index=False))
+                    written += 1
+
+            manifest = {
+                "version": version,
+                "source": os.path.abspath(path),
+                "ingested_at": time.time(),
+                "indicator": INDICATOR,
+                "columns": columns,
+                "rows": int(len(frame)),
+                "new_blocks": written,
+                "blocks": blocks,
+            }
+
+            def _dump(tmp):
+                with open(tmp, "w") as f:
+                    json.dump(manifest, f)
+
+            analytics.write_atomic(self._release_path(version), _dump)
+            return manifest
+
+    # ── reading ──────────────────────────────
+    def manifest(self, version):
+        try:
+            with open(self._release_path(version)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise KeyError(f"No stored release {version!r}") from None
+
+    def releases(self):
+        """Stored releases, oldest first, without their block maps."""
+        rows = []
+        for name in os.listdir(self.releases_dir):
+            if name.endswith(".json") and analytics.is_dataset_version(name[:-5]):
+                m = self.manifest(name[:-5])
+                rows.append({k: m[k] for k in ("version", "source", "ingested_at", "rows", "new_blocks")}
+                            | {"countries": len(m["blocks"])})
+        out = pd.DataFrame(rows, columns=["version", "source", "ingested_at", "rows", "new_blocks", "countries"])
+        out["ingested_at"] = pd.to_datetime(out["ingested_at"], unit="s")
+        return out.sort_values("ingested_at", ignore_index=True)
+
+    def read_block(self, digest):
+        return pd.read_parquet(self._block_path(digest))
+
+    def load(self, version, countries=None):
+        """The wide frame of a stored release, optionally only ``countries`` (iso3)."""
+        blocks = self.manifest(version)["blocks"]
+        wanted = blocks if countries is None else [c for c in countries if c in blocks]
+        frames = [self.read_block(blocks[c]) for c in sorted(wanted)]
+        if not frames:
+            return pd.DataFrame(columns=[*ID_COLUMNS, "row_hash"])
+        return pd.concat(frames, ignore_index=True).drop(columns="row_hash")
+
+    # ── diffing ──────────────────────────────
+    @profiled
+    def diff(self, old, new):
+        """Long frame of every (country, month, series) value that differs between two releases.
+
+        ``status`` is ``added`` / ``removed`` for months present in only one
+        release and ``revised`` for values changed in place.
+        """
+        old_blocks, new_blocks = self.manifest(old)["blocks"], self.manifest(new)["blocks"]
+        changed = sorted(c for c in old_blocks.keys() | new_blocks.keys()
+                         if old_blocks.get(c) != new_blocks.get(c))
+        if not changed:
+            return pd.DataFrame(columns=DIFF_COLUMNS)
+
+        def _rows(blocks):
+            frames = [self.read_block(blocks[c]) for c in changed if c in blocks]
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=[*ID_COLUMNS, "row_hash"])
+
+        a, b = _rows(old_blocks), _rows(new_blocks)
+        # Rows whose content hash matches are identical; drop them before aligning
+        same = a[["key", "row_hash"]].merge(b[["key", "row_hash"]], on=["key", "row_hash"])["key"]
+        a, b = a[~a["key"].isin(same)].set_index("key"), b[~b["key"].isin(same)].set_index("key")
+        series = [c for c in dict.fromkeys([*a.columns, *b.columns]) if c not in (*ID_COLUMNS, "row_hash")]
+        keys = a.index.union(b.index)
+        ids = b.reindex(columns=["iso3", "country", "date"]).combine_first(
+            a.reindex(columns=["iso3", "country", "date"])).reindex(keys)
+
+        old_v = a.reindex(index=keys, columns=series).to_numpy(dtype=float)
+        new_v = b.reindex(index=keys, columns=series).to_numpy(dtype=float)
+        differs = ~((old_v == new_v) | (np.isnan(old_v) & np.isnan(new_v)))
+        r, c = np.nonzero(differs)
+        status = np.where(~keys.isin(a.index)[r], "added",
+                          np.where(~keys.isin(b.index)[r], "removed", "revised"))
+        out = pd.DataFrame({
+            "iso3": ids["iso3"].to_numpy()[r],
+            "country": ids["country"].to_numpy()[r],
+            "date": ids["date"].to_numpy()[r],
+            "series": np.asarray(series, dtype=object)[c],
+            "old": old_v[r, c],
+            "new": new_v[r, c],
+        })
+        out["change"] = out["new"] - out["old"]
+        out["status"] = status
+        return out.sort_values(["country", "date", "series"], ignore_index=True)
+
+
+def summarize_diff(diff, series="PS.PHASE3PLUS"):
+    """Per-country counts of added / removed / revised months and the net change in ``series``."""
+    months = diff.drop_duplicates(["iso3", "date"])
+    counts = pd.crosstab(months["country"], months["status"]).reindex(
+        columns=["added", "removed", "revised"], fill_value=0)
+    picked = diff[diff["series"] == series]
+    net = (picked["new"].fillna(0) - picked["old"].fillna(0)).groupby(picked["country"]).sum()
+    out = counts.assign(**{f"net_{series}": net.reindex(counts.index).fillna(0)}).reset_index()
+    out.columns.name = None
+    return out.sort_values(f"net_{series}", key=np.abs, ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--root", help="store directory (default: <cache dir>/snapshots)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="store a release")
+    p_ingest.add_argument("path")
+    sub.add_parser("list", help="list stored releases")
+    p_diff = sub.add_parser("diff", help="values that changed between two releases")
+    p_diff.add_argument("old")
+    p_diff.add_argument("new")
+    p_diff.add_argument("--summary", action="store_true", help="one row per country instead")
+    args = parser.parse_args(argv)
+
+    store = SnapshotStore(args.root)
+    if args.command == "ingest":
+        m = store.ingest(args.path)
+        print(f"{m['version']}: {m['rows']} rows, {len(m['blocks'])} countries, {m['new_blocks']} new blocks")
+    elif args.command == "list":
+        print(store.releases().to_string(index=False))
+    else:
+        diff = store.diff(args.old, args.new)
+        print((summarize_diff(diff) if args.summary else diff).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
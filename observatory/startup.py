@@ -0,0 +1,56 @@
+"""Startup-time instrumentation for the dashboard process.
+
+Stages are timed relative to the first import of this module, which the
+launcher (``observatory.serve``) does before anything else, and are logged
+under the ``observatory.startup`` logger so replica cold starts can be
+compared from the server logs.
+"""
+import importlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger("observatory.startup")
+
+T0 = time.perf_counter()
+TIMINGS = {}
+_lock = threading.Lock()
+
+# Imported only by the tabs that need them; see import_heavy(). sklearn.cluster
+# and sklearn.neighbors are the deferred imports of clustering and similarity
+HEAVY_MODULES = ("scipy.stats", "sklearn.cluster", "sklearn.neighbors", "plotly.express")
+
+
+def _record(stage, seconds):
+    with _lock:
+        TIMINGS[stage] = seconds
+    logger.info("%s: %.3fs", stage, seconds)
+
+
+@contextmanager
+def timed(stage):
+    """Record how long the enclosed block takes under ``stage``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        _record(stage, time.perf_counter() - start)
+
+
+def mark_once(stage):
+    """Record seconds since process start the first time ``stage`` is reached."""
+    if stage not in TIMINGS:
+        _record(stage, time.perf_counter() - T0)
+
+
+def import_heavy():
+    """Import the deferred modules so later tab renders find them in sys.modules."""
+    for name in HEAVY_MODULES:
+        with timed(f"import.{name}"):
+            importlib.import_module(name)
+
+
+def report():
+    with _lock:
+        return dict(TIMINGS)
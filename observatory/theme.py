@@ -0,0 +1,286 @@
+"""Shared look of the dashboard pages: page CSS and the Plotly theme.
+
+Every Streamlit page script renders on its own, so each one applies
+:data:`CSS` and builds its figures from these constants.
+"""
+
+# ─────────────────────────────────────────────
+# CUSTOM CSS — Dark editorial aesthetic
+# ─────────────────────────────────────────────
+CSS = """
+<style>
+@import url('https://fonts.googleapis.com/css2?family=DM+Serif+Display:ital@0;1&family=DM+Sans:ital,opsz,wght@0,9..40,300;0,9..40,400;0,9..40,600;1,9..40,300&family=JetBrains+Mono:wght@400;700&display=swap');
+
+/* ── Root palette ── */
+:root {
+    --bg:         #0d0f14;
+    --surface:    #151820;
+    --surface2:   #1c2030;
+    --border:     #252b3b;
+    --gold:       #e8b84b;
+    --gold-light: #f5d07a;
+    --crimson:    #d94f4f;
+    --teal:       #3ecfb2;
+    --muted:      #6b7696;
+    --text:       #e8eaf2;
+    --text-dim:   #a0a8c0;
+}
+
+/* ── Base reset ── */
+html, body, [class*="css"], .stApp {
+    background-color: var(--bg) !important;
+    color: var(--text) !important;
+    font-family: 'DM Sans', sans-serif !important;
+}
+
+/* ── Sidebar ── */
+[data-testid="stSidebar"] {
+    background-color: var(--surface) !important;
+    border-right: 1px solid var(--border) !important;
+}
+[data-testid="stSidebar"] * { color: var(--text) !important; }
+
+/* ── Headers ── */
+h1, h2, h3, h4 {
+    font-family: 'DM Serif Display', serif !important;
+    color: var(--text) !important;
+    letter-spacing: -0.02em;
+}
+
+/* ── Metrics ── */
+[data-testid="metric-container"] {
+    background: var(--surface2) !important;
+    border: 1px solid var(--border) !important;
+    border-radius: 12px !important;
+    padding: 20px !important;
+}
+[data-testid="metric-container"] label {
+    color: var(--muted) !important;
+    font-size: 0.75rem !important;
+    text-transform: uppercase !important;
+    letter-spacing: 0.12em !important;
+    font-weight: 600 !important;
+}
+[data-testid="metric-container"] [data-testid="stMetricValue"] {
+    font-family: 'JetBrains Mono', monospace !important;
+    font-size: 2rem !important;
+    color: var(--gold) !important;
+}
+[data-testid="metric-container"] [data-testid="stMetricDelta"] {
+    font-family: 'JetBrains Mono', monospace !important;
+}
+
+/* ── Tabs ── */
+[data-testid="stTabs"] button {
+    font-family: 'DM Sans', sans-serif !important;
+    font-weight: 600 !important;
+    color: var(--muted) !important;
+    border-bottom: 2px solid transparent !important;
+    background: transparent !important;
+}
+[data-testid="stTabs"] button[aria-selected="true"] {
+    color: var(--gold) !important;
+    border-bottom-color: var(--gold) !important;
+}
+
+/* ── Selectboxes & sliders ── */
+[data-testid="stSelectbox"] > div > div,
+[data-testid="stMultiSelect"] > div > div {
+    background-color: var(--surface2) !important;
+    border-color: var(--border) !important;
+    color: var(--text) !important;
+}
+
+/* ── Dividers ── */
+hr {
+    border-color: var(--border) !important;
+    margin: 2rem 0 !important;
+}
+
+/* ── Plotly charts: transparent background ── */
+.js-plotly-plot .plotly, .js-plotly-plot .plotly .main-svg {
+    background: transparent !important;
+}
+
+/* ── Custom hero banner ── */
+.hero-banner {
+    background: linear-gradient(135deg, #151820 0%, #1a1f2e 50%, #0d1117 100%);
+    border: 1px solid var(--border);
+    border-radius: 16px;
+    padding: 40px 48px;
+    margin-bottom: 2rem;
+    position: relative;
+    overflow: hidden;
+}
+.hero-banner::before {
+    content: '';
+    position: absolute;
+    top: -60px; right: -60px;
+    width: 300px; height: 300px;
+    background: radial-gradient(circle, rgba(232,184,75,0.08) 0%, transparent 70%);
+    pointer-events: none;
+}
+.hero-title {
+    font-family: 'DM Serif Display', serif;
+    font-size: 2.8rem;
+    line-height: 1.1;
+    color: var(--text);
+    margin: 0 0 8px 0;
+}
+.hero-subtitle {
+    font-size: 1rem;
+    color: var(--muted);
+    margin: 0;
+    max-width: 600px;
+    line-height: 1.6;
+}
+.hero-tag {
+    display: inline-block;
+    background: rgba(232,184,75,0.12);
+    color: var(--gold);
+    font-size: 0.7rem;
+    font-weight: 700;
+    letter-spacing: 0.15em;
+    text-transform: uppercase;
+    padding: 4px 12px;
+    border-radius: 100px;
+    border: 1px solid rgba(232,184,75,0.25);
+    margin-bottom: 16px;
+}
+
+/* ── Section labels ── */
+.section-label {
+    font-size: 0.7rem;
+    font-weight: 700;
+    letter-spacing: 0.18em;
+    text-transform: uppercase;
+    color: var(--gold);
+    margin-bottom: 4px;
+}
+.section-title {
+    font-family: 'DM Serif Display', serif;
+    font-size: 1.6rem;
+    color: var(--text);
+    margin: 0 0 8px 0;
+}
+.section-desc {
+    color: var(--text-dim);
+    font-size: 0.9rem;
+    line-height: 1.6;
+    margin-bottom: 24px;
+}
+
+/* ── Insight cards ── */
+.insight-card {
+    background: var(--surface2);
+    border: 1px solid var(--border);
+    border-left: 3px solid var(--gold);
+    border-radius: 10px;
+    padding: 16px 20px;
+    margin-top: 12px;
+    font-size: 0.88rem;
+    color: var(--text-dim);
+    line-height: 1.6;
+}
+.insight-card strong { color: var(--gold); }
+
+/* ── Stat highlight ── */
+.stat-row {
+    display: flex;
+    gap: 12px;
+    margin-bottom: 20px;
+    flex-wrap: wrap;
+}
+.stat-chip {
+    background: rgba(232,184,75,0.08);
+    border: 1px solid rgba(232,184,75,0.2);
+    border-radius: 8px;
+    padding: 8px 16px;
+    font-family: 'JetBrains Mono', monospace;
+    font-size: 0.85rem;
+    color: var(--gold-light);
+}
+
+/* ── Footer ── */
+.footer {
+    text-align: center;
+    color: var(--muted);
+    font-size: 0.78rem;
+    padding: 32px 0 16px;
+    border-top: 1px solid var(--border);
+    margin-top: 40px;
+}
+
+/* ── Hide streamlit branding ── */
+#MainMenu, footer, header { visibility: hidden; }
+</style>
+"""
+
+# ─────────────────────────────────────────────
+# PLOTLY THEME
+# ─────────────────────────────────────────────
+_BASE_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)",
+    plot_bgcolor="rgba(0,0,0,0)",
+    font=dict(family="DM Sans, sans-serif", color="#a0a8c0", size=12),
+    title_font=dict(family="DM Serif Display, serif", color="#e8eaf2", size=18),
+    legend=dict(
+        bgcolor="rgba(21,24,32,0.8)", bordercolor="#252b3b", borderwidth=1,
+        font=dict(color="#a0a8c0")
+    ),
+    margin=dict(l=20, r=20, t=50, b=20),
+    hoverlabel=dict(bgcolor="#1c2030", bordercolor="#252b3b", font=dict(color="#e8eaf2")),
+)
+
+_AXIS_STYLE = dict(
+    xaxis=dict(gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696")),
+    yaxis=dict(gridcolor="#1c2030", zerolinecolor="#252b3b", tickfont=dict(color="#6b7696")),
+)
+
+# Full layout with axes (for cartesian charts)
+PLOTLY_LAYOUT = {**_BASE_LAYOUT, **_AXIS_STYLE}
+
+# Map-safe layout without xaxis/yaxis (for choropleth/geo charts)
+PLOTLY_MAP_LAYOUT = {**_BASE_LAYOUT}
+
+GOLD = "#e8b84b"
+CRIMSON = "#d94f4f"
+TEAL = "#3ecfb2"
+MUTED = "#6b7696"
+
+COLOR_SEQ = [GOLD, TEAL, CRIMSON, "#9b7fe8", "#4fc3f7", "#ff8a65", "#81c784"]
+
+# One colour per IPC phase, Minimal → Catastrophe
+PHASE_COLORS = ["#3a7d44", "#8ab34a", GOLD, "#d97a2a", CRIMSON]
+
+MAP_COLORSCALE = [
+    [0,   "#1c2030"],
+    [0.2, "#3a5a4a"],
+    [0.4, "#8ab34a"],
+    [0.6, "#e8b84b"],
+    [0.8, "#d97a2a"],
+    [1.0, "#d94f4f"],
+]
+MAP_COLORBAR = dict(
+    title=dict(text="Phase 3+ %", font=dict(color="#a0a8c0")),
+    tickfont=dict(color="#a0a8c0"),
+    bgcolor="rgba(21,24,32,0.8)",
+    bordercolor="#252b3b",
+    borderwidth=1,
+)
+MAP_FIGURE_LAYOUT = dict(
+    paper_bgcolor="rgba(0,0,0,0)",
+    margin=dict(l=0, r=0, t=45, b=0),
+    font=dict(family="DM Sans, sans-serif", color="#a0a8c0"),
+    hoverlabel=dict(bgcolor="#1c2030", bordercolor="#252b3b", font=dict(color="#e8eaf2")),
+    geo=dict(
+        bgcolor="rgba(0,0,0,0)",
+        showframe=False,
+        showcoastlines=True,
+        coastlinecolor="#252b3b",
+        showland=True, landcolor="#1a1f2c",
+        showocean=True, oceancolor="#0d0f14",
+        showlakes=True, lakecolor="#0d0f14",
+        showcountries=True, countrycolor="#252b3b",
+    ),
+)
@@ -0,0 +1,137 @@
+"""Serve the newest build of the source CSV without restarting the server.
+
+A :class:`DatasetWatcher` owns the query backend for one data file. A
+daemon thread polls the file's mtime and size. When they change and hold
+still for one more poll (so a file still being written is left alone), it
+hashes the contents. If that yields a new dataset version, a fresh backend
+is built on the watcher thread while sessions keep querying the old one,
+and then ``current`` is swapped to the new backend in a single assignment.
+Callers that grab ``current`` once per rerun therefore always see one
+consistent build. The previous build stays reachable through
+:meth:`DatasetWatcher.backend` until the next swap. A rerun that read the
+old version just before a swap can therefore still fill its cache entries
+from the data that version names.
+
+An optional ``on_load(path, version)`` callback runs on the watcher thread
+for the initial build and after every swap. For example, it can record
+each release in the snapshot store.
+"""
+import logging
+import os
+import threading
+import time
+
+from observatory import analytics, backends
+
+logger = logging.getLogger("observatory.watcher")
+
+POLL_SECONDS = float(os.environ.get("OBSERVATORY_WATCH_SECONDS", 5))
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+class DatasetWatcher:
+    """The current backend over ``path``, rebuilt in the background when the file's content changes."""
+
+    def __init__(self, path, kind="pandas", interval=POLL_SECONDS, start=True, on_load=None):
+        self.path = path
+        self.kind = kind
+        self.interval = interval
+        self.on_load = on_load
+        self._stat = _stat(path)
+        self.current = backends.create_backend(kind, path)
+        self._builds = {self.current.version: self.current}
+        self.loaded_at = time.time()
+        self.refreshing = False
+        self.last_error = None
+        self._stop = threading.Event()
+        self._thread = None
+        if start:
+            self.start()
+
+    @property
+    def version(self):
+        return self.current.version
+
+    def backend(self, version):
+        """The build serving ``version``: the current one or the one it replaced."""
+        build = self._builds.get(version)
+        if build is None:
+            raise LookupError(f"{os.path.basename(self.path)} build {version} is no longer served "
+                              f"(current: {self.current.version}); rerun to pick up the new build")
+        return build
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name=f"watch:{os.path.basename(self.path)}",
+                                            daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _notify(self):
+        if self.on_load is None:
+            return
+        try:
+            self.on_load(self.path, self.current.version)
+        except Exception:  # a failing hook must not stop the watcher
+            logger.exception("on_load hook failed for %s", self.path)
+
+    def _run(self):
+        self._notify()
+        pending = None
+        while not self._stop.wait(self.interval):
+            stat = _stat(self.path)
+            if stat is None or stat == self._stat:
+                pending = None
+                continue
+            if stat != pending:
+                # Changed since the last poll: wait until it stops changing
+                pending = stat
+                continue
+            pending = None
+            self.check(stat)
+
+    def check(self, stat=None):
+        """Rebuild and swap if the file's content hash differs from the served version.
+
+        Returns True when a new build was swapped in.
+        """
+        stat = stat or _stat(self.path)
+        try:
+            version = analytics.dataset_version(self.path)
+        except OSError as exc:
+            self.last_error = str(exc)
+            return False
+        self._stat = stat
+        if version == self.current.version:
+            return False
+
+        self.refreshing = True
+        start = time.perf_counter()
+        try:
+            fresh = backends.create_backend(self.kind, self.path)
+        except Exception as exc:  # keep serving the previous build
+            self.last_error = f"{type(exc).__name__}: {exc}"
+            logger.exception("rebuilding %s failed; still serving %s", self.path, self.current.version)
+            return False
+        finally:
+            self.refreshing = False
+        previous = self.current
+        # Publish the new build before making it current, so a version read from
+        # ``current`` can always be looked up; older builds are released here
+        self._builds = {previous.version: previous, fresh.version: fresh}
+        self.current = fresh
+        self.loaded_at = time.time()
+        self.last_error = None
+        logger.info("swapped %s: %s -> %s (built in %.2fs)", os.path.basename(self.path),
+                    previous.version, fresh.version, time.perf_counter() - start)
+        self._notify()
+        return True
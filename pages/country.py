@@ -0,0 +1,169 @@
+import streamlit as st
+import numpy as np
+import plotly.graph_objects as go
+import os
+
+from observatory.cached import DATA_BACKEND, DEFAULT_DATA_PATH, get_figure_cache, get_watcher, load_country_profile, load_meta
+from observatory.figure_cache import figure_key
+from observatory.theme import CSS, CRIMSON, GOLD, PHASE_COLORS, PLOTLY_LAYOUT, TEAL
+
+# ─────────────────────────────────────────────
+# PAGE CONFIG
+# ─────────────────────────────────────────────
+st.set_page_config(
+    page_title="Country Profile · Global Food Crisis Observatory",
+    page_icon="🌍",
+    layout="wide",
+)
+st.markdown(CSS, unsafe_allow_html=True)
+
+FIGURES = get_figure_cache()
+PHASE_NAMES = ["Minimal", "Stressed", "Crisis", "Emergency", "Catastrophe"]
+
+DATA_PATH = DEFAULT_DATA_PATH
+if not os.path.exists(DATA_PATH):
+    st.error(f"Dataset not found at: {DATA_PATH}")
+    st.stop()
+
+backend = get_watcher(DATA_PATH, DATA_BACKEND).current
+meta = load_meta(DATA_PATH, DATA_BACKEND, backend.version)
+names = meta["iso3"]
+
+# ─────────────────────────────────────────────
+# COUNTRY SELECTION — deep links via ?iso3=SDN
+# ─────────────────────────────────────────────
+requested = st.query_params.get("iso3", "").upper()
+with st.sidebar:
+    st.page_link("app.py", label="← Dashboard")
+    iso3 = st.selectbox(
+        "Country", list(names),
+        index=list(names).index(requested) if requested in names else 0,
+        format_func=lambda code: f"{names[code]} ({code})",
+    )
+if requested and requested not in names:
+    st.warning(f"No IPC analyses for '{requested}'; showing {names[iso3]} instead.")
+st.query_params["iso3"] = iso3
+
+profile = load_country_profile(DATA_PATH, DATA_BACKEND, backend.version, iso3)
+pct, people, summary = profile["pct"], profile["people"], profile["summary"]
+
+# ─────────────────────────────────────────────
+# HEADER & KPIs
+# ─────────────────────────────────────────────
+st.markdown(f"""
+<div class='hero-banner'>
+  <div class='hero-tag'>Country Profile · {profile['region']}</div>
+  <div class='hero-title'>{profile['country']}</div>
+  <p class='hero-subtitle'>
+    Every IPC analysis on record for {profile['country']}: how the population splits across
+    Phases 1–5, how many people that is, and how fast and how erratically the
+    Phase 3+ share has moved.
+  </p>
+</div>
+""", unsafe_allow_html=True)
+
+k1, k2, k3, k4, k5 = st.columns(5)
+k1.metric("People in Phase 3+", f"{summary['latest_people']/1e6:.2f}M",
+          f"as of {summary['latest_date']:%b %Y}" if summary["latest_date"] is not None else None,
+          delta_color="off")
+k2.metric("Phase 3+ share", f"{summary['latest_pct']:.0f}%",
+          f"peak {summary['peak_pct']:.0f}% ({summary['peak_date']:%b %Y})" if summary["peak_date"] is not None else None,
+          delta_color="off")
+k3.metric("Trend", "—" if np.isnan(summary["slope"]) else f"{summary['slope']:+.2f} pts",
+          "per analysis" + ("" if summary["ranked"] else " · too few to rank"), delta_color="off")
+k4.metric("Volatility (std)", "—" if np.isnan(summary["std"]) else f"{summary['std']:.1f} pts",
+          f"mean {summary['mean']:.1f}%", delta_color="off")
+k5.metric("Analyses", str(summary["observations"]))
+
+st.markdown("<br>", unsafe_allow_html=True)
+
+# ─────────────────────────────────────────────
+# PHASE HISTORY
+# ─────────────────────────────────────────────
+phase_pct = [f"phase_{p}_pct" for p in range(1, 6)]
+phase_people = [f"phase_{p}_people" for p in range(1, 6)]
+
+col_l, col_r = st.columns(2)
+with col_l:
+    st.markdown('<div class="section-label">Phase Composition</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-title">Share of Population by Phase</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-desc">Each analysis stacked from Phase 1 (bottom) to Phase 5 (top).</div>', unsafe_allow_html=True)
+
+    def _build_composition():
+        fig = go.Figure()
+        for col, name, color in zip(phase_pct, PHASE_NAMES, PHASE_COLORS):
+            fig.add_trace(go.Scatter(
+                x=pct["date"], y=pct[col].fillna(0),
+                mode="lines", stackgroup="phases", name=name,
+                line=dict(width=0.5, color=color), fillcolor=color,
+                hovertemplate=f"<b>{name}</b><br>%{{x|%b %Y}}<br>%{{y:.1f}}%<extra></extra>",
+            ))
+        fig.update_layout(**PLOTLY_LAYOUT, height=380,
+                          title=f"{profile['country']}: Phase 1–5 (%)",
+                          yaxis_title="Share of analysed population (%)")
+        return fig
+
+    fig_comp = FIGURES.get_or_build(figure_key("country_composition", pct[["date", *phase_pct]], iso3), _build_composition)
+    st.plotly_chart(fig_comp, use_container_width=True)
+
+with col_r:
+    st.markdown('<div class="section-label">People Counts</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-title">People in Phase 3 and Above</div>', unsafe_allow_html=True)
+    st.markdown('<div class="section-desc">Absolute numbers in Crisis, Emergency and Catastrophe at each analysis.</div>', unsafe_allow_html=True)
+
+    def _build_people():
+        fig = go.Figure()
+        for col, name, color in list(zip(phase_people, PHASE_NAMES, PHASE_COLORS))[2:]:
+            fig.add_trace(go.Bar(
+                x=people["date"], y=people[col].fillna(0) / 1e6, name=name,
+                marker_color=color,
+                hovertemplate=f"<b>{name}</b><br>%{{x|%b %Y}}<br>%{{y:.2f}}M<extra></extra>",
+            ))
+        fig.update_layout(**PLOTLY_LAYOUT, height=380, barmode="stack",
+                          title=f"{profile['country']}: Phase 3+ People",
+                          yaxis_title="People (M)")
+        return fig
+
+    fig_ppl = FIGURES.get_or_build(figure_key("country_people", people[["date", *phase_people]], iso3), _build_people)
+    st.plotly_chart(fig_ppl, use_container_width=True)
+
+# ─────────────────────────────────────────────
+# TREND
+# ─────────────────────────────────────────────
+st.markdown("---")
+st.markdown('<div class="section-label">Trend & Volatility</div>', unsafe_allow_html=True)
+st.markdown('<div class="section-title">Phase 3+ Share Against Its Linear Trend</div>', unsafe_allow_html=True)
+st.markdown('<div class="section-desc">The fitted line is the per-analysis slope used in the dashboard\'s deterioration ranking; the band is one standard deviation around the mean.</div>', unsafe_allow_html=True)
+
+def _build_trend():
+    y = pct["crisis_plus_pct"].to_numpy(dtype=float)
+    fig = go.Figure()
+    if not np.isnan(summary["std"]):
+        fig.add_hrect(y0=summary["mean"] - summary["std"], y1=summary["mean"] + summary["std"],
+                      fillcolor=TEAL, opacity=0.08, line_width=0)
+    fig.add_trace(go.Scatter(
+        x=pct["date"], y=y, mode="lines+markers", name="Phase 3+",
+        line=dict(color=GOLD, width=2.5), marker=dict(size=6),
+        hovertemplate="%{x|%b %Y}<br>Phase 3+: %{y:.1f}%<extra></extra>",
+    ))
+    if not np.isnan(summary["slope"]):
+        x = np.arange(len(y))
+        fitted = summary["slope"] * (x - x.mean()) + y.mean()
+        fig.add_trace(go.Scatter(
+            x=pct["date"], y=fitted, mode="lines", name="Linear trend",
+            line=dict(color=CRIMSON if summary["slope"] > 0 else TEAL, width=2, dash="dash"),
+            hoverinfo="skip",
+        ))
+    fig.update_layout(**PLOTLY_LAYOUT, height=340, yaxis_title="Phase 3+ (%)")
+    return fig
+
+fig_trend = FIGURES.get_or_build(figure_key("country_trend", pct[["date", "crisis_plus_pct"]], iso3), _build_trend)
+st.plotly_chart(fig_trend, use_container_width=True)
+
+with st.expander("All analyses"):
+    st.dataframe(
+        pct[["date", *phase_pct, "crisis_plus_pct"]].merge(
+            people[["date", "crisis_plus_people"]], on="date", how="outer"
+        ).assign(date=lambda d: d["date"].dt.strftime("%Y-%m")),
+        use_container_width=True, hide_index=True,
+    )
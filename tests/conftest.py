@@ -0,0 +1,13 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True, scope="session")
+def _cache_dir(tmp_path_factory):
+    # Snapshots, indexes and stores written by the code under test stay out of ~/.cache
+    os.environ["OBSERVATORY_CACHE_DIR"] = str(tmp_path_factory.mktemp("cache"))
@@ -0,0 +1,43 @@
+import asyncio
+
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+
+from observatory import api
+
+
+def _get(*paths):
+    async def run():
+        async with TestClient(TestServer(api.create_app())) as client:
+            out = []
+            for path in paths:
+                response = await client.get(path)
+                out.append((response.status, await response.json()))
+            return out
+
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("query", ["start=", "end=", "start=garbage", "end=2024-13", "start=NaT"])
+def test_bad_dates_are_rejected(query):
+    [(status, body)] = _get(f"/global-trend?{query}")
+    assert status == 400
+    assert "must be a date" in body["error"]
+
+
+def test_valid_dates_are_echoed():
+    [(status, body)] = _get("/global-trend?start=2020-01&end=2021-06")
+    assert status == 200
+    assert (body["filters"]["start"], body["filters"]["end"]) == ("2020-01", "2021-06")
+
+
+@pytest.mark.parametrize("n", ["0", "-5", str(api.MAX_ROWS + 1)])
+def test_row_limit_is_bounded(n):
+    [(status, _)] = _get(f"/top-burden?n={n}")
+    assert status == 400
+
+
+def test_similar_before_the_first_quarter_names_the_requested_date():
+    [(status, body)] = _get("/similar?country=Sudan&end=1990-03")
+    assert status == 404
+    assert "ending 1990-03" in body["error"]
@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from observatory import analytics, kernels
+
+KEYS = ["iso3", "country", "date"]
+COLUMNS = ["REF_AREA", "REF_AREA_LABEL", "UNIT_MEASURE", "COMP_BREAKDOWN_2", "TIME_PERIOD", "OBS_VALUE", "OBS_STATUS"]
+
+
+@pytest.fixture(params=["numpy", "loop"])
+def implementation(request, monkeypatch):
+    """Run each test on the NumPy kernels and on the loop kernels (interpreted without Numba)."""
+    if request.param == "loop":
+        monkeypatch.setattr(kernels, "_wls_impl", kernels._wls_loop)
+        monkeypatch.setattr(kernels, "_mean_std_impl", kernels._mean_std_loop)
+        monkeypatch.setattr(kernels, "_pivot_impl", kernels._pivot_loop)
+    # Compiled, the loops divide like NumPy arrays; interpreted, 0/0 on a scalar warns
+    with np.errstate(invalid="ignore", divide="ignore"):
+        yield request.param
+
+
+@pytest.fixture(scope="module")
+def wide():
+    wide_people, wide_pct = analytics.load_data(analytics.DEFAULT_DATA_PATH)
+    return wide_people, wide_pct
+
+
+def test_kernels_agree():
+    assert kernels.check() == []
+
+
+def test_unknown_pivot_reduction_is_rejected():
+    with pytest.raises(ValueError, match="Unknown reduction"):
+        kernels.pivot_reduce([0], [0], [1.0], 1, 1, how="max")
+
+
+# ─────────────────────────────────────────────
+# load_data against pivot_table
+# ─────────────────────────────────────────────
+def _edge_case_csv(path):
+    """Duplicate cells (sum vs mean), a missing value, a withheld Phase 5 and a country with no PT rows."""
+    rows = [
+        ("AAA", "Kenya", "PS", "IPC_IPC_PHASE1", "2021-01", 100.0, "A"),
+        ("AAA", "Kenya", "PS", "IPC_IPC_PHASE1", "2021-01", 50.0, "A"),
+        ("AAA", "Kenya", "PS", "IPC_IPC_PHASE3", "2021-01", 30.0, "A"),
+        ("AAA", "Kenya", "PS", "IPC_IPC_PHASE4", "2021-01", None, "O"),
+        ("AAA", "Kenya", "PT", "IPC_IPC_PHASE3", "2021-01", 0.2, "A"),
+        ("AAA", "Kenya", "PT", "IPC_IPC_PHASE3", "2021-01", 0.4, "A"),
+        ("AAA", "Kenya", "PT", "IPC_IPC_PHASE4", "2021-01", 0.1, "E"),
+        ("AAA", "Kenya", "PT", "IPC_IPC_PHASE3", "2021-07", 0.3, "A"),
+        ("BBB", "Mali", "PS", "IPC_IPC_PHASE2", "2020-11", 7.0, "A"),
+        ("BBB", "Mali", "PS", "IPC_IPC_PHASE5", "2020-11", 1.0, "A"),
+        ("BBB", "Mali", "PS", "IPC_IPC_PHASE5", "bad", 1.0, "A"),
+    ]
+    pd.DataFrame(rows, columns=COLUMNS).to_csv(path, index=False)
+    return path
+
+
+def _pivot_table(file):
+    """Phase columns of both wide frames as ``pivot_table`` builds them."""
+    raw = pd.read_csv(file)
+    raw["date"] = pd.to_datetime(raw["TIME_PERIOD"], format="%Y-%m", errors="coerce")
+    raw["phase"] = raw["COMP_BREAKDOWN_2"].str.extract(r"PHASE(\d)").astype(float)
+    raw = raw.rename(columns={"REF_AREA": "iso3", "REF_AREA_LABEL": "country"}).dropna(subset=["date", "phase", "OBS_VALUE"])
+    raw["phase"] = raw["phase"].astype(int)
+    out = []
+    for unit, how, suffix in (("PS", "sum", "people"), ("PT", "mean", "pct")):
+        table = raw[raw["UNIT_MEASURE"] == unit].pivot_table(index=KEYS, columns="phase", values="OBS_VALUE", aggfunc=how)
+        table.columns = [f"phase_{c}_{suffix}" for c in table.columns]
+        out.append(table)
+    return out
+
+
+@pytest.mark.parametrize("source", ["bundled", "edge cases"])
+def test_load_data_matches_pivot_table(source, implementation, tmp_path):
+    file = analytics.DEFAULT_DATA_PATH if source == "bundled" else _edge_case_csv(tmp_path / "ipc.csv")
+    for frame, expected in zip(analytics.load_data(file), _pivot_table(file)):
+        actual = frame.set_index(KEYS)[expected.columns]
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+
+# ─────────────────────────────────────────────
+# country_slopes / volatility_stats against the previous formulas
+# ─────────────────────────────────────────────
+def _reference_slopes(wp, w, min_points=6):
+    """Per-country weighted least-squares slope, fitted country by country."""
+    rows = []
+    for (country, region), group in wp.assign(w=w).sort_values(["country", "date"]).groupby(["country", "Region"]):
+        if (group["w"] > 0).sum() <= min_points:
+            continue
+        x, y, gw = np.arange(len(group)), group["crisis_plus_pct"].to_numpy(), group["w"].to_numpy()
+        rows.append((country, np.polyfit(x, y, 1, w=np.sqrt(gw))[0], region))
+    return pd.DataFrame(rows, columns=["country", "slope", "region"])
+
+
+def _reference_volatility(wp, w):
+    """Per-country weighted mean and reliability-weighted standard deviation."""
+    rows = []
+    for (country, region), group in wp.assign(w=w).groupby(["country", "Region"]):
+        y, gw = group["crisis_plus_pct"].to_numpy(), group["w"].to_numpy()
+        mean = np.average(y, weights=gw) if gw.sum() > 0 else np.nan
+        with np.errstate(invalid="ignore", divide="ignore"):
+            std = np.sqrt((gw * (y - mean) ** 2).sum() / (gw.sum() - (gw * gw).sum() / gw.sum()))
+        rows.append((country, mean, std, region))
+    return pd.DataFrame(rows, columns=["country", "mean", "std", "Region"]).dropna().reset_index(drop=True)
+
+
+@pytest.mark.parametrize("quality", analytics.QUALITY_MODES)
+def test_country_slopes_match_reference(wide, quality, implementation):
+    _, wp = wide
+    w = analytics.quality_weights(wp["obs_flags"], quality)
+    actual = analytics.country_slopes(wp, weights=w)
+    pd.testing.assert_frame_equal(actual, _reference_slopes(wp, w), check_exact=False, rtol=1e-9)
+
+
+@pytest.mark.parametrize("quality", analytics.QUALITY_MODES)
+def test_volatility_stats_match_reference(wide, quality, implementation):
+    _, wp = wide
+    w = analytics.quality_weights(wp["obs_flags"], quality)
+    actual = analytics.volatility_stats(wp, weights=w).reset_index(drop=True)
+    pd.testing.assert_frame_equal(actual, _reference_volatility(wp, w), check_exact=False, rtol=1e-9)
+
+
+def test_equal_weights_give_the_sample_statistics(wide):
+    _, wp = wide
+    stats = analytics.volatility_stats(wp).set_index("country")
+    grouped = wp.groupby("country")["crisis_plus_pct"]
+    expected = grouped.std(ddof=1).dropna()
+    pd.testing.assert_series_equal(stats["std"], expected.rename("std"), check_exact=False, rtol=1e-9)
+    pd.testing.assert_series_equal(stats["mean"], grouped.mean()[expected.index].rename("mean"),
+                                   check_exact=False, rtol=1e-12)